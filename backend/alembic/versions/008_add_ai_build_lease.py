@@ -0,0 +1,25 @@
+"""Add ai_build_owner and ai_build_heartbeat_at to companies table
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-01-08 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Add build lease columns to companies table
+    op.add_column('companies', sa.Column('ai_build_owner', sa.String(), nullable=True))
+    op.add_column('companies', sa.Column('ai_build_heartbeat_at', sa.DateTime(), nullable=True))
+
+def downgrade():
+    # Remove build lease columns
+    op.drop_column('companies', 'ai_build_heartbeat_at')
+    op.drop_column('companies', 'ai_build_owner')
@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Header, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, Optional, List, Tuple
 import json
 import uuid
+import asyncio
 import logging
 from datetime import datetime, timezone
 from urllib.parse import urlparse
@@ -11,13 +15,18 @@ from urllib.parse import urlparse
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from .database import get_db, User, Company, Widget, KnowledgeBaseFile
-from .auth import get_current_user
+from .config import settings
+from .database import get_db, get_async_db, User, Company, Widget, KnowledgeBaseFile
+from .auth import get_current_user, get_current_user_async
 from .schemas import (
     AIBuildRequest, AIBuildResponse, AIChatRequest, AIChatResponse,
     AIScrapeRequest, AIScrapeResponse, AIStatusResponse
 )
 from .rag_service import RAGService
+from .document_parser import file_chunk_source
+from .build_lease import (
+    take_build_lease, start_heartbeat, stop_heartbeat, claim_expired_build, is_lease_expired, is_build_abandoned
+)
 
 # Create AI router
 ai_router = APIRouter(prefix="/ai", tags=["ai"])
@@ -25,6 +34,10 @@ ai_router = APIRouter(prefix="/ai", tags=["ai"])
 # Initialize RAG service
 rag_service = RAGService()
 
+# Build statuses in which an AI-enabled company can serve chats. Rebuilds write into a
+# shadow collection version, so the live one keeps answering while status is 'building'.
+CHAT_AVAILABLE_STATUSES = ('ready', 'building')
+
 @ai_router.post("/build/{company_id}", response_model=AIBuildResponse)
 def build_ai_for_company(
     company_id: int,
@@ -63,13 +76,15 @@ def build_ai_for_company(
             detail="AI is already being built for this company"
         )
     
-    # Generate unique collection name
-    collection_name = f"company_{company_id}_{company.name.lower().replace(' ', '_')}"
+    # Rebuild from the live collection if there is one; otherwise start a new one.
+    # The build writes a new collection version that is swapped in when it completes.
+    collection_name = company.ai_collection_name or f"company_{company_id}_{company.name.lower().replace(' ', '_')}"
     
     # Update company status
     company.ai_build_status = 'building'
     company.ai_collection_name = collection_name
     company.ai_error_message = None
+    take_build_lease(company)
     db.commit()
     
     # Start background task to build AI
@@ -119,6 +134,7 @@ def scrape_company_website(
     # Update status
     company.ai_build_status = 'building'
     company.ai_error_message = None
+    take_build_lease(company)
     db.commit()
     
     # Get website URLs from request or use company's default URLs
@@ -199,20 +215,24 @@ async def get_ai_status(
     )
 
 @ai_router.post("/chat/{company_id}", response_model=AIChatResponse)
-def chat_with_ai(
+async def chat_with_ai(
     company_id: int,
     chat_request: AIChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Chat with the company's AI assistant.
+    Fully async: no threadpool worker is held while waiting on Chroma or Gemini.
     """
     # Verify company exists and belongs to user
-    company = db.query(Company).filter(
-        Company.id == company_id,
-        Company.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Company).where(
+            Company.id == company_id,
+            Company.owner_id == current_user.id
+        )
+    )
+    company = result.scalars().first()
     
     if not company:
         raise HTTPException(
@@ -220,7 +240,7 @@ def chat_with_ai(
             detail="Company not found"
         )
     
-    if not company.ai_enabled or company.ai_build_status != 'ready':
+    if not company.ai_enabled or company.ai_build_status not in CHAT_AVAILABLE_STATUSES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="AI is not ready for this company. Please build AI first."
@@ -241,7 +261,7 @@ def chat_with_ai(
         logger.info(f"   📊 n_results: {chat_request.n_results}")
         
         # Get AI response
-        response = rag_service.get_response(
+        response = await rag_service.get_response_async(
             company.ai_collection_name,
             chat_request.message,
             n_results=chat_request.n_results
@@ -375,17 +395,15 @@ def validate_widget_domain(request: Request, widget: Widget, company: Company) -
         allowed_domains = get_allowed_domains_for_widget(widget, company)
         return False, None, allowed_domains
 
-@ai_router.post("/chat/{company_id}/widget", response_model=AIChatResponse)
-def chat_with_ai_widget(
+async def get_widget_chat_context(
     company_id: int,
-    chat_request: AIChatRequest,
     request: Request,
-    x_api_key: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
-):
+    x_api_key: Optional[str],
+    db: AsyncSession
+) -> Tuple[Widget, Company]:
     """
-    Chat with the company's AI assistant via widget (API key authentication).
-    Validates that the request is coming from an allowed domain.
+    Authenticate a widget chat request and return its widget and company.
+    Validates the API key, the request domain and that the company's AI is ready.
     """
     # Validate API key
     if not x_api_key:
@@ -395,11 +413,14 @@ def chat_with_ai_widget(
         )
     
     # Find widget by API key and company
-    widget = db.query(Widget).filter(
-        Widget.company_id == company_id,
-        Widget.api_key == x_api_key,
-        Widget.is_active == True
-    ).first()
+    result = await db.execute(
+        select(Widget).where(
+            Widget.company_id == company_id,
+            Widget.api_key == x_api_key,
+            Widget.is_active == True
+        )
+    )
+    widget = result.scalars().first()
     
     if not widget:
         raise HTTPException(
@@ -408,7 +429,8 @@ def chat_with_ai_widget(
         )
     
     # Verify company exists
-    company = db.query(Company).filter(Company.id == company_id).first()
+    result = await db.execute(select(Company).where(Company.id == company_id))
+    company = result.scalars().first()
     
     if not company:
         raise HTTPException(
@@ -425,7 +447,7 @@ def chat_with_ai_widget(
             detail=f"Domain not allowed for this widget. Request from '{origin}' is not in the allowed domains: {allowed_domains}. Please ensure the widget is embedded on a registered domain."
         )
     
-    if not company.ai_enabled or company.ai_build_status != 'ready':
+    if not company.ai_enabled or company.ai_build_status not in CHAT_AVAILABLE_STATUSES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="AI is not ready for this company. Please build AI first."
@@ -437,6 +459,23 @@ def chat_with_ai_widget(
             detail="AI collection not found"
         )
     
+    return widget, company
+
+@ai_router.post("/chat/{company_id}/widget", response_model=AIChatResponse)
+async def chat_with_ai_widget(
+    company_id: int,
+    chat_request: AIChatRequest,
+    request: Request,
+    x_api_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Chat with the company's AI assistant via widget (API key authentication).
+    Validates that the request is coming from an allowed domain.
+    Fully async: no threadpool worker is held while waiting on Chroma or Gemini.
+    """
+    widget, company = await get_widget_chat_context(company_id, request, x_api_key, db)
+    
     try:
         # Log request origin for debugging
         origin = request.headers.get('origin', 'Not provided')
@@ -451,7 +490,7 @@ def chat_with_ai_widget(
         logger.info(f"   📊 n_results: {chat_request.n_results}")
         
         # Get AI response
-        response = rag_service.get_response(
+        response = await rag_service.get_response_async(
             company.ai_collection_name,
             chat_request.message,
             n_results=chat_request.n_results
@@ -474,6 +513,72 @@ def chat_with_ai_widget(
             detail=f"Error getting AI response: {str(e)}"
         )
 
+def format_sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format a Server-Sent Events message with a JSON payload."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+@ai_router.post("/chat/{company_id}/widget/stream")
+async def chat_with_ai_widget_stream(
+    company_id: int,
+    chat_request: AIChatRequest,
+    request: Request,
+    x_api_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Streaming variant of the widget chat endpoint.
+    Emits Server-Sent Events: one `data: {"delta": ...}` message per generated text chunk,
+    then an `event: done` message carrying the full response and timestamp.
+    """
+    widget, company = await get_widget_chat_context(company_id, request, x_api_key, db)
+    collection_name = company.ai_collection_name
+    
+    logger.info(f"💬 WIDGET STREAMING CHAT REQUEST RECEIVED:")
+    logger.info(f"   🏢 Company ID: {company_id}")
+    logger.info(f"   🔑 Widget ID: {widget.widget_id}")
+    logger.info(f"   📝 Message: '{chat_request.message}'")
+    logger.info(f"   🎯 Collection: '{collection_name}'")
+    
+    async def event_stream():
+        response_parts = []
+        try:
+            async for delta in rag_service.stream_response_async(
+                collection_name,
+                chat_request.message,
+                n_results=chat_request.n_results
+            ):
+                if await request.is_disconnected():
+                    logger.info(f"Widget client disconnected during stream for company {company_id}")
+                    return
+                response_parts.append(delta)
+                yield format_sse_event({"delta": delta})
+            
+            response = "".join(response_parts)
+            logger.info(f"✅ WIDGET STREAMING CHAT RESPONSE GENERATED:")
+            logger.info(f"   📏 Response length: {len(response)} characters")
+            yield format_sse_event(
+                {
+                    "message": chat_request.message,
+                    "response": response,
+                    "company_id": company_id,
+                    "timestamp": datetime.utcnow().isoformat()
+                },
+                event="done"
+            )
+        except Exception as e:
+            logger.error(f"❌ WIDGET STREAMING CHAT ERROR: {str(e)}")
+            yield format_sse_event({"detail": f"Error getting AI response: {str(e)}"}, event="error")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx) so tokens flush immediately
+        }
+    )
+
 @ai_router.delete("/disable/{company_id}")
 def disable_ai_for_company(
     company_id: int,
@@ -530,6 +635,7 @@ async def build_ai_background_task(company_id: int, website_urls: list, collecti
     from .database import SessionLocal
     
     db = SessionLocal()
+    heartbeat = None
     try:
         # Get company from database
         company = db.query(Company).filter(Company.id == company_id).first()
@@ -543,20 +649,27 @@ async def build_ai_background_task(company_id: int, website_urls: list, collecti
         company.ai_build_status = 'building'
         company.ai_error_message = None
         company.ai_build_progress = None
+        take_build_lease(company)
         db.commit()
+        heartbeat = start_heartbeat(company_id)
         
         # Create progress callback
         def progress_callback(message: str, details: Optional[Dict[str, Any]] = None):
             update_progress_in_db(db, company_id, message, details)
         
-        # Scrape website using RAG service
+        # Scrape website using RAG service (chunks of files deleted since the last build are not carried over)
+        current_files = db.query(KnowledgeBaseFile).filter(KnowledgeBaseFile.company_id == company_id).all()
         scrape_result = await rag_service.scrape_website(
             website_urls, 
             collection_name,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            file_sources=[file_chunk_source(file.file_path) for file in current_files]
         )
         
         if scrape_result["status"] == "success":
+            # The build wrote a new collection version; files go into it before it goes live
+            new_collection_name = scrape_result["collection_name"]
+            
             # Process uploaded files if any exist
             files = db.query(KnowledgeBaseFile).filter(
                 KnowledgeBaseFile.company_id == company_id
@@ -572,7 +685,7 @@ async def build_ai_background_task(company_id: int, website_urls: list, collecti
                     file_paths=file_paths,
                     file_types=file_types,
                     filenames=filenames,
-                    collection_name=collection_name,
+                    collection_name=new_collection_name,
                     progress_callback=progress_callback
                 )
                 
@@ -581,9 +694,10 @@ async def build_ai_background_task(company_id: int, website_urls: list, collecti
                 else:
                     logger.warning(f"Some files failed to process: {file_result.get('message', 'Unknown error')}")
             
-            # Update company with success and clear progress
+            # Update company with success and clear progress - this atomically swaps in the new version
             company.ai_enabled = True
             company.ai_build_status = 'ready'
+            company.ai_collection_name = new_collection_name
             company.last_scraped_at = datetime.utcnow()
             company.ai_error_message = None
             company.ai_build_progress = None
@@ -600,6 +714,10 @@ async def build_ai_background_task(company_id: int, website_urls: list, collecti
         
         db.commit()
         
+        if scrape_result["status"] == "success":
+            # Drop collection versions that are no longer live
+            rag_service.garbage_collect_collections(new_collection_name)
+        
     except Exception as e:
         logger.error(f"Error in build_ai_background_task for company {company_id}: {e}")
         # Update company with error
@@ -613,6 +731,7 @@ async def build_ai_background_task(company_id: int, website_urls: list, collecti
         except Exception as db_error:
             logger.error(f"Error updating company status in database: {db_error}")
     finally:
+        await stop_heartbeat(heartbeat, company_id)
         db.close()
 
 async def scrape_website_background_task(company_id: int, website_urls: list, collection_name: str):
@@ -621,6 +740,7 @@ async def scrape_website_background_task(company_id: int, website_urls: list, co
     from .database import SessionLocal
     
     db = SessionLocal()
+    heartbeat = None
     try:
         # Get company from database
         company = db.query(Company).filter(Company.id == company_id).first()
@@ -634,20 +754,27 @@ async def scrape_website_background_task(company_id: int, website_urls: list, co
         company.ai_build_status = 'building'
         company.ai_error_message = None
         company.ai_build_progress = None
+        take_build_lease(company)
         db.commit()
+        heartbeat = start_heartbeat(company_id)
         
         # Create progress callback
         def progress_callback(message: str, details: Optional[Dict[str, Any]] = None):
             update_progress_in_db(db, company_id, message, details)
         
-        # Scrape website using RAG service
+        # Scrape website using RAG service (chunks of files deleted since the last build are not carried over)
+        current_files = db.query(KnowledgeBaseFile).filter(KnowledgeBaseFile.company_id == company_id).all()
         scrape_result = await rag_service.scrape_website(
             website_urls, 
             collection_name,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            file_sources=[file_chunk_source(file.file_path) for file in current_files]
         )
         
         if scrape_result["status"] == "success":
+            # The build wrote a new collection version; files go into it before it goes live
+            new_collection_name = scrape_result["collection_name"]
+            
             # Process uploaded files if any exist
             files = db.query(KnowledgeBaseFile).filter(
                 KnowledgeBaseFile.company_id == company_id
@@ -663,7 +790,7 @@ async def scrape_website_background_task(company_id: int, website_urls: list, co
                     file_paths=file_paths,
                     file_types=file_types,
                     filenames=filenames,
-                    collection_name=collection_name,
+                    collection_name=new_collection_name,
                     progress_callback=progress_callback
                 )
                 
@@ -672,8 +799,9 @@ async def scrape_website_background_task(company_id: int, website_urls: list, co
                 else:
                     logger.warning(f"Some files failed to process: {file_result.get('message', 'Unknown error')}")
             
-            # Update company with success and clear progress
+            # Update company with success and clear progress - this atomically swaps in the new version
             company.ai_build_status = 'ready'
+            company.ai_collection_name = new_collection_name
             company.last_scraped_at = datetime.utcnow()
             company.ai_error_message = None
             company.ai_build_progress = None
@@ -690,6 +818,10 @@ async def scrape_website_background_task(company_id: int, website_urls: list, co
         
         db.commit()
         
+        if scrape_result["status"] == "success":
+            # Drop collection versions that are no longer live
+            rag_service.garbage_collect_collections(new_collection_name)
+        
     except Exception as e:
         logger.error(f"Error in scrape_website_background_task for company {company_id}: {e}")
         # Update company with error
@@ -703,4 +835,70 @@ async def scrape_website_background_task(company_id: int, website_urls: list, co
         except Exception as db_error:
             logger.error(f"Error updating company status in database: {db_error}")
     finally:
+        await stop_heartbeat(heartbeat, company_id)
         db.close()
+
+# Builds restarted by resume_interrupted_builds (referenced until they finish)
+_resumed_builds: set = set()
+
+async def resume_interrupted_builds():
+    """
+    Restart builds left in 'building' by a process restart. Only builds whose owner
+    is gone (see build_lease) and whose crawl checkpoint (see build_checkpoint) is
+    on this instance are resumed; each continues from its checkpoint instead of
+    re-crawling from scratch. Builds no instance can resume are marked failed.
+    """
+    from .database import SessionLocal
+    from .build_checkpoint import get_build_checkpoints
+    
+    if SessionLocal is None:
+        return
+    checkpoints = get_build_checkpoints()
+    db = SessionLocal()
+    try:
+        companies = db.query(Company).filter(Company.ai_build_status == 'building').all()
+        for company in companies:
+            if not is_lease_expired(company):
+                continue  # Still running on its owner
+            
+            build = None
+            if checkpoints and company.ai_collection_name:
+                build = await asyncio.to_thread(checkpoints.get_build, company.ai_collection_name)
+            if build is None and checkpoints is not None and not is_build_abandoned(company):
+                # The checkpoint may be on another instance; leave it to that one until the build is abandoned
+                logger.info(f"No local checkpoint for interrupted AI build of company {company.id}, not resuming yet")
+                continue
+            if not claim_expired_build(db, company):
+                continue  # Another instance took it over first
+            
+            if build is None or not build.urls:
+                # No instance has (or kept) a checkpoint for this build
+                logger.warning(f"Interrupted AI build of company {company.id} cannot be resumed, marking it failed")
+                company.ai_build_status = 'failed'
+                company.ai_error_message = "Build was interrupted by a server restart and could not be resumed"
+                company.ai_build_progress = None
+                company.ai_build_owner = None
+                company.ai_build_heartbeat_at = None
+                db.commit()
+                continue
+            
+            # AI-enabled companies were re-scraping; the others were on their first build
+            task_function = scrape_website_background_task if company.ai_enabled else build_ai_background_task
+            logger.info(f"Resuming interrupted AI build for company {company.id}")
+            task = asyncio.create_task(task_function(company.id, build.urls, company.ai_collection_name))
+            _resumed_builds.add(task)
+            task.add_done_callback(_resumed_builds.discard)
+    finally:
+        db.close()
+
+async def watch_interrupted_builds():
+    """
+    Run resume_interrupted_builds now and then every heartbeat interval, so builds
+    whose lease expires later (or whose owner on another instance dies) are picked up.
+    """
+    while True:
+        try:
+            await resume_interrupted_builds()
+        except Exception as e:
+            logger.warning(f"Could not resume interrupted AI builds: {e}")
+        await asyncio.sleep(settings.build_heartbeat_interval_seconds)
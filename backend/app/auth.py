@@ -4,8 +4,10 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from .database import get_db, User
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_db, get_async_db, User
 from .schemas import TokenData
 from .config import settings
 
@@ -39,20 +41,26 @@ def authenticate_user(db: Session, username: str, password: str):
         return False
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str) -> TokenData:
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+            raise _credentials_exception()
+        return TokenData(username=username)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    credentials_exception = _credentials_exception()
+    token_data = _decode_token(token)
     
     try:
         user = db.query(User).filter(User.username == token_data.username).first()
@@ -70,3 +78,25 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
                 detail="Database connection error. Please try again later."
             )
         raise credentials_exception
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    credentials_exception = _credentials_exception()
+    token_data = _decode_token(token)
+    
+    try:
+        result = await db.execute(select(User).where(User.username == token_data.username))
+        user = result.scalars().first()
+        if user is None:
+            raise credentials_exception
+        return user
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Database error in get_current_user_async: {e}")
+        # If it's a database error, return 503 instead of 401
+        if "database" in str(e).lower() or "connection" in str(e).lower():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database connection error. Please try again later."
+            )
+        raise credentials_exception
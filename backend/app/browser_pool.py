@@ -0,0 +1,258 @@
+"""
+Process-wide Chromium browser pool for the website crawler.
+Keeps a fixed number of long-lived browsers, leases pages to crawls and recycles
+browser contexts after N pages or when Chromium memory exceeds a ceiling, so
+launch cost is paid once and memory stays bounded however many builds run.
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+from .config import settings
+from .loop_bound import close_stale
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Try to import optional process inspection (needed for the RSS ceiling)
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# User agent to avoid being blocked
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+BROWSER_ARGS = [
+    '--disable-gpu',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-setuid-sandbox',
+]
+
+RSS_CHECK_INTERVAL_SECONDS = 5.0
+
+
+class _PooledContext:
+    """A browser context plus its lease bookkeeping."""
+
+    def __init__(self, context: BrowserContext):
+        self.context = context
+        self.pages_opened = 0
+        self.active_pages = 0
+        self.retired = False  # No new leases; closed once active_pages drops to 0
+
+
+class _PooledBrowser:
+    """A browser and its contexts (the last non-retired one takes new leases)."""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.contexts: List[_PooledContext] = []
+
+    @property
+    def active_pages(self) -> int:
+        return sum(ctx.active_pages for ctx in self.contexts)
+
+    def current_context(self) -> Optional[_PooledContext]:
+        if self.contexts and not self.contexts[-1].retired:
+            return self.contexts[-1]
+        return None
+
+
+class BrowserPool:
+    """
+    Fixed-size pool of Chromium browsers shared by every crawl in the process.
+
+    Pages are leased with `async with pool.lease_page() as page:`. At most
+    max_pages pages are open at once across all builds; leases go to the least
+    loaded browser. A context is recycled after context_max_pages pages, and all
+    contexts are recycled when Chromium's total RSS exceeds max_rss_mb.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_pages: int = 8,
+        context_max_pages: int = 100,
+        max_rss_mb: int = 1500
+    ):
+        self.size = size
+        self.context_max_pages = context_max_pages
+        self.max_rss_mb = max_rss_mb
+        self._loop = asyncio.get_running_loop()
+        self._playwright = None
+        self._browsers: List[Optional[_PooledBrowser]] = [None] * size
+        self._lock = asyncio.Lock()
+        self._page_slots = asyncio.Semaphore(max_pages)
+        self._last_rss_check = 0.0
+
+        # Statistics
+        self.browsers_launched = 0
+        self.contexts_created = 0
+        self.contexts_recycled = 0
+        self.pages_leased = 0
+
+        if max_rss_mb and not PSUTIL_AVAILABLE:
+            logger.warning("psutil not available; browser pool RSS ceiling is disabled.")
+
+    async def _launch_browser(self) -> _PooledBrowser:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+        self.browsers_launched += 1
+        logger.info(f"🌐 Launched pooled Chromium browser ({self.browsers_launched} launches so far)")
+        return _PooledBrowser(browser)
+
+    async def _pick_browser(self) -> _PooledBrowser:
+        """Least loaded browser, launching (or relaunching after a crash) as needed."""
+        for index, pooled in enumerate(self._browsers):
+            if pooled is not None and not pooled.browser.is_connected():
+                logger.warning("Pooled browser disconnected, relaunching")
+                self._browsers[index] = None
+
+        for index, pooled in enumerate(self._browsers):
+            if pooled is None:
+                self._browsers[index] = await self._launch_browser()
+                return self._browsers[index]
+
+        return min(self._browsers, key=lambda pooled: pooled.active_pages)
+
+    async def _context_for(self, pooled: _PooledBrowser) -> _PooledContext:
+        ctx = pooled.current_context()
+        if ctx is None:
+            context = await pooled.browser.new_context(
+                user_agent=DEFAULT_USER_AGENT,
+                viewport={'width': 1920, 'height': 1080},
+                ignore_https_errors=True
+            )
+            ctx = _PooledContext(context)
+            pooled.contexts.append(ctx)
+            self.contexts_created += 1
+        return ctx
+
+    def _browser_rss_mb(self) -> float:
+        """Total RSS of the Chromium processes spawned by this process."""
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / (1024 * 1024)
+
+    def _check_rss(self):
+        """Retire every context if Chromium memory is above the ceiling (throttled)."""
+        if not self.max_rss_mb or not PSUTIL_AVAILABLE:
+            return
+        now = time.monotonic()
+        if now - self._last_rss_check < RSS_CHECK_INTERVAL_SECONDS:
+            return
+        self._last_rss_check = now
+
+        rss_mb = self._browser_rss_mb()
+        if rss_mb > self.max_rss_mb:
+            logger.info(f"Chromium RSS {rss_mb:.0f} MB exceeds {self.max_rss_mb} MB, recycling browser contexts")
+            for pooled in self._browsers:
+                if pooled is not None:
+                    for ctx in pooled.contexts:
+                        ctx.retired = True
+
+    async def _close_drained_contexts(self):
+        for pooled in self._browsers:
+            if pooled is None:
+                continue
+            for ctx in [ctx for ctx in pooled.contexts if ctx.retired and ctx.active_pages == 0]:
+                pooled.contexts.remove(ctx)
+                self.contexts_recycled += 1
+                try:
+                    await ctx.context.close()
+                except Exception as e:
+                    logger.debug(f"Error closing recycled browser context: {e}")
+
+    @asynccontextmanager
+    async def lease_page(self, resource_filter=None) -> AsyncIterator[Page]:
+        """
+        Lease a fresh page from the pool; it is closed when the block exits.
+
+        Args:
+            resource_filter: Optional ResourceFilter to install on the page
+        """
+        async with self._page_slots:
+            async with self._lock:
+                pooled = await self._pick_browser()
+                ctx = await self._context_for(pooled)
+                ctx.active_pages += 1
+                ctx.pages_opened += 1
+                if ctx.pages_opened >= self.context_max_pages:
+                    ctx.retired = True  # Next lease starts a fresh context
+                self.pages_leased += 1
+
+            page = None
+            try:
+                page = await ctx.context.new_page()
+                if resource_filter:
+                    await resource_filter.attach(page)
+                yield page
+            finally:
+                if page:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass  # Browser may have crashed or been closed
+                async with self._lock:
+                    ctx.active_pages -= 1
+                    self._check_rss()
+                    await self._close_drained_contexts()
+
+    async def close(self):
+        """Close every browser and stop Playwright."""
+        async with self._lock:
+            for index, pooled in enumerate(self._browsers):
+                if pooled is None:
+                    continue
+                try:
+                    await pooled.browser.close()
+                except Exception as e:
+                    logger.debug(f"Error closing pooled browser: {e}")
+                self._browsers[index] = None
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+        logger.info(
+            f"Browser pool closed ({self.browsers_launched} launches, {self.pages_leased} pages, "
+            f"{self.contexts_recycled}/{self.contexts_created} contexts recycled)"
+        )
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Get the process-wide browser pool (created on first use in the running event loop)."""
+    global _browser_pool
+    if _browser_pool is None or _browser_pool._loop is not asyncio.get_running_loop():
+        if _browser_pool is not None:
+            close_stale(_browser_pool, "browser pool")
+        _browser_pool = BrowserPool(
+            size=settings.browser_pool_size,
+            max_pages=settings.browser_pool_max_pages,
+            context_max_pages=settings.browser_context_max_pages,
+            max_rss_mb=settings.browser_pool_max_rss_mb
+        )
+    return _browser_pool
+
+
+async def close_browser_pool():
+    """Shut down the process-wide browser pool (application shutdown)."""
+    global _browser_pool
+    if _browser_pool is not None:
+        await _browser_pool.close()
+        _browser_pool = None
@@ -0,0 +1,243 @@
+"""
+Crawl checkpoints for resumable website builds.
+Persists each build's shadow collection, crawl frontier, visited URLs and scraped
+pages incrementally, so a build interrupted by a process restart resumes where it
+stopped instead of re-rendering every page.
+"""
+
+import os
+import json
+import asyncio
+import time
+import queue
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from .config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (url, depth, base_domain, priority)
+FrontierRecord = Tuple[str, int, Optional[str], float]
+
+
+@dataclass
+class BuildState:
+    """An in-progress build as recorded in the checkpoint store."""
+    collection_name: str
+    shadow_name: str
+    urls: List[str]
+    started_at: float
+
+
+class BuildCheckpoint:
+    """
+    Checkpoint writer/reader for one build (keyed by the live collection name).
+
+    A URL is recorded as pending when it is queued on the frontier and as visited
+    once its crawl finishes; pages emitted by the crawler are stored with the
+    visited row so they can be replayed into the ingest pipeline on resume.
+    A crawled page, the links found on it and its visited mark are committed in
+    one transaction (finish_url), so a crash never keeps the page but loses its links.
+    """
+
+    def __init__(self, store: "BuildCheckpointStore", collection_name: str, resumed: bool = False):
+        self.store = store
+        self.collection_name = collection_name
+        self.resumed = resumed
+        self._pages: Dict[str, Dict[str, Any]] = {}  # Emitted pages waiting for finish_url
+
+    def _pending_statement(self, records: List[FrontierRecord]) -> Tuple[str, List[tuple]]:
+        return (
+            "INSERT OR IGNORE INTO checkpoint_frontier (collection_name, url, depth, base_domain, priority) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(self.collection_name, *record) for record in records]
+        )
+
+    def add_pending(self, records: List[FrontierRecord]):
+        """Record URLs queued on the frontier."""
+        if not records:
+            return
+        self.store._write([self._pending_statement(records)])
+
+    def save_page(self, page: Dict[str, Any]):
+        """Hold a scraped page until its URL is finished (written by finish_url)."""
+        self._pages[page['url']] = page
+
+    def finish_url(self, url: str, records: List[FrontierRecord]):
+        """
+        Record a URL whose crawl finished: its saved page (if any), the links queued
+        from it and its visited mark, in one transaction.
+        """
+        page = self._pages.pop(url, None)
+        statements = [self._pending_statement(records)] if records else []
+        if page is not None:
+            statements.append((
+                "INSERT OR REPLACE INTO checkpoint_visited (collection_name, url, title, markdown) VALUES (?, ?, ?, ?)",
+                [(self.collection_name, url, page.get('title', ''), page.get('markdown', ''))]
+            ))
+        else:
+            statements.append((
+                "INSERT OR IGNORE INTO checkpoint_visited (collection_name, url, title, markdown) VALUES (?, ?, NULL, NULL)",
+                [(self.collection_name, url)]
+            ))
+        self.store._write(statements)
+
+    def visited_urls(self) -> Set[str]:
+        rows = self.store._read(
+            "SELECT url FROM checkpoint_visited WHERE collection_name = ?", (self.collection_name,)
+        )
+        return {row[0] for row in rows}
+
+    def pending(self) -> List[FrontierRecord]:
+        """Queued URLs that were not crawled yet."""
+        return self.store._read(
+            "SELECT f.url, f.depth, f.base_domain, f.priority FROM checkpoint_frontier f "
+            "LEFT JOIN checkpoint_visited v ON v.collection_name = f.collection_name AND v.url = f.url "
+            "WHERE f.collection_name = ? AND v.url IS NULL",
+            (self.collection_name,)
+        )
+
+    async def iter_pages(self, batch_size: int = 50) -> AsyncIterator[Dict[str, Any]]:
+        """Saved pages in the order they were scraped (streamed in batches, read off the event loop)."""
+        last_rowid = 0
+        while True:
+            rows = await asyncio.to_thread(
+                self.store._read,
+                "SELECT rowid, url, title, markdown FROM checkpoint_visited "
+                "WHERE collection_name = ? AND markdown IS NOT NULL AND rowid > ? ORDER BY rowid LIMIT ?",
+                (self.collection_name, last_rowid, batch_size)
+            )
+            if not rows:
+                return
+            for rowid, url, title, markdown in rows:
+                yield {'url': url, 'title': title or url, 'markdown': markdown}
+            last_rowid = rows[-1][0]
+
+
+class BuildCheckpointStore:
+    """
+    SQLite-backed checkpoint store shared by every build in the process.
+    Each thread uses its own connection (WAL), like the crawl cache. Writes are
+    queued to a single writer thread that commits them in batches, so crawl
+    workers never wait on SQLite on the event loop. Reads wait for queued writes
+    (flush), so call them through asyncio.to_thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS build_checkpoints ("
+                "collection_name TEXT PRIMARY KEY, shadow_name TEXT NOT NULL, urls TEXT NOT NULL, started_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint_frontier ("
+                "collection_name TEXT, url TEXT, depth INTEGER, base_domain TEXT, priority REAL, "
+                "PRIMARY KEY (collection_name, url))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint_visited ("
+                "collection_name TEXT, url TEXT, title TEXT, markdown TEXT, "
+                "PRIMARY KEY (collection_name, url))"
+            )
+        self._writes: "queue.Queue[List[Tuple[str, List[tuple]]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="build-checkpoint-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, statements: List[Tuple[str, List[tuple]]]):
+        """Queue (sql, rows) statements for the writer thread, committed in the same transaction (returns immediately)."""
+        self._writes.put(statements)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._connect() as conn:
+                    for statements in batch:
+                        for sql, rows in statements:
+                            conn.executemany(sql, rows)
+            except Exception as e:
+                # A missed checkpoint only costs re-crawling on resume
+                logger.warning(f"Build checkpoint write failed: {e}")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+
+    def flush(self):
+        """Wait until every queued write is committed."""
+        self._writes.join()
+
+    def _read(self, sql: str, params: tuple) -> List[tuple]:
+        self.flush()  # Reads (only when resuming) see every earlier write
+        try:
+            return self._connect().execute(sql, params).fetchall()
+        except Exception as e:
+            logger.warning(f"Build checkpoint read failed: {e}")
+            return []
+
+    def get_build(self, collection_name: str) -> Optional[BuildState]:
+        """The unfinished build for a collection, if any."""
+        rows = self._read(
+            "SELECT collection_name, shadow_name, urls, started_at FROM build_checkpoints WHERE collection_name = ?",
+            (collection_name,)
+        )
+        if not rows:
+            return None
+        name, shadow_name, urls, started_at = rows[0]
+        return BuildState(name, shadow_name, json.loads(urls), started_at or 0.0)
+
+    def start_build(self, collection_name: str, shadow_name: str, urls: List[str]) -> BuildCheckpoint:
+        """Begin checkpointing a new build (discarding any older checkpoint for the collection)."""
+        self.clear_build(collection_name)
+        self._write([(
+            "INSERT OR REPLACE INTO build_checkpoints (collection_name, shadow_name, urls, started_at) VALUES (?, ?, ?, ?)",
+            [(collection_name, shadow_name, json.dumps(urls), time.time())]
+        )])
+        return BuildCheckpoint(self, collection_name)
+
+    def resume_build(self, collection_name: str) -> BuildCheckpoint:
+        """Continue checkpointing an interrupted build."""
+        return BuildCheckpoint(self, collection_name, resumed=True)
+
+    def clear_build(self, collection_name: str):
+        """Forget a build's checkpoint (finished, failed or superseded)."""
+        self._write([
+            (f"DELETE FROM {table} WHERE collection_name = ?", [(collection_name,)])
+            for table in ("build_checkpoints", "checkpoint_frontier", "checkpoint_visited")
+        ])
+
+
+_build_checkpoints: Optional[BuildCheckpointStore] = None
+
+
+def get_build_checkpoints() -> Optional[BuildCheckpointStore]:
+    """Get the process-wide checkpoint store, or None if disabled in settings."""
+    global _build_checkpoints
+    if not settings.build_checkpoint_enabled:
+        return None
+    if _build_checkpoints is None:
+        _build_checkpoints = BuildCheckpointStore(settings.build_checkpoint_path)
+    return _build_checkpoints
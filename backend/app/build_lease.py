@@ -0,0 +1,146 @@
+"""
+Ownership leases for AI builds.
+The instance running a build records itself in companies.ai_build_owner and
+refreshes companies.ai_build_heartbeat_at while the build runs, so with several
+workers or instances only builds whose owner stopped heartbeating (or, on this
+host, whose process exited) are resumed.
+"""
+
+import os
+import uuid
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal, Company
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Identifies this process as a build owner (unique across workers, instances and restarts)
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def lease_cutoff() -> datetime:
+    """Heartbeats older than this belong to a dead owner."""
+    return datetime.utcnow() - timedelta(seconds=settings.build_lease_seconds)
+
+
+def _is_dead_local_owner(owner: Optional[str]) -> bool:
+    """An owner on this host whose process is gone (e.g. the server before a restart)."""
+    if not owner or owner == INSTANCE_ID:
+        return False
+    host, _, rest = owner.partition(":")
+    pid, _, _ = rest.partition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return True  # Same PID, different instance: a restarted container reuses its PIDs
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass  # Exists but belongs to another user
+    return False
+
+
+def is_lease_expired(company: Company) -> bool:
+    """The build's owner is gone: it stopped heartbeating, or it was a process on this host that exited."""
+    if company.ai_build_heartbeat_at is None or company.ai_build_heartbeat_at < lease_cutoff():
+        return True
+    return _is_dead_local_owner(company.ai_build_owner)
+
+
+def is_build_abandoned(company: Company) -> bool:
+    """No instance has resumed this expired build for build_abandon_seconds."""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.build_abandon_seconds)
+    return company.ai_build_heartbeat_at is None or company.ai_build_heartbeat_at < cutoff
+
+
+def take_build_lease(company: Company):
+    """Mark this instance as the owner of company's build (committed with the caller's status change)."""
+    company.ai_build_owner = INSTANCE_ID
+    company.ai_build_heartbeat_at = datetime.utcnow()
+
+
+def claim_expired_build(db: Session, company: Company) -> bool:
+    """
+    Take over a 'building' company that is_lease_expired judged dead.
+    A conditional UPDATE on the owner and heartbeat that were read, so it fails if the
+    owner heartbeated since, and when several instances try at once exactly one wins.
+    """
+    owner, heartbeat_at = company.ai_build_owner, company.ai_build_heartbeat_at
+    claimed = db.query(Company).filter(
+        Company.id == company.id,
+        Company.ai_build_status == 'building',
+        Company.ai_build_owner.is_(None) if owner is None else Company.ai_build_owner == owner,
+        Company.ai_build_heartbeat_at.is_(None) if heartbeat_at is None else Company.ai_build_heartbeat_at == heartbeat_at
+    ).update(
+        {Company.ai_build_owner: INSTANCE_ID, Company.ai_build_heartbeat_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    if claimed == 1:
+        db.refresh(company)
+    return claimed == 1
+
+
+def _renew(company_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        renewed = db.query(Company).filter(
+            Company.id == company_id,
+            Company.ai_build_owner == INSTANCE_ID
+        ).update({Company.ai_build_heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return renewed == 1
+    finally:
+        db.close()
+
+
+def _release(company_id: int):
+    db = SessionLocal()
+    try:
+        db.query(Company).filter(
+            Company.id == company_id,
+            Company.ai_build_owner == INSTANCE_ID
+        ).update({Company.ai_build_owner: None, Company.ai_build_heartbeat_at: None}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _heartbeat(company_id: int):
+    while True:
+        await asyncio.sleep(settings.build_heartbeat_interval_seconds)
+        try:
+            if not await asyncio.to_thread(_renew, company_id):
+                logger.warning(f"Lost the build lease for company {company_id} to another instance")
+                return
+        except Exception as e:
+            logger.warning(f"Could not renew build lease for company {company_id}: {e}")
+
+
+def start_heartbeat(company_id: int) -> Optional[asyncio.Task]:
+    """Keep company's build lease alive until stop_heartbeat."""
+    if SessionLocal is None:
+        return None
+    return asyncio.create_task(_heartbeat(company_id))
+
+
+async def stop_heartbeat(heartbeat: Optional[asyncio.Task], company_id: int):
+    """Stop heartbeating and give up the lease (the build finished or failed)."""
+    if heartbeat is None:
+        return
+    heartbeat.cancel()
+    try:
+        await asyncio.to_thread(_release, company_id)
+    except Exception as e:
+        logger.warning(f"Could not release build lease for company {company_id}: {e}")
@@ -0,0 +1,169 @@
+"""
+Cross-page boilerplate and near-duplicate chunk elimination for website builds.
+Navigation bars, cookie banners and footers repeat on every page of a site; this
+keeps one copy of each repeated markdown block and drops chunks that are
+near-duplicates (SimHash) of chunks already ingested in the same build.
+"""
+
+import re
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Set
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BLOCK_SEPARATOR = re.compile(r'\n\s*\n')
+WORD_PATTERN = re.compile(r'\w+')
+MARKDOWN_LINK_TARGET = re.compile(r'\]\([^)]*\)')
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+# Chunks with fewer words than this are only deduplicated exactly (SimHash is noisy on short text)
+MIN_SIMHASH_WORDS = 20
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop markdown link targets and collapse whitespace."""
+    text = MARKDOWN_LINK_TARGET.sub(']', text.lower())
+    return ' '.join(text.split())
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(words: List[str], shingle_size: int = SHINGLE_SIZE) -> int:
+    """64-bit SimHash of a text's word shingles."""
+    shingles = [' '.join(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))]
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        value = _hash64(shingle)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+@dataclass
+class DedupStats:
+    """Per-build deduplication counters."""
+    blocks_seen: int = 0
+    blocks_removed: int = 0
+    chars_seen: int = 0
+    chars_removed: int = 0
+    chunks_seen: int = 0
+    chunks_exact_duplicate: int = 0
+    chunks_near_duplicate: int = 0
+
+    @property
+    def chunks_removed(self) -> int:
+        return self.chunks_exact_duplicate + self.chunks_near_duplicate
+
+    def summary(self) -> str:
+        char_ratio = self.chars_removed / self.chars_seen if self.chars_seen else 0.0
+        chunk_ratio = self.chunks_removed / self.chunks_seen if self.chunks_seen else 0.0
+        return (
+            f"{self.blocks_removed}/{self.blocks_seen} repeated blocks removed ({char_ratio:.0%} of text), "
+            f"{self.chunks_removed}/{self.chunks_seen} duplicate chunks dropped ({chunk_ratio:.0%}: "
+            f"{self.chunks_exact_duplicate} exact, {self.chunks_near_duplicate} near)"
+        )
+
+
+class ChunkDeduplicator:
+    """
+    Build-scoped deduplication state.
+
+    strip_repeated_blocks() runs on each page's markdown before chunking, as pages
+    stream in: a block (paragraph, list, table) already seen on keep_pages earlier
+    pages is removed, so the first keep_pages pages keep the only copies. Headings
+    and short blocks are kept as chunk context. is_duplicate() runs on each chunk
+    afterwards and catches repeats that block splitting misses (exact after
+    normalization, or within max_hamming bits of an earlier chunk's SimHash).
+    Which page keeps a copy depends on crawl order; chunk IDs do not, since they
+    are content hashes per page URL.
+
+    Near-duplicate lookup splits each SimHash into max_hamming + 1 bands: two
+    hashes within max_hamming bits must match exactly in at least one band.
+    """
+
+    def __init__(self, min_block_chars: int = 40, max_hamming: int = 6, keep_pages: int = 1):
+        self.min_block_chars = min_block_chars
+        self.keep_pages = keep_pages
+        self.max_hamming = max_hamming
+        self.bands = max_hamming + 1
+        self.band_bits = SIMHASH_BITS // self.bands
+        self._block_pages: Dict[bytes, int] = {}  # Block digest -> number of pages seen containing it
+        self._chunk_hashes: Set[bytes] = set()
+        self._band_buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+        self.stats = DedupStats()
+
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        return hashlib.sha1(text.encode('utf-8')).digest()
+
+    def strip_repeated_blocks(self, markdown: str) -> str:
+        """Remove blocks of this page that already appeared on keep_pages earlier pages of the build."""
+        if not markdown:
+            return markdown
+
+        kept = []
+        page_hashes = set()
+        for block in BLOCK_SEPARATOR.split(markdown):
+            stripped = block.strip()
+            if not stripped:
+                continue
+            self.stats.blocks_seen += 1
+            self.stats.chars_seen += len(stripped)
+
+            if stripped.startswith('#') or len(stripped) < self.min_block_chars:
+                kept.append(block)
+                continue
+
+            digest = self._digest(normalize_text(stripped))
+            page_hashes.add(digest)
+            if self._block_pages.get(digest, 0) >= self.keep_pages:
+                self.stats.blocks_removed += 1
+                self.stats.chars_removed += len(stripped)
+                continue
+            kept.append(block)  # Repeats within the page itself are left to chunking
+
+        for digest in page_hashes:
+            self._block_pages[digest] = self._block_pages.get(digest, 0) + 1
+        return '\n\n'.join(kept)
+
+    def _bands(self, value: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [value >> (band * self.band_bits) & mask for band in range(self.bands)]
+
+    def is_duplicate(self, chunk: str) -> bool:
+        """Whether a chunk duplicates one already seen in this build (records it if not)."""
+        self.stats.chunks_seen += 1
+        normalized = normalize_text(chunk)
+
+        digest = self._digest(normalized)
+        if digest in self._chunk_hashes:
+            self.stats.chunks_exact_duplicate += 1
+            return True
+        self._chunk_hashes.add(digest)
+
+        words = WORD_PATTERN.findall(normalized)
+        if len(words) < MIN_SIMHASH_WORDS:
+            return False
+
+        value = simhash(words)
+        bands = self._bands(value)
+        for band, key in enumerate(bands):
+            for other in self._band_buckets[band].get(key, ()):
+                if hamming_distance(value, other) <= self.max_hamming:
+                    self.stats.chunks_near_duplicate += 1
+                    return True
+
+        for band, key in enumerate(bands):
+            self._band_buckets[band].setdefault(key, []).append(value)
+        return False
@@ -317,6 +317,13 @@ def delete_file(
             detail="File not found"
         )
     
+    # Remove the file's chunks from the live knowledge base
+    if company.ai_collection_name:
+        try:
+            rag_service.delete_file_chunks(company.ai_collection_name, file.file_path)
+        except Exception as e:
+            logger.error(f"Error deleting chunks of file {file_id} from collection '{company.ai_collection_name}': {e}")
+    
     # Delete physical file
     if os.path.exists(file.file_path):
         os.remove(file.file_path)
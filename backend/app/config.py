@@ -18,6 +18,122 @@ class Settings(BaseSettings):
     # Gemini API key (for LLM); supports GEMINI_API_KEY or GOOGLE_API_KEY env vars
     google_api_key: Optional[str] = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY") or None
     
+    # RAG chat: maximum number of per-collection bots kept open (LRU evicted)
+    rag_bot_cache_size: int = 64
+    
+    # Embedding engine: micro-batch limits and inference thread pool sizes
+    # (query micro-batches get their own threads so ingest slices cannot delay chat)
+    embedding_max_batch_size: int = 64
+    embedding_max_wait_ms: int = 5
+    embedding_workers: int = 2
+    embedding_query_workers: int = 1
+    
+    # Semantic answer cache: reuse answers for queries with cosine similarity >= threshold
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_ttl_seconds: int = 3600
+    semantic_cache_max_entries: int = 256  # per collection
+    
+    # Exact-match response cache: in-process LRU plus optional shared tier
+    # response_cache_backend: "sqlite:///path/to/cache.db" or "redis://host:6379/0" (None = local only)
+    response_cache_enabled: bool = True
+    response_cache_backend: Optional[str] = None
+    response_cache_max_entries: int = 1024
+    response_cache_ttl_seconds: int = 3600
+    response_cache_local_ttl_seconds: int = 300
+    
+    # Blue/green rebuilds: number of collection versions kept per company (live + previous)
+    collection_versions_to_keep: int = 2
+    
+    # Crawl cache: ETag/Last-Modified/sitemap lastmod/content hash per URL for conditional re-crawls
+    crawl_cache_enabled: bool = True
+    crawl_cache_path: str = "./crawl_cache/crawl_cache.db"
+    crawl_cache_max_age_seconds: int = 604800  # force a full re-render after 7 days
+    
+    # Static fast path: fetch pages over plain HTTP and only render client-side apps in Chromium
+    static_fetch_enabled: bool = True
+    static_fetch_min_text_chars: int = 200  # less visible text than this means "needs JS"
+    
+    # Page readiness: DOM/text must be stable for quiet_ms; never wait longer than max_wait_ms
+    readiness_quiet_ms: int = 500
+    readiness_max_wait_ms: int = 10000
+    readiness_min_text_chars: int = 100
+    
+    # Crawl budget per build: stop queuing new pages after this many pages / seconds (0 = unlimited)
+    crawl_max_pages: int = 500
+    crawl_max_seconds: int = 1800
+    
+    # Adaptive per-host crawl concurrency (AIMD); workers cap the total across hosts
+    crawl_max_workers: int = 24
+    crawl_host_max_concurrency: int = 16
+    crawl_backoff_seconds: float = 2.0
+    crawl_max_crawl_delay: float = 10.0  # Cap on robots.txt Crawl-delay
+    
+    # Sitemaps: discovery (robots.txt, common paths) for regular seeds and limits across sitemap indexes
+    sitemap_discovery_enabled: bool = True
+    sitemap_max_urls: int = 1000
+    sitemap_max_files: int = 50
+    
+    # Shared HTTP client for non-browser fetches (pool limits, per-host concurrency, retries)
+    http2_enabled: bool = True
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_max_connections_per_host: int = 16
+    http_timeout_seconds: float = 30.0
+    http_max_retries: int = 3
+    http_backoff_seconds: float = 0.5
+    
+    # Crawl resource filtering: comma-separated Playwright resource types and extra blocked domains
+    crawl_resource_filter_enabled: bool = True
+    crawl_block_resource_types: str = "image,media,font"
+    crawl_block_domains: Optional[str] = None  # added to the built-in analytics/ad blocklist
+    crawl_max_resource_bytes: int = 2000000  # assets larger than this are blocked on repeat requests
+    
+    # URL canonicalization and duplicate pages: extra query params to strip (comma-separated globs,
+    # added to the built-in utm_*/fbclid/gclid list), rel=canonical aliases, identical-content pages
+    url_strip_query_params: Optional[str] = None
+    url_strip_trailing_slash: bool = True
+    url_merge_www: bool = True
+    url_follow_canonical: bool = True
+    duplicate_page_detection_enabled: bool = True
+    
+    # Browser pool: long-lived Chromium browsers shared by all builds in the process
+    browser_pool_size: int = 2
+    browser_pool_max_pages: int = 8  # concurrent pages across all builds
+    browser_context_max_pages: int = 100  # recycle a context after this many pages
+    browser_pool_max_rss_mb: int = 1500  # recycle contexts when Chromium RSS exceeds this (needs psutil)
+    
+    # Streaming ingest pipeline: bounded queue sizes (backpressure) and embedding batch size
+    ingest_page_queue_size: int = 16
+    ingest_batch_queue_size: int = 4
+    ingest_batch_size: int = 100
+    ingest_embed_workers: int = 2
+    
+    # Chunk size in embedding-model tokens (MiniLM embeds at most 256 word pieces per chunk)
+    chunk_max_tokens: int = 254
+    chunk_overlap_tokens: int = 32
+    
+    # Cross-page boilerplate / near-duplicate chunk elimination (max_hamming: SimHash bit distance)
+    chunk_dedup_enabled: bool = True
+    chunk_dedup_min_block_chars: int = 40
+    chunk_dedup_block_keep_pages: int = 1  # A repeated block is kept on the first N pages it appears on
+    chunk_dedup_max_hamming: int = 6
+    
+    # CPU pool for HTML conversion and chunking (-1 = CPU count - 1, 0 = run on the event loop)
+    cpu_pool_workers: int = -1
+    cpu_pool_max_pending: int = 0  # Max tasks submitted at once (0 = 2 x workers)
+    
+    # Uploaded PDFs are extracted in ranges of this many pages, in parallel in the CPU pool
+    pdf_pages_per_task: int = 20
+    
+    # Resumable builds: crawl frontier, visited URLs and scraped pages checkpointed per build
+    build_checkpoint_enabled: bool = True
+    build_checkpoint_path: str = "./crawl_cache/build_checkpoints.db"
+    build_resume_on_startup: bool = True  # Restart builds left 'building' by a restart (checked every heartbeat interval)
+    build_lease_seconds: int = 120  # A build whose owner has not heartbeated for this long may be resumed
+    build_heartbeat_interval_seconds: int = 30
+    build_abandon_seconds: int = 600  # An expired build no instance has resumed after this long is marked failed
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,101 @@
+"""
+Process pool for CPU-bound crawl and ingest work.
+HTML-to-markdown conversion, chunking and PDF text extraction are pure Python;
+running them in worker processes keeps them off the event loop that serves chat
+requests and lets a large build use every core.
+"""
+
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from .config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CpuPool:
+    """
+    Bounded ProcessPoolExecutor shared by every build in the process.
+
+    At most max_pending tasks are submitted at once, so a fast crawl cannot queue
+    an unbounded amount of page text for the workers. Workers are spawned (not
+    forked from the threaded server) and only import the task modules
+    (app.page_processing, app.pdf_extraction) plus the server's __main__ module,
+    so entry points must not import app.main at module level (see run.py).
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self._loop = asyncio.get_running_loop()
+        self._pending = asyncio.Semaphore(max_pending)
+        self._executor = self._create_executor()
+
+        # Statistics
+        self.tasks_completed = 0
+        self.pool_restarts = 0
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a picklable module-level function in a worker process."""
+        async with self._pending:
+            try:
+                result = await self._loop.run_in_executor(self._executor, func, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed): replace the pool and run this task in a thread
+                logger.warning("CPU pool worker died, restarting pool")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create_executor()
+                self.pool_restarts += 1
+                result = await asyncio.to_thread(func, *args)
+            self.tasks_completed += 1
+            return result
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"CPU pool closed ({self.tasks_completed} tasks, {self.pool_restarts} restarts)")
+
+
+_cpu_pool: Optional[CpuPool] = None
+
+
+def get_cpu_pool() -> Optional[CpuPool]:
+    """Get the process-wide CPU pool (None if disabled with cpu_pool_workers=0)."""
+    global _cpu_pool
+    workers = settings.cpu_pool_workers
+    if workers < 0:
+        workers = max(1, (os.cpu_count() or 2) - 1)  # Leave a core for the event loop
+    if workers == 0:
+        return None
+    if _cpu_pool is None or _cpu_pool._loop is not asyncio.get_running_loop():
+        if _cpu_pool is not None:
+            _cpu_pool.close()  # Bound to the previous loop; shut its workers down
+        _cpu_pool = CpuPool(max_workers=workers, max_pending=settings.cpu_pool_max_pending or workers * 2)
+    return _cpu_pool
+
+
+async def run_cpu(func: Callable[..., Any], *args: Any) -> Any:
+    """Run CPU-bound work in the process pool, or inline when the pool is disabled."""
+    pool = get_cpu_pool()
+    if pool is None:
+        return func(*args)
+    return await pool.run(func, *args)
+
+
+def close_cpu_pool():
+    """Shut down the process-wide CPU pool (application shutdown)."""
+    global _cpu_pool
+    if _cpu_pool is not None:
+        _cpu_pool.close()
+        _cpu_pool = None
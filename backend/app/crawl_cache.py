@@ -0,0 +1,160 @@
+"""
+Persistent crawl cache for the website scraper.
+Records HTTP validators (ETag, Last-Modified), sitemap <lastmod>, a content hash
+and the extracted page artifacts per URL, so re-crawls can send conditional
+requests and skip rendering unchanged pages.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def hash_content(content) -> str:
+    """SHA-256 of a page body (str or bytes)."""
+    if isinstance(content, str):
+        content = content.encode("utf-8", errors="replace")
+    return hashlib.sha256(content).hexdigest()
+
+
+@dataclass
+class CrawlCacheEntry:
+    """What we know about a URL from its last successful crawl."""
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    sitemap_lastmod: Optional[str] = None
+    content_hash: Optional[str] = None
+    title: str = ""
+    markdown: str = ""
+    links: List[str] = field(default_factory=list)
+    fetched_at: float = field(default_factory=time.time)
+
+    def conditional_headers(self) -> dict:
+        """HTTP headers for a conditional re-fetch of this URL."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class CrawlCache:
+    """
+    SQLite-backed crawl cache (one row per normalized URL).
+    Safe to share across concurrent crawls; each thread uses its own connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_cache ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, sitemap_lastmod TEXT, "
+                "content_hash TEXT, title TEXT, markdown TEXT, links TEXT, fetched_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS readiness_profiles (domain TEXT PRIMARY KEY, profile TEXT NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, url: str) -> Optional[CrawlCacheEntry]:
+        """Get the cache entry for a URL, or None if it was never crawled."""
+        try:
+            row = self._connect().execute(
+                "SELECT url, etag, last_modified, sitemap_lastmod, content_hash, title, markdown, links, fetched_at "
+                "FROM crawl_cache WHERE url = ?",
+                (url,)
+            ).fetchone()
+        except Exception as e:
+            logger.warning(f"Crawl cache read failed for {url}: {e}")
+            return None
+        if row is None:
+            return None
+        return CrawlCacheEntry(
+            url=row[0],
+            etag=row[1],
+            last_modified=row[2],
+            sitemap_lastmod=row[3],
+            content_hash=row[4],
+            title=row[5] or "",
+            markdown=row[6] or "",
+            links=json.loads(row[7]) if row[7] else [],
+            fetched_at=row[8] or 0.0
+        )
+
+    def put(self, entry: CrawlCacheEntry):
+        """Insert or replace the cache entry for a URL."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO crawl_cache "
+                    "(url, etag, last_modified, sitemap_lastmod, content_hash, title, markdown, links, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        entry.url, entry.etag, entry.last_modified, entry.sitemap_lastmod,
+                        entry.content_hash, entry.title, entry.markdown,
+                        json.dumps(entry.links), entry.fetched_at
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"Crawl cache write failed for {entry.url}: {e}")
+
+    def get_readiness_profile(self, domain: str) -> Optional[Dict[str, Any]]:
+        """Get the stored page-readiness profile for a domain (see page_readiness)."""
+        try:
+            row = self._connect().execute(
+                "SELECT profile FROM readiness_profiles WHERE domain = ?", (domain,)
+            ).fetchone()
+        except Exception as e:
+            logger.warning(f"Crawl cache read failed for readiness profile {domain}: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put_readiness_profile(self, domain: str, profile: Dict[str, Any]):
+        """Store the page-readiness profile for a domain."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO readiness_profiles (domain, profile) VALUES (?, ?)",
+                    (domain, json.dumps(profile))
+                )
+        except Exception as e:
+            logger.warning(f"Crawl cache write failed for readiness profile {domain}: {e}")
+
+
+_crawl_cache: Optional[CrawlCache] = None
+
+
+def get_crawl_cache() -> Optional[CrawlCache]:
+    """Get the process-wide crawl cache, or None if disabled in settings."""
+    global _crawl_cache
+    if not settings.crawl_cache_enabled:
+        return None
+    if _crawl_cache is None:
+        _crawl_cache = CrawlCache(settings.crawl_cache_path)
+    return _crawl_cache
@@ -0,0 +1,141 @@
+"""
+Crawl frontier for the website crawler.
+A priority queue of URLs shared by a fixed set of crawl workers, with a
+per-build page/time budget, replacing level-by-level BFS.
+"""
+
+import re
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional
+from urllib.parse import urlparse
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Path segments that usually lead to low-value, near-infinite listings
+LOW_VALUE_PATH_PATTERN = re.compile(
+    r'/(?:tag|tags|category|categories|author|archive|archives|page|search|feed|calendar|wp-json)(?:/|$)'
+    r'|/\d{4}/\d{2}(?:/|$)',
+    re.IGNORECASE
+)
+
+
+def url_priority(url: str, depth: int, nav_link: bool = False) -> float:
+    """
+    Priority for a URL (lower is crawled first).
+
+    Shallow crawl depth and short paths come first; links from navigation
+    menus get a bonus; query strings and archive/tag/pagination paths are
+    pushed back.
+    """
+    parsed = urlparse(url)
+    path_depth = len([segment for segment in parsed.path.split('/') if segment])
+
+    priority = depth * 10.0 + path_depth * 2.0
+    if nav_link:
+        priority -= 5.0
+    if parsed.query:
+        priority += 4.0
+    if LOW_VALUE_PATH_PATTERN.search(parsed.path):
+        priority += 8.0
+    return priority
+
+
+@dataclass(order=True)
+class FrontierItem:
+    """A URL waiting to be crawled."""
+    priority: float
+    sequence: int
+    url: str = field(compare=False)
+    depth: int = field(compare=False)
+    base_domain: Optional[str] = field(compare=False)  # None = don't follow links from this page
+
+
+class CrawlBudget:
+    """Page and wall-time limits for one build (0 = unlimited)."""
+
+    def __init__(self, max_pages: int = 0, max_seconds: float = 0):
+        self.max_pages = max_pages
+        self.max_seconds = max_seconds
+        self.started_at = time.monotonic()
+        self.pages_started = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def exhausted(self) -> bool:
+        if self.max_pages and self.pages_started >= self.max_pages:
+            return True
+        return bool(self.max_seconds) and self.elapsed >= self.max_seconds
+
+    def take(self) -> bool:
+        """Reserve one page from the budget; False if the budget is used up."""
+        if self.exhausted():
+            return False
+        self.pages_started += 1
+        return True
+
+
+class CrawlFrontier:
+    """
+    Priority queue of URLs consumed by concurrent crawl workers.
+
+    Workers call get() until it returns None, which happens once the queue is
+    empty and no other worker is still crawling a page (that could add links),
+    or after close().
+    """
+
+    def __init__(self):
+        self._heap: List[FrontierItem] = []
+        self._sequence = itertools.count()
+        self._queued = set()
+        self._in_flight = 0
+        self._closed = False
+        self._changed = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    async def put(self, url: str, depth: int, base_domain: Optional[str], priority: float):
+        """Queue a URL (ignored if already queued or the frontier is closed)."""
+        if self._closed or url in self._queued:
+            return
+        self._queued.add(url)
+        heapq.heappush(self._heap, FrontierItem(priority, next(self._sequence), url, depth, base_domain))
+        async with self._changed:
+            self._changed.notify()
+
+    async def get(self) -> Optional[FrontierItem]:
+        """Take the highest-priority URL, waiting while other workers may still add links."""
+        async with self._changed:
+            while not self._closed and not self._heap and self._in_flight:
+                await self._changed.wait()
+            if self._closed or not self._heap:
+                self._changed.notify_all()  # Let the other idle workers finish too
+                return None
+            self._in_flight += 1
+            return heapq.heappop(self._heap)
+
+    async def task_done(self):
+        """Mark a URL returned by get() as finished."""
+        async with self._changed:
+            self._in_flight -= 1
+            self._changed.notify_all()
+
+    async def close(self):
+        """Stop handing out URLs (e.g. budget exhausted); queued URLs are dropped."""
+        async with self._changed:
+            if not self._closed:
+                self._closed = True
+                dropped = len(self._heap)
+                self._heap.clear()
+                if dropped:
+                    logger.info(f"Crawl frontier closed with {dropped} URLs left unvisited")
+            self._changed.notify_all()
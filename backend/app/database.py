@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -22,6 +23,15 @@ def get_database_url():
     # Fallback (shouldn't reach here, but just in case)
     raise ValueError("No database URL configured. Please set DATABASE_URL environment variable.")
 
+def get_async_database_url(database_url: str) -> str:
+    """
+    Convert a sync PostgreSQL URL to its asyncpg equivalent.
+    """
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if database_url.startswith(prefix):
+            return "postgresql+asyncpg://" + database_url[len(prefix):]
+    return database_url
+
 # Create engine with connection pooling
 # Use lazy initialization to avoid errors during import if database is not available
 try:
@@ -51,6 +61,27 @@ else:
     # Only create SessionLocal if engine was successfully created
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request paths that must not hold a threadpool worker (AI chat)
+try:
+    async_engine = create_async_engine(
+        get_async_database_url(get_database_url()),
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        connect_args={
+            "timeout": 10,  # 10 second timeout
+        }
+    )
+except Exception as e:
+    import logging
+    logger = logging.getLogger(__name__)
+    logger.error(f"Could not initialize async database engine: {e}")
+    async_engine = None
+    AsyncSessionLocal = None
+else:
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Database models
@@ -90,6 +121,8 @@ class Company(Base):
     ai_build_status = Column(String, nullable=True, default='not_started')  # not_started, building, ready, failed
     ai_error_message = Column(Text, nullable=True)
     ai_build_progress = Column(Text, nullable=True)  # JSON string of progress data
+    ai_build_owner = Column(String, nullable=True)  # Instance running the build (see build_lease)
+    ai_build_heartbeat_at = Column(DateTime, nullable=True)  # Last heartbeat of the build owner
     
     # Relationships
     owner = relationship("User", back_populates="companies")
@@ -158,3 +191,25 @@ def get_db():
         raise
     finally:
         db.close()
+
+# Dependency to get async database session
+async def get_async_db():
+    if async_engine is None or AsyncSessionLocal is None:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error("Async database engine is not initialized. Check database configuration.")
+        from fastapi import HTTPException, status
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database connection is not available. Please check database configuration and ensure DATABASE_URL is set."
+        )
+    
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.error(f"Database session error: {e}")
+            await db.rollback()
+            raise
@@ -1,31 +1,43 @@
 """
-Document parsing module for processing uploaded files (PDFs, Word docs, TXT, JSON).
-Processes documents in parallel and prepares them for ChromaDB ingestion.
+Document parsing module for processing uploaded files (PDFs, Word docs, TXT, JSON, CSV).
+Streams documents piece by piece (page ranges, text blocks, row batches) into
+chunking, so large uploads are ingested with flat memory.
 """
 
-import os
 import io
+import os
+import csv
 import json
+import time
+import codecs
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from collections import deque
+from typing import List, Dict, Any, AsyncIterator, Deque, Optional, Tuple
 from pathlib import Path
 
 import aiofiles
 from more_itertools import batched
 
+from .config import settings
+from .cpu_pool import get_cpu_pool, run_cpu
+from .markdown_chunker import DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS
+from .pdf_extraction import PDF_AVAILABLE, PDFPLUMBER_AVAILABLE, extract_pdf_pages_task, pdf_page_count
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try to import document parsing libraries
-try:
-    import PyPDF2
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-    logger.warning("PyPDF2 not available. PDF parsing will be disabled.")
+# Chunk ID prefix for uploaded files (IDs of the pre-hashing scheme start with "file-chunk-")
+FILE_CHUNK_PREFIX = "file"
+LEGACY_FILE_CHUNK_PREFIX = "file-chunk-"
+
+
+def file_chunk_source(file_path: str) -> str:
+    """The "source" metadata of an uploaded file's chunks."""
+    return f"file://{file_path}"
 
+# Try to import document parsing libraries
 try:
     from docx import Document
     DOCX_AVAILABLE = True
@@ -33,389 +45,511 @@ except ImportError:
     DOCX_AVAILABLE = False
     logger.warning("python-docx not available. Word document parsing will be disabled.")
 
-try:
-    import pdfplumber
-    PDFPLUMBER_AVAILABLE = True
-except ImportError:
-    PDFPLUMBER_AVAILABLE = False
-    logger.warning("pdfplumber not available. Advanced PDF parsing will be disabled.")
+
+# Streamed pieces: text files are read in blocks of this many bytes, tabular data in row batches
+TEXT_BLOCK_BYTES = 64 * 1024
+CSV_ROWS_PER_BATCH = 100
+JSON_ITEMS_PER_BATCH = 50
+DOCX_PARAGRAPHS_PER_BATCH = 200
 
 
-async def parse_pdf(file_path: str) -> str:
+async def iter_pdf(file_path: str) -> AsyncIterator[str]:
     """
-    Parse a PDF file and extract text content.
+    Stream the text of a PDF file, one page range at a time.
+    
+    Ranges of pdf_pages_per_task pages are extracted in parallel in the CPU pool
+    (at most one per worker ahead of the consumer) and yielded in page order.
     
     Args:
         file_path: Path to the PDF file
         
-    Returns:
-        Extracted text content
+    Yields:
+        Text of each page range
     """
     if not PDF_AVAILABLE and not PDFPLUMBER_AVAILABLE:
         raise ImportError("No PDF parsing library available. Please install PyPDF2 or pdfplumber.")
     
-    text_content = []
+    started = time.monotonic()
+    page_count = await asyncio.to_thread(pdf_page_count, file_path)
+    pages_per_task = max(1, settings.pdf_pages_per_task)
+    ranges = [(batch[0], batch[-1] + 1) for batch in batched(range(page_count), pages_per_task)]
     
-    try:
-        # Try pdfplumber first (better text extraction)
-        if PDFPLUMBER_AVAILABLE:
-            def _read_pdfplumber(path):
-                text_parts = []
-                with pdfplumber.open(path) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text_parts.append(page_text)
-                return text_parts
-            
-            text_content = await asyncio.to_thread(_read_pdfplumber, file_path)
-        # Fallback to PyPDF2
-        elif PDF_AVAILABLE:
-            async with aiofiles.open(file_path, 'rb') as f:
-                file_content = await f.read()
-            
-            # PyPDF2 is synchronous, so we run it in a thread
-            def _read_pdf(content):
-                pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-                text_parts = []
-                for page in pdf_reader.pages:
-                    text_parts.append(page.extract_text())
-                return "\n".join(text_parts)
-            
-            text_content = [await asyncio.to_thread(_read_pdf, file_content)]
-    except Exception as e:
-        logger.error(f"Error parsing PDF {file_path}: {e}")
-        raise
+    pool = get_cpu_pool()
+    if pool is None:
+        # CPU pool disabled: extract in a thread so the event loop stays responsive
+        for start, end in ranges:
+            yield "\n\n".join(await asyncio.to_thread(extract_pdf_pages_task, file_path, start, end))
+    else:
+        in_flight: Deque[asyncio.Future] = deque()
+        try:
+            for start, end in ranges:
+                in_flight.append(asyncio.ensure_future(run_cpu(extract_pdf_pages_task, file_path, start, end)))
+                if len(in_flight) >= pool.max_workers:
+                    yield "\n\n".join(await in_flight.popleft())
+            while in_flight:
+                yield "\n\n".join(await in_flight.popleft())
+        finally:
+            for future in in_flight:
+                future.cancel()
     
-    return "\n\n".join(text_content)
+    logger.info(
+        f"Extracted {page_count} PDF pages in {len(ranges)} ranges "
+        f"({time.monotonic() - started:.1f}s): {Path(file_path).name}"
+    )
 
 
-async def parse_docx(file_path: str) -> str:
+async def iter_docx(file_path: str) -> AsyncIterator[str]:
     """
-    Parse a Word document (.docx) and extract text content.
+    Stream the paragraphs of a Word document (.docx) in batches.
     
     Args:
         file_path: Path to the .docx file
         
-    Returns:
-        Extracted text content
+    Yields:
+        Text of each batch of paragraphs
     """
     if not DOCX_AVAILABLE:
         raise ImportError("python-docx not available. Please install python-docx.")
     
-    try:
-        # python-docx is synchronous, so we run it in a thread
-        def _read_docx(path):
-            doc = Document(path)
-            paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
-            return "\n".join(paragraphs)
-        
-        text_content = await asyncio.to_thread(_read_docx, file_path)
-        return text_content
-    except Exception as e:
-        logger.error(f"Error parsing DOCX {file_path}: {e}")
-        raise
+    # python-docx is synchronous (and loads the whole document), so we open it in a thread
+    doc = await asyncio.to_thread(Document, file_path)
+    for batch in batched(doc.paragraphs, DOCX_PARAGRAPHS_PER_BATCH):
+        paragraphs = [para.text for para in batch if para.text.strip()]
+        if paragraphs:
+            yield "\n".join(paragraphs)
 
 
-async def parse_txt(file_path: str) -> str:
+async def iter_text_blocks(file_path: str) -> AsyncIterator[str]:
+    """
+    Read a text file in blocks of TEXT_BLOCK_BYTES, decoded as UTF-8.
+    From the first invalid UTF-8 byte on, the rest of the file is decoded as Latin-1
+    (the valid UTF-8 before it in the same block is kept as UTF-8).
     """
-    Parse a text file and extract content.
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    async with aiofiles.open(file_path, 'rb') as f:
+        while True:
+            data = await f.read(TEXT_BLOCK_BYTES)
+            try:
+                text = decoder.decode(data, final=not data)
+            except UnicodeDecodeError as e:
+                logger.info(f"{Path(file_path).name} is not UTF-8, decoding as Latin-1")
+                # e.start counts from the incomplete sequence left over from the previous block
+                failed = decoder.getstate()[0] + data
+                decoder = codecs.getincrementaldecoder('latin-1')()
+                text = failed[:e.start].decode('utf-8') + decoder.decode(failed[e.start:], final=not data)
+            if text:
+                yield text
+            if not data:
+                return
+
+
+async def iter_txt(file_path: str) -> AsyncIterator[str]:
+    """
+    Stream a text file in pieces cut at paragraph (or line) boundaries.
     
     Args:
         file_path: Path to the text file
         
-    Returns:
-        File content as string
+    Yields:
+        Consecutive pieces of the file content
     """
-    try:
-        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-            content = await f.read()
-        return content
-    except UnicodeDecodeError:
-        # Try with different encoding
+    buffer = ""
+    async for block in iter_text_blocks(file_path):
+        buffer += block
+        cut = buffer.rfind("\n\n")
+        if cut <= 0:
+            cut = buffer.rfind("\n")
+        if cut <= 0 and len(buffer) < 4 * TEXT_BLOCK_BYTES:
+            continue  # No line break yet; one very long line is cut anyway beyond 4 blocks
+        if cut <= 0:
+            cut = len(buffer)
+        yield buffer[:cut]
+        buffer = buffer[cut:]
+    if buffer.strip():
+        yield buffer
+
+
+def format_json_value(key, value, indent=0):
+    """Recursively format JSON into readable text."""
+    indent_str = "  " * indent
+    if isinstance(value, dict):
+        lines = [f"{indent_str}{key}:"]
+        for k, v in value.items():
+            lines.append(format_json_value(k, v, indent + 1))
+        return "\n".join(lines)
+    elif isinstance(value, list):
+        lines = [f"{indent_str}{key}:"]
+        for i, item in enumerate(value):
+            if isinstance(item, dict):
+                lines.append(f"{indent_str}  Item {i + 1}:")
+                for k, v in item.items():
+                    lines.append(format_json_value(k, v, indent + 2))
+            else:
+                lines.append(f"{indent_str}  - {item}")
+        return "\n".join(lines)
+    else:
+        return f"{indent_str}{key}: {value}"
+
+
+class _JsonStreamReader:
+    """Decodes JSON values one at a time from a stream of text blocks (json.JSONDecoder.raw_decode)."""
+    
+    def __init__(self, blocks: AsyncIterator[str]):
+        self._blocks = blocks
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+    
+    async def _fill(self) -> bool:
+        """Append the next block (dropping consumed text); False at end of input."""
+        if self._eof:
+            return False
         try:
-            async with aiofiles.open(file_path, 'r', encoding='latin-1') as f:
-                content = await f.read()
-            return content
-        except Exception as e:
-            logger.error(f"Error parsing TXT {file_path}: {e}")
-            raise
-    except Exception as e:
-        logger.error(f"Error parsing TXT {file_path}: {e}")
-        raise
+            block = await self._blocks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + block
+        self._pos = 0
+        return True
+    
+    async def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end of input)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not await self._fill():
+                return ""
+    
+    async def expect(self, characters: str) -> str:
+        """Consume the next non-whitespace character, which must be one of characters."""
+        char = await self.peek()
+        if not char or char not in characters:
+            raise json.JSONDecodeError(f"Expected one of {characters!r}", self._buffer, self._pos)
+        self._pos += 1
+        return char
+    
+    async def value(self) -> Any:
+        """Decode the next complete value, reading more blocks until it is complete."""
+        await self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if await self._fill():
+                    continue
+                raise
+            if end == len(self._buffer) and await self._fill():
+                continue  # A number at the end of the block may continue in the next one
+            self._pos = end
+            return value
 
 
-async def parse_json(file_path: str) -> str:
+async def iter_json_members(file_path: str) -> AsyncIterator[Tuple[Any, Any]]:
     """
-    Parse a JSON file and convert it to readable text format.
+    Incrementally parse a JSON file's top-level container.
+    
+    Yields (key, value) for each member of a top-level object, (index, item)
+    for each element of a top-level array, or (None, value) for anything else.
+    Only one member is held in memory at a time.
+    """
+    reader = _JsonStreamReader(iter_text_blocks(file_path))
+    opening = await reader.peek()
+    if opening not in ("{", "["):
+        yield None, await reader.value()
+        if await reader.peek():
+            raise json.JSONDecodeError("Extra data", "", 0)
+        return
+    
+    closing = "}" if opening == "{" else "]"
+    await reader.expect(opening)
+    if await reader.peek() == closing:
+        await reader.expect(closing)
+        return
+    
+    index = 0
+    while True:
+        if opening == "{":
+            key = await reader.value()
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expected an object key", "", 0)
+            await reader.expect(":")
+        else:
+            key = index
+        yield key, await reader.value()
+        index += 1
+        if await reader.expect("," + closing) == closing:
+            return
+
+
+async def iter_json(file_path: str) -> AsyncIterator[str]:
+    """
+    Stream a JSON file as readable text, in batches of top-level members.
     
     Args:
         file_path: Path to the JSON file
         
-    Returns:
+    Yields:
         JSON content formatted as readable text
     """
-    try:
-        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-            content = await f.read()
-        
-        # Parse JSON and format as readable text
-        data = json.loads(content)
-        
-        # Convert JSON to a readable text format
-        def format_json_value(key, value, indent=0):
-            """Recursively format JSON into readable text."""
-            indent_str = "  " * indent
-            if isinstance(value, dict):
-                lines = [f"{indent_str}{key}:"]
-                for k, v in value.items():
-                    lines.append(format_json_value(k, v, indent + 1))
-                return "\n".join(lines)
-            elif isinstance(value, list):
-                lines = [f"{indent_str}{key}:"]
-                for i, item in enumerate(value):
-                    if isinstance(item, dict):
-                        lines.append(f"{indent_str}  Item {i + 1}:")
-                        for k, v in item.items():
-                            lines.append(format_json_value(k, v, indent + 2))
-                    else:
-                        lines.append(f"{indent_str}  - {item}")
-                return "\n".join(lines)
-            else:
-                return f"{indent_str}{key}: {value}"
-        
-        if isinstance(data, dict):
-            text_parts = []
-            for key, value in data.items():
-                text_parts.append(format_json_value(key, value))
-            return "\n\n".join(text_parts)
+    parts = []
+    async for key, value in iter_json_members(file_path):
+        if key is None:
+            parts.append(json.dumps(value, indent=2))
+        elif isinstance(key, int):
+            parts.append(format_json_value(f"Item {key + 1}", value))
         else:
-            return json.dumps(data, indent=2)
-            
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in {file_path}: {e}")
-        raise
-    except Exception as e:
-        logger.error(f"Error parsing JSON {file_path}: {e}")
-        raise
+            parts.append(format_json_value(key, value))
+        if len(parts) >= JSON_ITEMS_PER_BATCH:
+            yield "\n\n".join(parts)
+            parts = []
+    if parts:
+        yield "\n\n".join(parts)
 
 
-async def parse_csv(file_path: str) -> str:
+def _last_record_end(text: str) -> int:
+    """End of the last complete CSV record in text (after a newline outside quotes), or 0."""
+    total_quotes = text.count('"')
+    quotes_after = 0
+    position = len(text)
+    while True:
+        newline = text.rfind("\n", 0, position)
+        if newline < 0:
+            return 0
+        quotes_after += text.count('"', newline, position)
+        position = newline
+        # Quotes in the complete records before the newline must pair up ("" escapes included)
+        if (total_quotes - quotes_after) % 2 == 0:
+            return newline + 1
+
+
+async def iter_csv(file_path: str) -> AsyncIterator[str]:
     """
-    Parse a CSV file and convert it to readable text format.
+    Stream a CSV file as readable text in batches of CSV_ROWS_PER_BATCH rows,
+    each starting with the header row.
     
     Args:
         file_path: Path to the CSV file
         
-    Returns:
-        CSV content formatted as readable text
+    Yields:
+        CSV rows formatted as readable text
     """
-    try:
-        import csv
-        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-            content = await f.read()
-        
-        # Parse CSV
-        lines = []
-        reader = csv.reader(content.splitlines())
-        headers = next(reader, None)
-        
-        if headers:
-            lines.append(" | ".join(headers))
-            lines.append("-" * len(" | ".join(headers)))
-            
-            for row in reader:
-                lines.append(" | ".join(row))
-        
-        return "\n".join(lines)
-    except Exception as e:
-        logger.error(f"Error parsing CSV {file_path}: {e}")
-        raise
+    header_lines: List[str] = []
+    rows: List[str] = []
+    yielded = False
+    buffer = ""
+    
+    def parse(records: str):
+        for row in csv.reader(io.StringIO(records)):
+            if not header_lines:
+                header = " | ".join(row)
+                header_lines.extend([header, "-" * len(header)])
+            else:
+                rows.append(" | ".join(row))
+    
+    async for block in iter_text_blocks(file_path):
+        buffer += block
+        end = _last_record_end(buffer)
+        if end:
+            parse(buffer[:end])
+            buffer = buffer[end:]
+        while len(rows) >= CSV_ROWS_PER_BATCH:
+            yield "\n".join(header_lines + rows[:CSV_ROWS_PER_BATCH])
+            del rows[:CSV_ROWS_PER_BATCH]
+            yielded = True
+    if buffer:
+        parse(buffer)
+    if rows or (header_lines and not yielded):
+        yield "\n".join(header_lines + rows)
 
 
-async def parse_document(file_path: str, file_type: str, filename: str) -> Dict[str, Any]:
+def _document_stream(file_path: str, file_type: str, filename: str) -> AsyncIterator[str]:
+    """Pick the streaming parser for a file based on its MIME type or extension."""
+    file_ext = Path(filename).suffix.lower()
+    
+    if file_type == "application/pdf" or file_ext == ".pdf":
+        return iter_pdf(file_path)
+    elif file_type in [
+        "application/msword",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    ] or file_ext in [".doc", ".docx"]:
+        return iter_docx(file_path)
+    elif file_type == "text/plain" or file_ext == ".txt":
+        return iter_txt(file_path)
+    elif file_type == "application/json" or file_ext == ".json":
+        return iter_json(file_path)
+    elif file_type == "text/csv" or file_ext == ".csv":
+        return iter_csv(file_path)
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+
+async def iter_document(file_path: str, file_type: str, filename: str) -> AsyncIterator[str]:
     """
-    Parse a single document based on its file type.
+    Stream the text of a single document, piece by piece (PDF page ranges, text
+    blocks, CSV/JSON row batches), so memory does not grow with the file size.
     
     Args:
         file_path: Path to the file
         file_type: MIME type of the file
         filename: Original filename
         
-    Returns:
-        Dictionary with 'filename', 'content', and 'file_type'
+    Yields:
+        Consecutive pieces of the document's text
     """
     try:
-        # Determine parser based on file type or extension
-        file_ext = Path(filename).suffix.lower()
-        
-        if file_type == "application/pdf" or file_ext == ".pdf":
-            content = await parse_pdf(file_path)
-        elif file_type in [
-            "application/msword",
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        ] or file_ext in [".doc", ".docx"]:
-            content = await parse_docx(file_path)
-        elif file_type == "text/plain" or file_ext == ".txt":
-            content = await parse_txt(file_path)
-        elif file_type == "application/json" or file_ext == ".json":
-            content = await parse_json(file_path)
-        elif file_type == "text/csv" or file_ext == ".csv":
-            content = await parse_csv(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
-        
-        return {
-            "filename": filename,
-            "file_path": file_path,
-            "content": content,
-            "file_type": file_type
-        }
-        
+        async for text in _document_stream(file_path, file_type, filename):
+            if text.strip():
+                yield text
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid JSON in {file_path}: {e}")
+        raise
     except Exception as e:
         logger.error(f"Error parsing document {file_path}: {e}")
         raise
 
 
-async def parse_documents_parallel(
-    file_paths: List[str],
-    file_types: List[str],
-    filenames: List[str],
-    max_concurrent: int = 5
-) -> List[Dict[str, Any]]:
+async def parse_document(file_path: str, file_type: str, filename: str) -> Dict[str, Any]:
     """
-    Parse multiple documents in parallel.
+    Parse a single document based on its file type (whole content in memory).
     
     Args:
-        file_paths: List of file paths to parse
-        file_types: List of MIME types corresponding to file_paths
-        filenames: List of original filenames
-        max_concurrent: Maximum number of documents to parse concurrently
+        file_path: Path to the file
+        file_type: MIME type of the file
+        filename: Original filename
         
     Returns:
-        List of parsed document dictionaries
+        Dictionary with 'filename', 'content', and 'file_type'
     """
-    if len(file_paths) != len(file_types) or len(file_paths) != len(filenames):
-        raise ValueError("file_paths, file_types, and filenames must have the same length")
-    
-    logger.info(f"Starting parallel parsing of {len(file_paths)} documents")
-    
-    results = []
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    async def parse_with_semaphore(file_path, file_type, filename):
-        async with semaphore:
-            try:
-                return await parse_document(file_path, file_type, filename)
-            except Exception as e:
-                logger.error(f"Failed to parse {filename}: {e}")
-                return None
-    
-    # Create tasks for all documents
-    tasks = [
-        parse_with_semaphore(file_path, file_type, filename)
-        for file_path, file_type, filename in zip(file_paths, file_types, filenames)
-    ]
-    
-    # Execute all tasks in parallel
-    parsed_docs = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Filter out None results and exceptions
-    for doc in parsed_docs:
-        if doc and not isinstance(doc, Exception):
-            results.append(doc)
-        elif isinstance(doc, Exception):
-            logger.error(f"Exception during parsing: {doc}")
-    
-    logger.info(f"Successfully parsed {len(results)} out of {len(file_paths)} documents")
-    return results
+    return {
+        "filename": filename,
+        "file_path": file_path,
+        "content": "\n\n".join([text async for text in iter_document(file_path, file_type, filename)]),
+        "file_type": file_type
+    }
+
+
+ChunkBatch = Tuple[List[str], List[str], List[Dict[str, Any]]]
 
 
 class DocumentParser:
     """Document parser for processing uploaded files."""
     
-    def __init__(self, chunk_size: int = 1000, max_concurrent: int = 5):
-        self.chunk_size = chunk_size
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_MAX_TOKENS,
+        max_concurrent: int = 5,
+        chunk_overlap: int = DEFAULT_OVERLAP_TOKENS
+    ):
+        self.chunk_size = chunk_size  # Embedding-model tokens
+        self.chunk_overlap = chunk_overlap
         self.max_concurrent = max_concurrent
+        self.files_parsed = 0
+        self.files_failed = 0
+        self.parsed_sources: List[str] = []  # file_chunk_source of each file parsed to the end
+        self.failed_sources: List[str] = []  # ... and of each file that failed (possibly after yielding chunks)
     
-    async def parse_files(
+    async def _chunk_file(self, file_path: str, file_type: str, filename: str, queue: asyncio.Queue):
+        """Parse one file as a stream and put a chunk batch on the queue for each piece."""
+        from .page_processing import chunk_markdown_task
+        from .utils import make_chunk_id
+        
+        source = file_chunk_source(file_path)
+        seen_ids = set()
+        chunk_idx = 0
+        
+        async for text in iter_document(file_path, file_type, filename):
+            # Chunk the content using the same strategy as web scraping
+            chunks_with_info = await run_cpu(chunk_markdown_task, text, self.chunk_size, self.chunk_overlap)
+            
+            ids, documents, metadatas = [], [], []
+            for chunk, section_info in chunks_with_info:
+                # Stable ID from (source, content hash) so re-processing skips unchanged chunks
+                chunk_id = make_chunk_id(FILE_CHUNK_PREFIX, source, chunk)
+                if chunk_id in seen_ids:
+                    continue
+                seen_ids.add(chunk_id)
+                ids.append(chunk_id)
+                documents.append(chunk)
+                
+                # Create metadata
+                meta = dict(section_info)
+                meta["chunk_index"] = chunk_idx
+                meta["source"] = source
+                meta["filename"] = filename
+                meta["file_type"] = file_type
+                meta["document_type"] = "uploaded_file"
+                metadatas.append(meta)
+                
+                chunk_idx += 1
+            
+            if ids:
+                await queue.put((ids, documents, metadatas))
+        
+        logger.info(f"Parsed {filename} into {chunk_idx} chunks")
+    
+    async def iter_chunks(
         self,
         file_paths: List[str],
         file_types: List[str],
         filenames: List[str]
-    ) -> List[Dict[str, Any]]:
+    ) -> AsyncIterator[ChunkBatch]:
         """
-        Parse multiple files and return processed content.
+        Parse and chunk files as streams, ready for ChromaDB.
+        
+        Up to max_concurrent files are parsed at once; each parsed piece (PDF page
+        range, text block, CSV/JSON row batch) is chunked as soon as it is read and
+        handed over through a bounded queue, so memory stays flat however large
+        the files are. A file that fails to parse is logged and skipped; chunks
+        already yielded for it are listed under failed_sources for the caller to remove.
         
         Args:
             file_paths: List of file paths to parse
             file_types: List of MIME types
             filenames: List of original filenames
             
-        Returns:
-            List of dictionaries with processed content ready for ChromaDB
+        Yields:
+            Tuples of (ids, documents, metadatas) for each parsed piece
         """
-        if not file_paths:
-            return []
+        if len(file_paths) != len(file_types) or len(file_paths) != len(filenames):
+            raise ValueError("file_paths, file_types, and filenames must have the same length")
         
-        # Parse documents in parallel
-        parsed_docs = await parse_documents_parallel(
-            file_paths, file_types, filenames, max_concurrent=self.max_concurrent
-        )
+        logger.info(f"Starting streaming parse of {len(file_paths)} documents")
         
-        # Convert to format similar to scraper results
-        results = []
-        for doc in parsed_docs:
-            results.append({
-                'url': f"file://{doc['file_path']}",
-                'markdown': doc['content'],
-                'filename': doc['filename'],
-                'file_type': doc['file_type']
-            })
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrent * 2)
+        semaphore = asyncio.Semaphore(self.max_concurrent)
         
-        logger.info(f"Document parsing completed. Found {len(results)} documents")
-        return results
-    
-    def process_content_for_chromadb(self, parse_results: List[Dict[str, Any]]) -> tuple:
-        """
-        Process parsed content into format suitable for ChromaDB.
-        Uses the same chunking strategy as WebsiteScraper.
-        
-        Args:
-            parse_results: Results from parse_files
-            
-        Returns:
-            Tuple of (ids, documents, metadatas)
-        """
-        from .scraper import smart_chunk_markdown, extract_section_info
+        async def parse_with_semaphore(file_path, file_type, filename):
+            async with semaphore:
+                try:
+                    await self._chunk_file(file_path, file_type, filename, queue)
+                    self.files_parsed += 1
+                    self.parsed_sources.append(file_chunk_source(file_path))
+                except Exception as e:
+                    logger.error(f"Failed to parse {filename}: {e} (chunks already yielded for it are partial)")
+                    self.files_failed += 1
+                    self.failed_sources.append(file_chunk_source(file_path))
         
-        ids, documents, metadatas = [], [], []
-        chunk_idx = 0
+        async def parse_all():
+            await asyncio.gather(*[
+                parse_with_semaphore(file_path, file_type, filename)
+                for file_path, file_type, filename in zip(file_paths, file_types, filenames)
+            ])
+            await queue.put(None)
         
-        for doc in parse_results:
-            source = doc.get('url', doc.get('filename', 'unknown'))
-            filename = doc.get('filename', 'unknown')
-            file_type = doc.get('file_type', 'unknown')
-            content = doc['markdown']
-            
-            # Chunk the content using the same strategy as web scraping
-            chunks = smart_chunk_markdown(content, max_len=self.chunk_size)
-            
-            for chunk in chunks:
-                ids.append(f"file-chunk-{chunk_idx}")
-                documents.append(chunk)
-                
-                # Create metadata
-                meta = extract_section_info(chunk)
-                meta["chunk_index"] = chunk_idx
-                meta["source"] = source
-                meta["filename"] = filename
-                meta["file_type"] = file_type
-                meta["document_type"] = "uploaded_file"
-                metadatas.append(meta)
-                
-                chunk_idx += 1
+        producer = asyncio.create_task(parse_all())
+        try:
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
         
-        logger.info(f"Processed content into {len(documents)} chunks")
-        return ids, documents, metadatas
-
+        logger.info(f"Successfully parsed {self.files_parsed} out of {len(file_paths)} documents")
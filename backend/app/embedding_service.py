@@ -0,0 +1,191 @@
+"""
+Embedding Service for AI Chat Backend.
+Loads the local MiniLM ONNX model once and serves embeddings to every ChromaDB
+collection, micro-batching small concurrent requests (chat queries) into a
+single inference call.
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from chromadb.utils import embedding_functions
+
+from .config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingEngine:
+    """
+    A singleton-like class that holds the ONNX embedding model
+    so it is loaded once per process instead of once per collection/query.
+    """
+
+    _instance = None
+    _engine_loaded = False
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super(EmbeddingEngine, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._engine_loaded:
+            return
+        with self._instance_lock:
+            if self._engine_loaded:
+                return
+            self.max_batch_size = settings.embedding_max_batch_size
+            self.max_wait_seconds = settings.embedding_max_wait_ms / 1000.0
+            self.model = None
+            self._model_lock = threading.Lock()
+            self._requests: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.embedding_workers,
+                thread_name_prefix="embedding"
+            )
+            # Micro-batches (chat queries) never queue behind ingest slices on _executor
+            self._query_executor = ThreadPoolExecutor(
+                max_workers=settings.embedding_query_workers,
+                thread_name_prefix="embedding-query"
+            )
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop,
+                name="embedding-dispatcher",
+                daemon=True
+            )
+            self._dispatcher.start()
+            EmbeddingEngine._engine_loaded = True
+
+    def _get_model(self):
+        """Load the ONNX model on first use (avoids model downloads at import/status checks)."""
+        if self.model is None:
+            with self._model_lock:
+                if self.model is None:
+                    logger.info("Loading ONNX MiniLM embedding model...")
+                    self.model = embedding_functions.ONNXMiniLM_L6_V2()
+                    logger.info("ONNX MiniLM embedding model loaded")
+        return self.model
+
+    def ensure_model_downloaded(self):
+        """Download the model files if missing (markdown_chunker counts tokens with its tokenizer.json)."""
+        model = self._get_model()
+        with self._model_lock:
+            model._download_model_if_not_exists()
+
+    def _run_model(self, texts: List[str]) -> list:
+        """Run a single inference call. ONNX Runtime releases the GIL, so calls run in parallel."""
+        return list(self._get_model()(texts))
+
+    def _dispatch_loop(self):
+        """
+        Collect queued requests into micro-batches.
+        Waits up to max_wait_seconds after the first request for more to arrive,
+        then runs the whole batch on the query thread pool and splits the results.
+        """
+        while True:
+            texts, future = self._requests.get()
+            batch = [(texts, future)]
+            batch_size = len(texts)
+
+            deadline = time.monotonic() + self.max_wait_seconds
+            while batch_size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                batch_size += len(item[0])
+
+            self._query_executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[Tuple[List[str], Future]]):
+        """Embed a micro-batch and resolve each request's future with its slice."""
+        all_texts = [text for texts, _ in batch for text in texts]
+        try:
+            embeddings = self._run_model(all_texts)
+        except Exception as e:
+            logger.error(f"Error embedding batch of {len(all_texts)} texts: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for texts, future in batch:
+            future.set_result(embeddings[offset:offset + len(texts)])
+            offset += len(texts)
+
+    def embed(self, texts: List[str]) -> list:
+        """
+        Embed a list of texts.
+
+        Small requests (e.g. chat queries) are micro-batched with other concurrent
+        requests and run on a dedicated query thread pool. Large requests (e.g.
+        ingest batches) are split into max_batch_size slices that run in parallel on
+        the ingest thread pool, so a build cannot hold up chat queries.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding per input text, in order
+        """
+        if not texts:
+            return []
+
+        texts = list(texts)
+        if len(texts) >= self.max_batch_size:
+            futures = [
+                self._executor.submit(self._run_model, texts[i:i + self.max_batch_size])
+                for i in range(0, len(texts), self.max_batch_size)
+            ]
+            embeddings = []
+            for future in futures:
+                embeddings.extend(future.result())
+            return embeddings
+
+        future: Future = Future()
+        self._requests.put((texts, future))
+        return future.result()
+
+
+class SharedEmbeddingFunction(embedding_functions.DefaultEmbeddingFunction):
+    """
+    ChromaDB embedding function backed by the shared EmbeddingEngine.
+    Subclasses DefaultEmbeddingFunction so existing collections (persisted with
+    the "default" embedding function) open without a configuration mismatch.
+    """
+
+    def __init__(self, engine: Optional[EmbeddingEngine] = None):
+        super().__init__()
+        self.engine = engine or get_embedding_engine()
+
+    def __call__(self, input):
+        return self.engine.embed(input)
+
+
+def get_embedding_engine() -> EmbeddingEngine:
+    """Get the process-wide embedding engine."""
+    return EmbeddingEngine()
+
+
+def embed(texts: List[str]) -> list:
+    """Embed texts with the process-wide embedding engine."""
+    return get_embedding_engine().embed(texts)
+
+
+def ensure_model_downloaded():
+    """Download the embedding model and its tokenizer if they are not cached yet."""
+    get_embedding_engine().ensure_model_downloaded()
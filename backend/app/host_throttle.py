@@ -0,0 +1,163 @@
+"""
+Adaptive per-host crawl concurrency (AIMD).
+Each host starts at a small concurrency that grows additively while responses
+stay fast and healthy, and is cut multiplicatively on 429/503, timeouts or
+Retry-After. robots.txt Crawl-delay pins a host to one request per delay.
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlparse
+
+from .robots import get_robots
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Statuses that mean the host (or its gateway) is overloaded or rate limiting us
+OVERLOAD_STATUS_CODES = {429, 502, 503, 504}
+
+
+@dataclass
+class HostState:
+    """Concurrency state for one host."""
+    limit: float
+    in_flight: int = 0
+    crawl_delay: float = 0.0
+    next_start_at: float = 0.0  # Monotonic time before which no new request may start
+    latency_baseline: Optional[float] = None  # Typical healthy response time
+    last_decrease_at: float = 0.0
+    robots_loaded: bool = False
+    successes: int = 0
+    backoffs: int = 0
+
+
+class AdaptiveHostThrottle:
+    """
+    Per-host request slots with AIMD concurrency.
+
+    - Success with latency under latency_factor x the host's baseline, while the
+      host is using its whole limit: limit += 1 / limit (about +1 per round trip).
+    - Overload (429/502/503/504, timeout): limit *= decrease_factor, at most once
+      per baseline latency so one burst of failures counts once; new requests
+      are held back for Retry-After (or backoff_seconds).
+    - Crawl-delay from robots.txt: one request at a time, starts spaced by the delay.
+    """
+
+    def __init__(
+        self,
+        initial: int = 5,
+        minimum: int = 1,
+        maximum: int = 16,
+        decrease_factor: float = 0.5,
+        latency_factor: float = 2.0,
+        backoff_seconds: float = 2.0,
+        max_crawl_delay: float = 10.0,
+        max_pause_seconds: float = 60.0
+    ):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = max(maximum, initial)
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.backoff_seconds = backoff_seconds
+        self.max_crawl_delay = max_crawl_delay
+        self.max_pause_seconds = max_pause_seconds
+        self._hosts: Dict[str, HostState] = {}
+        self._changed = asyncio.Condition()
+
+    def _state(self, host: str) -> HostState:
+        if host not in self._hosts:
+            self._hosts[host] = HostState(limit=float(self.initial))
+        return self._hosts[host]
+
+    async def _load_robots(self, url: str, state: HostState):
+        if state.robots_loaded:
+            return
+        robots = await get_robots(url)
+        if not state.robots_loaded:
+            state.robots_loaded = True
+            if robots.crawl_delay:
+                state.crawl_delay = min(robots.crawl_delay, self.max_crawl_delay)
+                logger.info(f"Honouring robots.txt Crawl-delay of {state.crawl_delay:.1f}s for {urlparse(url).netloc}")
+
+    @staticmethod
+    def _effective_limit(state: HostState) -> int:
+        return 1 if state.crawl_delay else max(1, int(state.limit))
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Wait for a request slot on the URL's host (held until the block exits)."""
+        state = self._state(urlparse(url).netloc)
+        await self._load_robots(url, state)
+
+        async with self._changed:
+            while True:
+                now = time.monotonic()
+                if now >= state.next_start_at and state.in_flight < self._effective_limit(state):
+                    break
+                wait = state.next_start_at - now if now < state.next_start_at else None
+                try:
+                    await asyncio.wait_for(self._changed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            state.in_flight += 1
+            if state.crawl_delay:
+                state.next_start_at = now + state.crawl_delay
+
+        try:
+            yield
+        finally:
+            async with self._changed:
+                state.in_flight -= 1
+                self._changed.notify_all()
+
+    async def record_success(self, url: str, latency: float):
+        """A healthy response arrived after latency seconds."""
+        state = self._state(urlparse(url).netloc)
+        state.successes += 1
+        if state.latency_baseline is None or latency < state.latency_baseline:
+            state.latency_baseline = latency
+        else:
+            state.latency_baseline += 0.05 * (latency - state.latency_baseline)  # Drift with the site
+
+        if latency <= state.latency_baseline * self.latency_factor and state.in_flight >= int(state.limit):
+            previous = int(state.limit)
+            state.limit = min(self.maximum, state.limit + 1.0 / state.limit)
+            if int(state.limit) > previous:
+                async with self._changed:
+                    self._changed.notify_all()
+
+    async def record_overload(self, url: str, retry_after: Optional[float] = None):
+        """The host rate limited us, is overloaded or timed out."""
+        host = urlparse(url).netloc
+        state = self._state(host)
+        state.backoffs += 1
+        now = time.monotonic()
+
+        if now - state.last_decrease_at > (state.latency_baseline or 1.0):
+            state.limit = max(float(self.minimum), state.limit * self.decrease_factor)
+            state.last_decrease_at = now
+            logger.info(f"Backing off {host}: concurrency now {int(state.limit)}")
+
+        pause = min(self.max_pause_seconds, retry_after if retry_after is not None else self.backoff_seconds)
+        state.next_start_at = max(state.next_start_at, now + pause)
+
+    async def record_response(self, url: str, status: int, latency: float, retry_after: Optional[float] = None):
+        """Classify an HTTP status as overload or success."""
+        if status in OVERLOAD_STATUS_CODES:
+            await self.record_overload(url, retry_after)
+        elif status < 500:
+            await self.record_success(url, latency)
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{host}: limit {self._effective_limit(state)}, {state.successes} ok, {state.backoffs} backoffs"
+            + (f", crawl-delay {state.crawl_delay:.1f}s" if state.crawl_delay else "")
+            for host, state in self._hosts.items()
+        ) or "no hosts"
@@ -0,0 +1,239 @@
+"""
+Shared async HTTP client for non-browser fetches (static pages, sitemaps, robots.txt, text files).
+One pooled httpx client per process: keep-alive and HTTP/2 connection reuse,
+per-host concurrency limits, timeouts and retries with exponential backoff.
+"""
+
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, Mapping, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from .config import settings
+from .loop_bound import close_stale
+from .browser_pool import DEFAULT_USER_AGENT
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Try to import optional HTTP/2 support
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Responses worth retrying (rate limiting and transient server errors)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 30.0
+
+# Called before each retry with (status, Retry-After seconds); status is None for transport errors
+RetryCallback = Callable[[Optional[int], Optional[float]], Awaitable[None]]
+
+
+@dataclass
+class HttpClientStats:
+    """Process-wide request and connection counters."""
+    requests: int = 0
+    connections_opened: int = 0
+    http2_responses: int = 0
+    retries: int = 0
+    errors: int = 0
+
+    @property
+    def connection_reuse_ratio(self) -> float:
+        """Share of requests served over an already-open connection."""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1.0 - self.connections_opened / self.requests)
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests over {self.connections_opened} connections "
+            f"({self.connection_reuse_ratio:.0%} reused, {self.http2_responses} HTTP/2), "
+            f"{self.retries} retries, {self.errors} errors"
+        )
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date); None if absent or invalid."""
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    """
+    Pooled async HTTP client shared by every crawl in the process.
+
+    Requests to one host are limited to max_per_host at a time; connect errors,
+    timeouts and 429/5xx responses are retried up to max_retries times with
+    jittered exponential backoff (honouring Retry-After).
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        max_per_host: int = 6,
+        timeout_seconds: float = 30.0,
+        max_retries: int = 3,
+        backoff_seconds: float = 0.5
+    ):
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.http2 = settings.http2_enabled and HTTP2_AVAILABLE
+        self._loop = asyncio.get_running_loop()
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.stats = HttpClientStats()
+
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=30.0
+            ),
+            timeout=httpx.Timeout(timeout_seconds, connect=min(10.0, timeout_seconds)),
+            headers={"User-Agent": DEFAULT_USER_AGENT},
+            follow_redirects=True
+        )
+
+        if settings.http2_enabled and not HTTP2_AVAILABLE:
+            logger.warning("h2 not available; HTTP client falls back to HTTP/1.1 keep-alive.")
+
+    async def _trace(self, event_name: str, info: Mapping):
+        # httpcore reports a TCP connect only when no pooled connection could be reused
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.connections_opened += 1
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_slots[host]
+
+    def _backoff(self, attempt: int) -> float:
+        delay = self.backoff_seconds * (2 ** attempt)
+        return min(MAX_BACKOFF_SECONDS, delay * random.uniform(0.5, 1.5))
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Mapping[str, str]],
+        timeout: Optional[float],
+        stream: bool,
+        on_retry: Optional[RetryCallback] = None
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            request = self.client.build_request(
+                method,
+                url,
+                headers=headers,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                extensions={"trace": self._trace}
+            )
+            self.stats.requests += 1
+            try:
+                response = await self.client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    self.stats.errors += 1
+                    raise
+                delay = self._backoff(attempt)
+                logger.debug(f"Retrying {url} in {delay:.1f}s after {type(e).__name__}: {e}")
+                if on_retry:
+                    await on_retry(None, None)
+            else:
+                if response.http_version == "HTTP/2":
+                    self.stats.http2_responses += 1
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                retry_after = retry_after_seconds(response.headers)
+                delay = min(MAX_BACKOFF_SECONDS, max(self._backoff(attempt), retry_after or 0.0))
+                await response.aclose()
+                logger.debug(f"Retrying {url} in {delay:.1f}s after HTTP {response.status_code}")
+                if on_retry:
+                    await on_retry(response.status_code, retry_after)
+
+            attempt += 1
+            self.stats.retries += 1
+            await asyncio.sleep(delay)
+
+    async def get(
+        self,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
+        on_retry: Optional[RetryCallback] = None
+    ) -> httpx.Response:
+        """GET a URL and read the whole body. Raises httpx.HTTPError on transport failure."""
+        async with self._host_slot(url):
+            return await self._send("GET", url, headers, timeout, stream=False, on_retry=on_retry)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[httpx.Response]:
+        """GET a URL without reading the body (iterate response.aiter_bytes())."""
+        async with self._host_slot(url):
+            response = await self._send("GET", url, headers, timeout, stream=True)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+
+    async def close(self):
+        await self.client.aclose()
+        logger.info(f"HTTP client closed: {self.stats.summary()}")
+
+
+_http_client: Optional[HttpClient] = None
+
+
+def get_http_client() -> HttpClient:
+    """Get the process-wide HTTP client (created on first use in the running event loop)."""
+    global _http_client
+    if _http_client is None or _http_client._loop is not asyncio.get_running_loop():
+        if _http_client is not None:
+            close_stale(_http_client, "HTTP client")
+        _http_client = HttpClient(
+            max_connections=settings.http_max_connections,
+            max_keepalive=settings.http_max_keepalive_connections,
+            max_per_host=settings.http_max_connections_per_host,
+            timeout_seconds=settings.http_timeout_seconds,
+            max_retries=settings.http_max_retries,
+            backoff_seconds=settings.http_backoff_seconds
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the process-wide HTTP client (application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.close()
+        _http_client = None
@@ -0,0 +1,236 @@
+"""
+Streaming ingest pipeline for website builds.
+Pages flow crawl -> chunk -> embed -> upsert through bounded queues as soon as
+they are scraped, so peak memory does not grow with site size and embedding
+overlaps crawling instead of waiting for it.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import chromadb
+
+from .config import settings
+from .chunk_dedup import ChunkDeduplicator
+from .cpu_pool import run_cpu
+from .build_checkpoint import BuildCheckpoint
+from .embedding_service import embed
+from .page_processing import chunk_markdown_task
+from .scraper import WebsiteScraper
+from .utils import add_documents_to_collection, copy_documents_between_collections
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# End-of-stream marker passed between stages
+_DONE = object()
+
+
+@dataclass
+class IngestStats:
+    """Counters for one pipeline run."""
+    pages: int = 0
+    chunks: int = 0
+    added: int = 0  # Newly embedded chunks
+    unchanged: int = 0  # Chunks copied with their embeddings from the source collection
+    duplicates: int = 0  # Boilerplate/near-duplicate chunks dropped by the deduplicator
+    resumed: int = 0  # Chunks already written to the target before a resumed build was interrupted
+    chunk_ids: Set[str] = field(default_factory=set)  # Every chunk ID in the new build
+    sample_pages: List[Dict[str, Any]] = field(default_factory=list)  # For empty-build diagnostics
+
+
+class WebsiteIngestPipeline:
+    """
+    Crawls websites into a target collection in a single streaming pass.
+
+    Stages (each connected by a bounded asyncio.Queue for backpressure):
+        crawl   - WebsiteScraper.scrape_urls puts pages on the page queue
+        chunk   - strips boilerplate repeated across pages, chunks each page in the
+                  CPU pool and drops near-duplicate chunks; chunks already in the
+                  source collection are queued for copying, new ones are batched
+                  for embedding
+        embed   - embed_workers tasks embed batches with the shared engine
+        upsert  - writes embedded batches and copies carried chunks into the target
+    """
+
+    def __init__(
+        self,
+        scraper: WebsiteScraper,
+        target: chromadb.Collection,
+        source: Optional[chromadb.Collection] = None,
+        source_ids: Optional[Set[str]] = None,
+        progress_callback: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None,
+        checkpoint: Optional[BuildCheckpoint] = None,
+        target_ids: Optional[Set[str]] = None
+    ):
+        self.scraper = scraper
+        self.target = target
+        self.source = source
+        self.source_ids = source_ids or set()
+        self.checkpoint = checkpoint
+        self.target_ids = target_ids or set()  # Already in the target (resumed build)
+        self.progress_callback = progress_callback
+        self.batch_size = settings.ingest_batch_size
+        self.embed_workers = settings.ingest_embed_workers
+        self.stats = IngestStats()
+        self.dedup = ChunkDeduplicator(
+            min_block_chars=settings.chunk_dedup_min_block_chars,
+            keep_pages=settings.chunk_dedup_block_keep_pages,
+            max_hamming=settings.chunk_dedup_max_hamming
+        ) if settings.chunk_dedup_enabled else None
+
+    async def _crawl_stage(self, urls: List[str], pages: asyncio.Queue, scraper_progress_callback):
+        if self.checkpoint and self.checkpoint.resumed:
+            # Pages scraped before the interruption go through chunking again (in their
+            # original order, so deduplication decides the same way); chunks already
+            # written to the target are skipped there
+            async for page in self.checkpoint.iter_pages():
+                await pages.put(page)
+        await self.scraper.scrape_urls(
+            urls,
+            progress_callback=scraper_progress_callback,
+            page_queue=pages,
+            checkpoint=self.checkpoint
+        )
+        await pages.put(_DONE)
+
+    async def _chunk_stage(self, pages: asyncio.Queue, to_embed: asyncio.Queue, to_write: asyncio.Queue):
+        ids, documents, metadatas = [], [], []
+        carried: List[str] = []
+
+        while True:
+            page = await pages.get()
+            if page is _DONE:
+                break
+
+            self.stats.pages += 1
+            if len(self.stats.sample_pages) < 3:
+                self.stats.sample_pages.append({
+                    "url": page.get("url"),
+                    "title": page.get("title"),
+                    "markdown": page.get("markdown", "")[:200],
+                    "markdown_length": len(page.get("markdown", ""))
+                })
+
+            if self.dedup:
+                page = {**page, "markdown": self.dedup.strip_repeated_blocks(page.get("markdown", ""))}
+
+            chunked = await run_cpu(
+                chunk_markdown_task, page.get("markdown", ""), self.scraper.chunk_size, self.scraper.chunk_overlap
+            )
+            page_ids, page_documents, page_metadatas = self.scraper.process_content_for_chromadb(
+                [page], start_index=self.stats.chunks, chunked=[chunked]
+            )
+
+            for chunk_id, document, metadata in zip(page_ids, page_documents, page_metadatas):
+                if chunk_id in self.stats.chunk_ids:
+                    continue  # Same page reached twice (e.g. sitemap and link)
+                if self.dedup and self.dedup.is_duplicate(document):
+                    self.stats.duplicates += 1
+                    continue
+                self.stats.chunk_ids.add(chunk_id)
+                self.stats.chunks += 1
+                if chunk_id in self.target_ids:
+                    # Written before the interruption; count it as it was counted then
+                    self.stats.resumed += 1
+                    if chunk_id in self.source_ids:
+                        self.stats.unchanged += 1
+                    else:
+                        self.stats.added += 1
+                elif chunk_id in self.source_ids:
+                    carried.append(chunk_id)
+                else:
+                    ids.append(chunk_id)
+                    documents.append(document)
+                    metadatas.append(metadata)
+
+            while len(ids) >= self.batch_size:
+                await to_embed.put((ids[:self.batch_size], documents[:self.batch_size], metadatas[:self.batch_size]))
+                ids, documents, metadatas = ids[self.batch_size:], documents[self.batch_size:], metadatas[self.batch_size:]
+            if len(carried) >= self.batch_size:
+                await to_write.put(("copy", carried))
+                carried = []
+
+        if ids:
+            await to_embed.put((ids, documents, metadatas))
+        if carried:
+            await to_write.put(("copy", carried))
+        for _ in range(self.embed_workers):
+            await to_embed.put(_DONE)
+
+    async def _embed_stage(self, to_embed: asyncio.Queue, to_write: asyncio.Queue):
+        while True:
+            item = await to_embed.get()
+            if item is _DONE:
+                await to_write.put(_DONE)
+                return
+            ids, documents, metadatas = item
+            embeddings = await asyncio.to_thread(embed, documents)
+            await to_write.put(("add", ids, documents, metadatas, embeddings))
+
+    async def _write_stage(self, to_write: asyncio.Queue):
+        finished_workers = 0
+        while finished_workers < self.embed_workers:
+            item = await to_write.get()
+            if item is _DONE:
+                finished_workers += 1
+                continue
+
+            if item[0] == "copy":
+                await copy_documents_between_collections(self.source, self.target, item[1])
+                self.stats.unchanged += len(item[1])
+            else:
+                _, ids, documents, metadatas, embeddings = item
+                await add_documents_to_collection(
+                    collection=self.target,
+                    ids=ids,
+                    documents=documents,
+                    metadatas=metadatas,
+                    batch_size=len(ids),
+                    embeddings=embeddings
+                )
+                self.stats.added += len(ids)
+
+            if self.progress_callback:
+                saved = self.stats.added + self.stats.unchanged
+                self.progress_callback(
+                    f"Saved {saved} chunks from {self.stats.pages} pages to knowledge base...",
+                    {"step": "adding_to_db", "chunks_count": saved, "pages_found": self.stats.pages}
+                )
+
+    async def run(self, urls: List[str], scraper_progress_callback=None) -> IngestStats:
+        """
+        Crawl, chunk, embed and write all URLs. On failure every stage is cancelled
+        and the exception re-raised (the caller discards the target collection).
+        """
+        pages: asyncio.Queue = asyncio.Queue(maxsize=settings.ingest_page_queue_size)
+        to_embed: asyncio.Queue = asyncio.Queue(maxsize=settings.ingest_batch_queue_size)
+        to_write: asyncio.Queue = asyncio.Queue(maxsize=settings.ingest_batch_queue_size)
+
+        tasks = [
+            asyncio.create_task(self._crawl_stage(urls, pages, scraper_progress_callback)),
+            asyncio.create_task(self._chunk_stage(pages, to_embed, to_write)),
+            *[asyncio.create_task(self._embed_stage(to_embed, to_write)) for _ in range(self.embed_workers)],
+            asyncio.create_task(self._write_stage(to_write)),
+        ]
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        logger.info(
+            f"Ingest pipeline finished: {self.stats.pages} pages, {self.stats.chunks} chunks "
+            f"({self.stats.added} embedded, {self.stats.unchanged} copied"
+            + (f", {self.stats.resumed} already written before resume" if self.stats.resumed else "")
+            + ")"
+        )
+        if self.dedup:
+            logger.info(f"Deduplication: {self.dedup.stats.summary()}")
+        return self.stats
@@ -4,15 +4,36 @@ Based on the provided rag_bot.py implementation.
 """
 
 import os
+import asyncio
 import logging
-from typing import Optional
+from typing import Optional, AsyncIterator, Tuple
 from google.genai import Client
 from .config import settings
+from .embedding_service import embed
+from .semantic_cache import semantic_answer_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever the system prompt or prompt template changes, so cached responses are not reused
+PROMPT_VERSION = "1"
+
+# Prefix of every error message returned to the user; such responses are never cached
+ERROR_RESPONSE_PREFIX = "I apologize, but I encountered an error"
+
+
+class StreamError(str):
+    """
+    A streamed delta that reports a failure instead of answer text.
+    Streams may fail after partial output, so callers check each delta rather than the joined text.
+    """
+
+NO_RESULTS_RESPONSE = (
+    "I don't have any information about this topic in my knowledge base. "
+    "Please try asking about something else related to the website content."
+)
+
 
 class ModelLoader:
     """
@@ -100,6 +121,49 @@ class ModelLoader:
             logger.error(f"Error generating content with Gemini: {e}")
             raise
 
+    async def generate_content_async(self, contents: str) -> str:
+        """
+        Generate content using the async Gemini client.
+        Does not hold a threadpool worker while waiting on the API.
+        """
+        if not self.client or not self.model_name:
+            # Fallback to mock if client not initialized
+            mock = self._create_mock_pipeline()
+            return mock.generate_content(contents).text
+        
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=self.model_name,
+                contents=contents
+            )
+            return response.text
+        except Exception as e:
+            logger.error(f"Error generating content with Gemini: {e}")
+            raise
+
+    async def generate_content_stream_async(self, contents: str) -> AsyncIterator[str]:
+        """
+        Stream generated text from Gemini as it is produced.
+        Yields text deltas; the mock pipeline yields its full response once.
+        """
+        if not self.client or not self.model_name:
+            # Fallback to mock if client not initialized
+            mock = self._create_mock_pipeline()
+            yield mock.generate_content(contents).text
+            return
+        
+        try:
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.model_name,
+                contents=contents
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            logger.error(f"Error streaming content with Gemini: {e}")
+            raise
+
     def get_model(self):
         """Get the model loader instance (for backward compatibility)."""
         return self
@@ -197,56 +261,218 @@ class RAG_Bot_Local:
             logger.error(f"❌ Error generating response: {e}")
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
-            return f"I apologize, but I encountered an error while generating a response: {str(e)}"
+            return f"{ERROR_RESPONSE_PREFIX} while generating a response: {str(e)}"
+
+    async def _generate_response_async(self, prompt: str) -> str:
+        """Generates a response using the async Gemini client."""
+
+        if not hasattr(self.gemini_model, 'generate_content_async'):
+            # Mock pipeline or legacy model - run the sync path off the event loop
+            return await asyncio.to_thread(self._generate_response, prompt)
+
+        try:
+            full_prompt = f"{self.system_prompt}\n\n{prompt}"
+            logger.info(f"📝 FULL PROMPT TO GEMINI (length: {len(full_prompt)} chars)")
+            
+            response_text = await self.gemini_model.generate_content_async(full_prompt)
+            
+            logger.info(f"🤖 GEMINI RAW RESPONSE:")
+            logger.info(f"   📏 Response length: {len(response_text)} characters")
+            
+            return response_text.strip()
+            
+        except Exception as e:
+            logger.error(f"❌ Error generating response: {e}")
+            import traceback
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            return f"{ERROR_RESPONSE_PREFIX} while generating a response: {str(e)}"
+
+    def _build_prompt(self, query: str, query_results: dict) -> Optional[str]:
+        """
+        Builds the final prompt from vector search results.
+        Returns None if the search found no documents.
+        """
+        from .utils import format_results_as_context
+        
+        # Check if we have any results
+        if not query_results["documents"] or not query_results["documents"][0]:
+            return None
+        
+        context_string = format_results_as_context(query_results)
+        logger.info(f"📝 FORMATTED CONTEXT SENT TO AI:")
+        logger.info(f"   📏 Context length: {len(context_string)} characters")
+        logger.info(f"   📄 Context preview: {context_string[:500]}{'...' if len(context_string) > 500 else ''}")
+
+        prompt_template = (
+            "Here is the context retrieved from the website's documents:\n\n"
+            "--- CONTEXT ---\n"
+            "{context}\n"
+            "--- END CONTEXT ---\n\n"
+            "Based on the context above, please answer the following question:\n"
+            "Question: {question}"
+        )
+        final_prompt = prompt_template.format(context=context_string, question=query)
+        
+        logger.info(f"🎯 FINAL PROMPT TO GEMINI:")
+        logger.info(f"   📏 Prompt length: {len(final_prompt)} characters")
+        logger.info(f"   📄 Prompt preview: {final_prompt[:300]}{'...' if len(final_prompt) > 300 else ''}")
+
+        return final_prompt
+
+    def _retrieve(self, query: str, n_results: int) -> Tuple[Optional[list], Optional[str], Optional[dict]]:
+        """
+        Embeds the query, checks the semantic answer cache and, on a miss, runs the vector search.
+
+        Returns:
+            Tuple of (query_embedding, cached_answer, query_results). Exactly one of
+            cached_answer / query_results is set. query_embedding is None when the
+            semantic cache is disabled.
+        """
+        from .utils import query_collection
+        
+        if not settings.semantic_cache_enabled:
+            return None, None, query_collection(self.collection, query, n_results=n_results)
+        
+        # Embed once and reuse the vector for both the cache lookup and the search
+        query_embedding = embed([query])[0]
+        cached = semantic_answer_cache.lookup(self.collection.name, query_embedding, n_results)
+        if cached is not None:
+            return query_embedding, cached.answer, None
+        
+        query_results = query_collection(
+            self.collection, query, n_results=n_results, query_embedding=query_embedding
+        )
+        return query_embedding, None, query_results
+
+    def _cache_answer(self, query: str, query_embedding: Optional[list], query_results: dict,
+                      response: str, n_results: int):
+        """Stores a generated answer in the semantic cache (errors and mock responses are never cached)."""
+        if query_embedding is None or not response or response.startswith(ERROR_RESPONSE_PREFIX):
+            return
+        get_client = getattr(self.gemini_model, 'get_client', None)
+        if get_client is None or get_client() is None:
+            return  # Mock pipeline: its answers must not be served once a real client is configured
+        semantic_answer_cache.store(
+            self.collection.name,
+            query,
+            query_embedding,
+            query_results.get("ids", [[]])[0],
+            response,
+            n_results
+        )
 
     def answer(self, query: str, n_results: int = 5) -> str:
         """Answers a user's query using the RAG pipeline."""
         try:
-            from .utils import query_collection, format_results_as_context
-            
             logger.info(f"🤖 AI QUERY RECEIVED: '{query}'")
             logger.info(f"🔧 Collection: '{self.collection.name}', n_results: {n_results}")
             
-            # 1. Retrieve context
-            query_results = query_collection(self.collection, query, n_results=n_results)
+            # 1. Retrieve context (or a cached answer)
+            query_embedding, cached_answer, query_results = self._retrieve(query, n_results)
+            if cached_answer is not None:
+                return cached_answer
             
-            # Check if we have any results
-            if not query_results["documents"] or not query_results["documents"][0]:
+            # 2. Construct the prompt
+            final_prompt = self._build_prompt(query, query_results)
+            if final_prompt is None:
                 logger.warning("❌ No documents found in vector search - returning fallback response")
-                return "I don't have any information about this topic in my knowledge base. Please try asking about something else related to the website content."
+                return NO_RESULTS_RESPONSE
+
+            # 3. Generate and return response
+            logger.info("🚀 Sending request to Gemini model...")
+            response = self._generate_response(final_prompt)
+            logger.info(f"✅ GEMINI RESPONSE RECEIVED:")
+            logger.info(f"   📏 Response length: {len(response)} characters")
+            logger.info(f"   📄 Response: {response}")
+            
+            self._cache_answer(query, query_embedding, query_results, response, n_results)
+            return response
             
-            context_string = format_results_as_context(query_results)
-            logger.info(f"📝 FORMATTED CONTEXT SENT TO AI:")
-            logger.info(f"   📏 Context length: {len(context_string)} characters")
-            logger.info(f"   📄 Context preview: {context_string[:500]}{'...' if len(context_string) > 500 else ''}")
+        except Exception as e:
+            logger.error(f"❌ Error in RAG answer generation: {e}")
+            return f"{ERROR_RESPONSE_PREFIX} while processing your question: {str(e)}"
 
-            # 2. Construct the prompt
-            prompt_template = (
-                "Here is the context retrieved from the website's documents:\n\n"
-                "--- CONTEXT ---\n"
-                "{context}\n"
-                "--- END CONTEXT ---\n\n"
-                "Based on the context above, please answer the following question:\n"
-                "Question: {question}"
+    async def answer_async(self, query: str, n_results: int = 5) -> str:
+        """
+        Answers a user's query using the RAG pipeline without blocking the event loop.
+        The Chroma query runs in a worker thread; generation uses the async Gemini client.
+        """
+        try:
+            logger.info(f"🤖 AI QUERY RECEIVED: '{query}'")
+            logger.info(f"🔧 Collection: '{self.collection.name}', n_results: {n_results}")
+            
+            # 1. Retrieve context (or a cached answer)
+            query_embedding, cached_answer, query_results = await asyncio.to_thread(
+                self._retrieve, query, n_results
             )
-            final_prompt = prompt_template.format(context=context_string, question=query)
+            if cached_answer is not None:
+                return cached_answer
             
-            logger.info(f"🎯 FINAL PROMPT TO GEMINI:")
-            logger.info(f"   📏 Prompt length: {len(final_prompt)} characters")
-            logger.info(f"   📄 Prompt preview: {final_prompt[:300]}{'...' if len(final_prompt) > 300 else ''}")
+            # 2. Construct the prompt
+            final_prompt = self._build_prompt(query, query_results)
+            if final_prompt is None:
+                logger.warning("❌ No documents found in vector search - returning fallback response")
+                return NO_RESULTS_RESPONSE
 
             # 3. Generate and return response
             logger.info("🚀 Sending request to Gemini model...")
-            response = self._generate_response(final_prompt)
+            response = await self._generate_response_async(final_prompt)
             logger.info(f"✅ GEMINI RESPONSE RECEIVED:")
             logger.info(f"   📏 Response length: {len(response)} characters")
-            logger.info(f"   📄 Response: {response}")
             
+            self._cache_answer(query, query_embedding, query_results, response, n_results)
             return response
             
         except Exception as e:
             logger.error(f"❌ Error in RAG answer generation: {e}")
-            return f"I apologize, but I encountered an error while processing your question: {str(e)}"
+            return f"{ERROR_RESPONSE_PREFIX} while processing your question: {str(e)}"
+
+    async def answer_stream_async(self, query: str, n_results: int = 5) -> AsyncIterator[str]:
+        """
+        Answers a user's query using the RAG pipeline, yielding the response as it is generated.
+        Errors are yielded as a final StreamError apology instead of being raised.
+        """
+        try:
+            logger.info(f"🤖 AI STREAMING QUERY RECEIVED: '{query}'")
+            logger.info(f"🔧 Collection: '{self.collection.name}', n_results: {n_results}")
+            
+            # 1. Retrieve context (or a cached answer)
+            query_embedding, cached_answer, query_results = await asyncio.to_thread(
+                self._retrieve, query, n_results
+            )
+            if cached_answer is not None:
+                yield cached_answer
+                return
+            
+            # 2. Construct the prompt
+            final_prompt = self._build_prompt(query, query_results)
+            if final_prompt is None:
+                logger.warning("❌ No documents found in vector search - returning fallback response")
+                yield NO_RESULTS_RESPONSE
+                return
+            
+            full_prompt = f"{self.system_prompt}\n\n{final_prompt}"
+            
+            # 3. Stream the response
+            if not hasattr(self.gemini_model, 'generate_content_stream_async'):
+                # Mock pipeline or legacy model - no streaming support
+                response = await asyncio.to_thread(self._generate_response, final_prompt)
+                yield StreamError(response) if response.startswith(ERROR_RESPONSE_PREFIX) else response
+                return
+            
+            logger.info("🚀 Streaming request to Gemini model...")
+            response_parts = []
+            async for delta in self.gemini_model.generate_content_stream_async(full_prompt):
+                response_parts.append(delta)
+                yield delta
+            response = "".join(response_parts).strip()
+            logger.info(f"✅ GEMINI STREAM COMPLETE: {len(response)} characters")
+            
+            self._cache_answer(query, query_embedding, query_results, response, n_results)
+            
+        except Exception as e:
+            logger.error(f"❌ Error in RAG streaming answer generation: {e}")
+            yield StreamError(f"{ERROR_RESPONSE_PREFIX} while processing your question: {str(e)}")
 
     def get_collection_info(self) -> dict:
         """Get information about the current collection."""
@@ -0,0 +1,36 @@
+"""
+Shutdown of process-wide async singletons left behind by another event loop.
+The browser pool and HTTP client are bound to the loop that created them; when
+their getter runs on a new loop, the old instance is closed with close_stale
+instead of being dropped with its browsers and connections still open.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def close_stale(instance: Any, name: str):
+    """
+    Close an instance (with a `_loop` attribute and an async close()) on its own loop,
+    without waiting for it: this is called from a different, running loop.
+    """
+    loop: asyncio.AbstractEventLoop = instance._loop
+    if loop.is_running():
+        # Still running in another thread: close it there
+        asyncio.run_coroutine_threadsafe(instance.close(), loop)
+    elif not loop.is_closed():
+        # Stopped but open: this thread's loop is busy, so run the old one on a helper thread
+        threading.Thread(
+            target=loop.run_until_complete,
+            args=(instance.close(),),
+            name=f"close-stale-{name}",
+            daemon=True
+        ).start()
+    else:
+        logger.warning(f"Event loop of the previous {name} is closed; it could not be shut down cleanly")
@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -5,8 +6,11 @@ from .database import engine, Base
 from .routes import auth_router
 from .company_routes import company_router
 from .widget_routes import widget_router
-from .ai_routes import ai_router
+from .ai_routes import ai_router, watch_interrupted_builds
 from .config import settings
+from .browser_pool import close_browser_pool
+from .http_client import close_http_client
+from .cpu_pool import close_cpu_pool
 
 # Create FastAPI app
 app = FastAPI(
@@ -58,7 +62,23 @@ async def startup_event():
         logger.warning("   The application will start but database operations will fail.")
         logger.warning("   Please ensure PostgreSQL is running and update your .env file.")
     
+    # Resume AI builds interrupted by a restart (they continue from their crawl checkpoints);
+    # re-checked in the background so builds whose lease expires later are picked up too
+    if settings.build_resume_on_startup:
+        app.state.build_resume_watcher = asyncio.create_task(watch_interrupted_builds())
+    
     # Log startup information
     logger.info(f"🚀 Application starting in {settings.environment} mode")
     logger.info(f"📡 Base URL: {settings.base_url}")
     logger.info(f"🔑 Gemini API key configured: {'Yes' if settings.google_api_key else 'No'}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    watcher = getattr(app.state, "build_resume_watcher", None)
+    if watcher is not None:
+        watcher.cancel()
+    
+    # Close pooled crawler browsers, HTTP connections and CPU workers
+    await close_browser_pool()
+    await close_http_client()
+    close_cpu_pool()
@@ -0,0 +1,286 @@
+"""
+Single-pass, token-aware markdown chunker.
+Chunk size is measured in tokens of the embedding model (MiniLM embeds at most
+256 word pieces per chunk; anything past that is silently truncated), chunks
+break at headings, paragraphs, sentences and lines rather than mid-word, and
+section metadata is collected in the same pass.
+"""
+
+import os
+import re
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Where ChromaDB's ONNXMiniLM_L6_V2 embedding function unpacks its model and tokenizer
+MINILM_TOKENIZER_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "chroma", "onnx_models", "all-MiniLM-L6-v2", "onnx", "tokenizer.json"
+)
+
+# MiniLM's 256 word pieces minus [CLS] and [SEP]
+DEFAULT_MAX_TOKENS = 254
+DEFAULT_OVERLAP_TOKENS = 32
+
+HEADER_LINE = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+FENCE_LINE = re.compile(r'^\s*(```|~~~)')
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])(\s+)')
+
+# Blocks longer than this many characters per chunk token are split into sentences without
+# counting the whole block first (even dense prose averages well under 8 characters per token)
+CHARS_PER_TOKEN_LIMIT = 8
+
+# Headings at this level or above always start a new chunk
+SECTION_BREAK_LEVEL = 3
+
+# Per-process cap on cached per-word token counts (cleared when full)
+WORD_CACHE_SIZE = 200_000
+
+TokenCounter = Callable[[str], int]
+
+
+class MiniLMTokenCounter:
+    """
+    Counts MiniLM word pieces one whitespace-separated word at a time, with a
+    per-word cache. The BERT pre-tokenizer always splits at whitespace, so the
+    sum over words equals the tokenizer's count for the whole text, while each
+    distinct word is only encoded once per process.
+    """
+
+    def __init__(self, tokenizer: "Tokenizer"):
+        self.tokenizer = tokenizer
+        self._cache: Dict[str, int] = {}
+
+    def __call__(self, text: str) -> int:
+        words = text.split()
+        try:
+            return sum(map(self._cache.__getitem__, words))
+        except KeyError:
+            pass
+        missing = list({word for word in words if word not in self._cache})
+        if len(self._cache) + len(missing) > WORD_CACHE_SIZE:
+            self._cache.clear()
+        encodings = self.tokenizer.encode_batch(missing, add_special_tokens=False)
+        self._cache.update(zip(missing, (len(encoding.ids) for encoding in encodings)))
+        return sum(map(self._cache.__getitem__, words))
+
+
+_token_counter: Optional[TokenCounter] = None
+
+
+def load_tokenizer(path: str = MINILM_TOKENIZER_PATH) -> "Tokenizer":
+    """
+    Load MiniLM's tokenizer without truncation or padding.
+    Raises RuntimeError when it is unavailable: chunk boundaries (and so the
+    content-hashed chunk ids) must not depend on which process counted the tokens.
+    """
+    if not TOKENIZERS_AVAILABLE:
+        raise RuntimeError("The `tokenizers` package is required to chunk markdown")
+    if not os.path.exists(path):
+        raise RuntimeError(
+            f"MiniLM tokenizer not found at {path}; download the embedding model first "
+            "(embedding_service.ensure_model_downloaded)"
+        )
+    tokenizer = Tokenizer.from_file(path)
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+def get_token_counter() -> TokenCounter:
+    """
+    Token counter for the embedding model, loaded once per process (including
+    each CPU pool worker). Raises RuntimeError if MiniLM's tokenizer is missing;
+    a failed load is not cached, so a later call picks up a downloaded model.
+    """
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = MiniLMTokenCounter(load_tokenizer())
+    return _token_counter
+
+
+class _ChunkBuilder:
+    """Accumulates units (heading lines, blocks, sentences, lines) into chunks of at most max_tokens."""
+
+    def __init__(self, max_tokens: int, overlap_tokens: int, count_tokens: TokenCounter):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = min(overlap_tokens, max_tokens // 2)
+        self.count_tokens = count_tokens
+        self.chunks: List[Tuple[str, Dict[str, Any]]] = []
+        self.path: List[Tuple[int, str]] = []  # Enclosing headings, outermost first
+        self._units: List[Tuple[str, str, int]] = []  # (separator before, text, tokens)
+        self._tokens = 0
+        self._has_body = False
+        self._headers: List[Tuple[int, str]] = []
+
+    def heading(self, level: int, text: str, line: str):
+        if level <= SECTION_BREAK_LEVEL and self._has_body:
+            self._emit(overlap=False)
+        while self.path and self.path[-1][0] >= level:
+            self.path.pop()
+        self.path.append((level, text))
+        self._add(line, self.count_tokens(line), '\n\n', body=False)
+        if (level, text) not in self._headers:
+            self._headers.append((level, text))
+
+    def block(self, text: str):
+        # Text is counted once: a block far longer than a chunk goes straight to sentences
+        if len(text) <= self.max_tokens * CHARS_PER_TOKEN_LIMIT:
+            tokens = self.count_tokens(text)
+            if tokens <= self.max_tokens:
+                self._add(text, tokens, '\n\n')
+                return
+        parts = SENTENCE_BOUNDARY.split(text)
+        separator = '\n\n'
+        for i in range(0, len(parts), 2):
+            sentence = parts[i]
+            sentence_tokens = self.count_tokens(sentence)
+            if sentence_tokens <= self.max_tokens:
+                self._add(sentence, sentence_tokens, separator)
+            else:
+                self._add_lines(sentence, separator)
+            if i + 1 < len(parts):
+                separator = parts[i + 1]  # Keep the original whitespace (e.g. newlines between list items)
+
+    def _add_lines(self, text: str, separator: str):
+        """A sentence longer than a chunk (typically code or a table) breaks between lines."""
+        for line in text.split('\n'):
+            line_tokens = self.count_tokens(line)
+            if line_tokens <= self.max_tokens:
+                self._add(line, line_tokens, separator)
+            else:
+                self._add_words(line, separator)
+            separator = '\n'
+
+    def _add_words(self, text: str, separator: str):
+        """Last resort for a line longer than a chunk: break between words."""
+        piece: List[str] = []
+        piece_tokens = 0
+        for word in text.split():
+            word_tokens = self.count_tokens(word)
+            if word_tokens > self.max_tokens:
+                # A single "word" (e.g. an inline data URI) longer than a chunk is cut by characters
+                cuts = self._cut_word(word, word_tokens)
+                word, word_tokens = cuts.pop()
+                for cut, cut_tokens in cuts:
+                    self._add(cut, cut_tokens, separator)
+                    separator = ' '
+            if piece and piece_tokens + word_tokens > self.max_tokens:
+                self._add(' '.join(piece), piece_tokens, separator)
+                separator = ' '
+                piece, piece_tokens = [], 0
+            piece.append(word)
+            piece_tokens += word_tokens
+        if piece:
+            self._add(' '.join(piece), piece_tokens, separator)
+
+    def _cut_word(self, word: str, word_tokens: int) -> List[Tuple[str, int]]:
+        """Cut a word into (piece, tokens) of at most max_tokens each."""
+        step = max(1, len(word) * self.max_tokens // word_tokens)
+        cuts = []
+        for i in range(0, len(word), step):
+            cut = word[i:i + step]
+            cut_tokens = self.count_tokens(cut)
+            # Token density varies along the word: cut again any piece that still overflows
+            cuts.extend(self._cut_word(cut, cut_tokens) if cut_tokens > self.max_tokens else [(cut, cut_tokens)])
+        return cuts
+
+    def _add(self, text: str, tokens: int, separator: str, body: bool = True):
+        if self._units and self._tokens + tokens > self.max_tokens and self._has_body:
+            self._emit(overlap=True)
+        if self._units and self._tokens + tokens > self.max_tokens:
+            # Only heading lines or overlap so far: drop them rather than overflow the chunk
+            # (headings stay in the chunk's "headers" metadata)
+            self._units, self._tokens = [], 0
+        if not self._units:
+            self._headers = list(self.path)
+        self._units.append((separator, text, tokens))
+        self._tokens += tokens
+        self._has_body = self._has_body or body
+
+    def _emit(self, overlap: bool):
+        text = ''.join(
+            (separator if i else '') + unit for i, (separator, unit, _) in enumerate(self._units)
+        ).strip()
+        if text:
+            self.chunks.append((text, {
+                "headers": '; '.join(f"{'#' * level} {header}" for level, header in self._headers),
+                "char_count": len(text),
+                "word_count": len(text.split()),
+                "token_count": self._tokens
+            }))
+
+        carried: List[Tuple[str, str, int]] = []
+        if overlap and self.overlap_tokens:
+            # Start the next chunk with the trailing units (sentences/blocks) that fit in the overlap
+            carried_tokens = 0
+            for unit in reversed(self._units[1:]):
+                if carried_tokens + unit[2] > self.overlap_tokens:
+                    break
+                carried.insert(0, unit)
+                carried_tokens += unit[2]
+        self._units = carried
+        self._tokens = sum(unit[2] for unit in carried)
+        self._has_body = bool(carried)
+        self._headers = list(self.path)
+
+    def finish(self) -> List[Tuple[str, Dict[str, Any]]]:
+        if self._units:
+            self._emit(overlap=False)
+        return self.chunks
+
+
+def chunk_markdown(
+    markdown: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    count_tokens: Optional[TokenCounter] = None
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Split markdown into chunks of at most max_tokens embedding-model tokens.
+
+    One pass over the lines: H1-H3 headings start a new chunk, blocks are packed
+    until the next would overflow, blocks larger than a chunk are split at
+    sentence, then line, then word boundaries, and a chunk cut mid-section
+    starts the next one with up to overlap_tokens of trailing sentences.
+
+    Returns:
+        (chunk, section_info) pairs; section_info has the enclosing and contained
+        headings ("headers"), char_count, word_count and token_count
+    """
+    if not markdown or not markdown.strip():
+        return []
+
+    builder = _ChunkBuilder(max_tokens, overlap_tokens, count_tokens or get_token_counter())
+    paragraph: List[str] = []
+    in_fence = False
+
+    for line in markdown.splitlines():
+        if FENCE_LINE.match(line):
+            in_fence = not in_fence
+            paragraph.append(line)
+            continue
+        header = HEADER_LINE.match(line) if not in_fence and line.startswith('#') else None
+        if header or (not in_fence and not line.strip()):
+            if paragraph:
+                builder.block('\n'.join(paragraph).strip())
+                paragraph = []
+            if header:
+                builder.heading(len(header.group(1)), header.group(2), line.strip())
+        else:
+            paragraph.append(line)
+
+    if paragraph:
+        builder.block('\n'.join(paragraph).strip())
+
+    chunks = builder.finish()
+    logger.debug(f"chunk_markdown: input={len(markdown)} chars, output={len(chunks)} chunks")
+    return chunks
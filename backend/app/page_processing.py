@@ -0,0 +1,163 @@
+"""
+CPU-bound page processing for the website crawler and ingest pipeline.
+HTML-to-markdown conversion, link extraction and markdown chunking. Kept free of
+heavy imports so CPU pool worker processes start quickly; the *_task functions
+are the entry points submitted to the pool.
+"""
+
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, urljoin
+from html.parser import HTMLParser
+
+import html2text
+
+from .markdown_chunker import DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS, chunk_markdown
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def new_html_converter() -> html2text.HTML2Text:
+    """
+    HTML to markdown converter. HTML2Text keeps parser state on the instance, so each
+    task makes its own (tasks run in threads when the CPU pool falls back to them).
+    """
+    converter = html2text.HTML2Text()
+    converter.ignore_links = False
+    converter.ignore_images = True
+    converter.body_width = 0  # Don't wrap lines
+    return converter
+
+
+# Empty mount points of client-side rendered apps (React, Vue, Next, Nuxt, Gatsby, Svelte)
+SPA_ROOT_PATTERN = re.compile(
+    r'<div[^>]+id=["\'](?:root|app|__next|__nuxt|___gatsby|svelte)["\'][^>]*>\s*</div>',
+    re.IGNORECASE
+)
+
+
+def title_from_url(url: str) -> str:
+    """Fallback page title: last URL path segment, or the domain."""
+    return urlparse(url).path.strip('/').split('/')[-1] or urlparse(url).netloc
+
+
+class _LinkExtractor(HTMLParser):
+    """Collects <title>, <base href>, <link rel=canonical> and <a href> values (noting nav/header links) from static HTML."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base_href: Optional[str] = None
+        self.canonical_href: Optional[str] = None
+        self.hrefs: List[str] = []
+        self.nav_hrefs: List[str] = []
+        self.title_parts: List[str] = []
+        self._in_title = False
+        self._nav_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a' or tag == 'base':
+            href = dict(attrs).get('href')
+            if href and tag == 'a':
+                self.hrefs.append(href)
+                if self._nav_depth:
+                    self.nav_hrefs.append(href)
+            elif href and self.base_href is None:
+                self.base_href = href
+        elif tag == 'link' and self.canonical_href is None:
+            attributes = dict(attrs)
+            if 'canonical' in (attributes.get('rel') or '').lower().split():
+                self.canonical_href = attributes.get('href')
+        elif tag == 'title':
+            self._in_title = True
+        elif tag in ('nav', 'header'):
+            self._nav_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif tag in ('nav', 'header') and self._nav_depth:
+            self._nav_depth -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+
+
+def extract_title_and_links(html_content: str, page_url: str) -> Tuple[str, List[str], List[str], Optional[str]]:
+    """
+    Extract the page title, absolute http(s) links, the subset in <nav>/<header>
+    and the absolute rel=canonical URL (if declared) from static HTML.
+    """
+    parser = _LinkExtractor()
+    try:
+        parser.feed(html_content)
+        parser.close()
+    except Exception as e:
+        logger.debug(f"HTML parse error for {page_url}: {e}")
+
+    base_url = urljoin(page_url, parser.base_href) if parser.base_href else page_url
+    links = [urljoin(base_url, href.strip()) for href in parser.hrefs]
+    nav_links = [urljoin(base_url, href.strip()) for href in parser.nav_hrefs]
+    canonical = urljoin(base_url, parser.canonical_href.strip()) if parser.canonical_href else None
+    title = ' '.join(''.join(parser.title_parts).split())
+    return (
+        title,
+        [link for link in links if link.startswith('http')],
+        [link for link in nav_links if link.startswith('http')],
+        canonical
+    )
+
+
+def needs_js_rendering(html_content: str, markdown: str, min_text_chars: int = 200) -> bool:
+    """
+    Heuristic: does server-delivered HTML need a browser to produce its content?
+
+    True for an empty SPA mount point, too little visible text, or very low
+    text density on a script-heavy page (content injected client-side).
+    """
+    if SPA_ROOT_PATTERN.search(html_content):
+        return True
+
+    # Visible text only: drop markdown link targets and whitespace
+    text = re.sub(r'\]\([^)]*\)', ']', markdown)
+    text_chars = len(re.sub(r'\s+', '', text))
+    if text_chars < min_text_chars:
+        return True
+
+    script_count = len(re.findall(r'<script\b', html_content, re.IGNORECASE))
+    return script_count >= 10 and text_chars / max(len(html_content), 1) < 0.01
+
+
+def html_to_markdown_task(html_content: str) -> str:
+    """Convert rendered page HTML to markdown."""
+    return new_html_converter().handle(html_content)
+
+
+def static_html_task(
+    html_content: str,
+    page_url: str,
+    min_text_chars: int
+) -> Optional[Tuple[str, str, List[str], List[str], Optional[str]]]:
+    """
+    Convert server-delivered HTML and extract its title and links.
+
+    Returns:
+        (markdown, title, links, nav_links, canonical), or None if the page needs JavaScript rendering
+    """
+    markdown = new_html_converter().handle(html_content)
+    if needs_js_rendering(html_content, markdown, min_text_chars):
+        return None
+    title, links, nav_links, canonical = extract_title_and_links(html_content, page_url)
+    return markdown, title, links, nav_links, canonical
+
+
+def chunk_markdown_task(
+    markdown: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Chunk markdown by embedding-model tokens, with each chunk's section info."""
+    return chunk_markdown(markdown, max_tokens, overlap_tokens)
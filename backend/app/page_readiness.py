@@ -0,0 +1,169 @@
+"""
+Adaptive page-readiness detection for the Playwright crawler.
+Instead of fixed sleeps, waits until the DOM stops mutating and the page text
+stops growing, and learns per domain which wait strategy produced content.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+from .config import settings
+from .crawl_cache import CrawlCache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Readiness strategies
+STRATEGY_QUIESCENCE = "quiescence"  # DOM mutation quiescence + text-growth stabilization
+STRATEGY_NETWORKIDLE = "networkidle"  # Wait for network idle first (content arrives after slow XHRs)
+
+# Resolves once no DOM mutations happened and innerText length stayed the same for quietMs.
+# Pages with little text must stay quiet 3x longer before they count as ready.
+READINESS_SCRIPT = """
+({ quietMs, maxMs, minText }) => new Promise(resolve => {
+    const start = performance.now();
+    let lastChange = start;
+    let lastLength = -1;
+    const root = document.documentElement || document;
+    const observer = new MutationObserver(() => { lastChange = performance.now(); });
+    observer.observe(root, { childList: true, subtree: true, characterData: true });
+
+    const tick = () => {
+        const now = performance.now();
+        const length = document.body ? document.body.innerText.length : 0;
+        if (length !== lastLength) {
+            lastLength = length;
+            lastChange = now;
+        }
+        const quiet = now - lastChange;
+        const ready = quiet >= quietMs && (length >= minText || quiet >= quietMs * 3);
+        const timedOut = now - start >= maxMs;
+        if (ready || timedOut) {
+            observer.disconnect();
+            resolve({ elapsedMs: now - start, textLength: length, timedOut: !ready });
+        } else {
+            setTimeout(tick, 50);
+        }
+    };
+    tick();
+})
+"""
+
+
+@dataclass
+class ReadinessProfile:
+    """What we learned about how pages on a domain become ready."""
+    domain: str
+    strategy: str = STRATEGY_QUIESCENCE
+    settle_ms: float = 0.0  # Moving average of time-to-ready
+    samples: int = 0
+    updated_at: float = 0.0
+
+
+class PageReadiness:
+    """
+    Waits for rendered pages to be ready and keeps per-domain readiness profiles.
+
+    Profiles live in memory and, when a crawl cache is given, are persisted in it
+    so the next crawl of a domain starts with the strategy that worked last time.
+    """
+
+    def __init__(self, crawl_cache: Optional[CrawlCache] = None):
+        self.crawl_cache = crawl_cache
+        self.quiet_ms = settings.readiness_quiet_ms
+        self.max_wait_ms = settings.readiness_max_wait_ms
+        self.min_text_chars = settings.readiness_min_text_chars
+        self._profiles: Dict[str, ReadinessProfile] = {}
+        self._lock = threading.Lock()
+
+    async def get_profile(self, domain: str) -> ReadinessProfile:
+        """Get the readiness profile for a domain (loaded from the crawl cache on first use)."""
+        with self._lock:
+            profile = self._profiles.get(domain)
+        if profile is not None:
+            return profile
+
+        stored = await asyncio.to_thread(self.crawl_cache.get_readiness_profile, domain) if self.crawl_cache else None
+        profile = ReadinessProfile(**stored) if stored else ReadinessProfile(domain=domain)
+        with self._lock:
+            return self._profiles.setdefault(domain, profile)
+
+    async def _record(self, profile: ReadinessProfile, strategy: str, elapsed_ms: float):
+        """Update a profile with the outcome of one page and persist it."""
+        with self._lock:
+            if strategy != profile.strategy:
+                logger.info(f"Readiness strategy for {profile.domain}: {profile.strategy} -> {strategy}")
+                profile.strategy = strategy
+                profile.samples = 0
+            # Exponential moving average, seeded by the first sample
+            profile.settle_ms = elapsed_ms if profile.samples == 0 else 0.8 * profile.settle_ms + 0.2 * elapsed_ms
+            profile.samples += 1
+            profile.updated_at = time.time()
+            snapshot = asdict(profile)
+
+        if self.crawl_cache:
+            await asyncio.to_thread(self.crawl_cache.put_readiness_profile, profile.domain, snapshot)
+
+    def _max_wait_ms(self, profile: ReadinessProfile) -> float:
+        """Cap the quiescence wait: generous for unknown domains, ~3x the usual settle time otherwise."""
+        if profile.samples == 0:
+            return self.max_wait_ms
+        return min(self.max_wait_ms, max(2000.0, profile.settle_ms * 3))
+
+    async def _wait_for_quiescence(self, page, max_wait_ms: float) -> Dict[str, Any]:
+        try:
+            return await page.evaluate(
+                READINESS_SCRIPT,
+                {"quietMs": self.quiet_ms, "maxMs": max_wait_ms, "minText": self.min_text_chars}
+            )
+        except Exception as e:
+            # Navigation during evaluation (client-side redirect) or closed page
+            logger.debug(f"Readiness check failed: {e}")
+            return {"elapsedMs": 0.0, "textLength": 0, "timedOut": True}
+
+    async def _wait_for_networkidle(self, page, timeout_ms: float):
+        try:
+            await page.wait_for_load_state('networkidle', timeout=timeout_ms)
+        except Exception:
+            pass  # Timeout is fine, some pages never fully stop loading
+
+    async def wait_until_ready(self, page, domain: str) -> Dict[str, Any]:
+        """
+        Wait until a page (navigated with wait_until='domcontentloaded') has rendered.
+
+        Uses the domain's learned strategy. If DOM quiescence yields too little text,
+        falls back to waiting for network idle and, when that produces the content,
+        remembers network idle as the strategy for the domain.
+
+        Returns:
+            Dictionary with elapsedMs, textLength, timedOut and strategy
+        """
+        profile = await self.get_profile(domain)
+        max_wait_ms = self._max_wait_ms(profile)
+        started = time.monotonic()
+
+        if profile.strategy == STRATEGY_NETWORKIDLE:
+            await self._wait_for_networkidle(page, max_wait_ms)
+            result = await self._wait_for_quiescence(page, max_wait_ms)
+            strategy = STRATEGY_NETWORKIDLE
+        else:
+            result = await self._wait_for_quiescence(page, max_wait_ms)
+            strategy = STRATEGY_QUIESCENCE
+            if result["textLength"] < self.min_text_chars:
+                # Content may still be loading behind slow requests between mutations
+                await self._wait_for_networkidle(page, max_wait_ms)
+                retry = await self._wait_for_quiescence(page, max_wait_ms)
+                if retry["textLength"] >= self.min_text_chars:
+                    strategy = STRATEGY_NETWORKIDLE
+                result = retry
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        await self._record(profile, strategy, elapsed_ms)
+        result["strategy"] = strategy
+        result["elapsedMs"] = elapsed_ms
+        return result
@@ -0,0 +1,54 @@
+"""
+PDF text extraction for uploaded documents, split into page ranges.
+The *_task functions run in CPU pool worker processes (see cpu_pool), so a
+large PDF is extracted on several cores at once instead of one GIL-bound thread.
+"""
+
+import logging
+from typing import List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Try to import PDF parsing libraries
+try:
+    import PyPDF2
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+    logger.warning("PyPDF2 not available. PDF parsing will be disabled.")
+
+try:
+    import pdfplumber
+    PDFPLUMBER_AVAILABLE = True
+except ImportError:
+    PDFPLUMBER_AVAILABLE = False
+    logger.warning("pdfplumber not available. Advanced PDF parsing will be disabled.")
+
+
+def pdf_page_count(file_path: str) -> int:
+    """Number of pages in a PDF (PyPDF2 only reads the page tree, so prefer it here)."""
+    if PDF_AVAILABLE:
+        return len(PyPDF2.PdfReader(file_path).pages)
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_pages_task(file_path: str, start: int = 0, end: Optional[int] = None) -> List[str]:
+    """
+    Extract the text of pages [start, end) of a PDF, in page order.
+    Uses pdfplumber (better text extraction) when available, else PyPDF2.
+    """
+    if PDFPLUMBER_AVAILABLE:
+        text_parts = []
+        with pdfplumber.open(file_path) as pdf:
+            for page in pdf.pages[start:end]:
+                page_text = page.extract_text()
+                if page_text:
+                    text_parts.append(page_text)
+                page.close()  # Drop the page's parsed objects; long ranges would otherwise keep them all
+        return text_parts
+
+    pdf_reader = PyPDF2.PdfReader(file_path)
+    return [page.extract_text() or "" for page in pdf_reader.pages[start:end]]
@@ -4,30 +4,77 @@ This service handles ChromaDB operations and AI model interactions.
 """
 
 import os
+import re
+import time
 import asyncio
-from typing import Optional, Dict, Any, List, Callable
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Set, Callable, AsyncIterator
 import logging
 
-from .utils import get_chroma_client, get_or_create_collection, add_documents_to_collection, collection_exists
+from .config import settings
+from .utils import (
+    get_chroma_client, get_or_create_collection, add_documents_to_collection, collection_exists,
+    get_collection_ids, delete_documents_from_collection, copy_documents_between_collections
+)
 from .scraper import WebsiteScraper
-from .document_parser import DocumentParser
-from .llm_service import ModelLoader, RAG_Bot_Local
+from .crawl_cache import get_crawl_cache
+from .build_checkpoint import get_build_checkpoints
+from .ingest_pipeline import WebsiteIngestPipeline
+from .document_parser import DocumentParser, FILE_CHUNK_PREFIX, LEGACY_FILE_CHUNK_PREFIX, file_chunk_source
+from .llm_service import ModelLoader, RAG_Bot_Local, PROMPT_VERSION, ERROR_RESPONSE_PREFIX, StreamError
+from .semantic_cache import semantic_answer_cache
+from .response_cache import response_cache
+from .embedding_service import ensure_model_downloaded
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Versioned collections for blue/green rebuilds: "<base>_v<build timestamp in ms>". Only the
+# 13-digit millisecond timestamps versioned_collection_name writes (until 2286) match, so a
+# legacy company-derived name that happens to end in "_v<digits>" stays unversioned.
+COLLECTION_VERSION_PATTERN = re.compile(r'^(?P<base>.+)_v(?P<version>\d{13})$')
+
+# Uploaded-file chunks are written to the collection in batches of this many as files stream in
+DOCUMENT_WRITE_BATCH_SIZE = 500
+
+
+def base_collection_name(collection_name: str) -> str:
+    """Strip the version suffix from a collection name."""
+    match = COLLECTION_VERSION_PATTERN.match(collection_name)
+    return match.group('base') if match else collection_name
+
+
+def collection_version(collection_name: str) -> int:
+    """Get the version of a collection name (0 for unversioned legacy collections)."""
+    match = COLLECTION_VERSION_PATTERN.match(collection_name)
+    return int(match.group('version')) if match else 0
+
+
+def versioned_collection_name(base_name: str) -> str:
+    """Build a new, monotonically increasing version name for a base collection."""
+    return f"{base_name}_v{time.time_ns() // 1_000_000}"
+
+
+# Process-wide cache of RAG bots keyed by (db_directory, collection_name).
+# Shared by every RAGService instance so routers reuse the same collection handles.
+_rag_bot_cache: "OrderedDict[tuple, RAG_Bot_Local]" = OrderedDict()
+_rag_bot_cache_lock = threading.Lock()
+
+
 class RAGService:
     """
     RAG Service for managing ChromaDB collections and AI interactions.
     Full implementation with website scraping and local LLM integration.
     """
     
-    def __init__(self, db_directory: str = "./chroma_db"):
+    def __init__(self, db_directory: str = "./chroma_db", max_cached_bots: Optional[int] = None):
         self.db_directory = db_directory
         self.client = None
         self.collections = {}
         self.model_loader = None
+        self.max_cached_bots = max_cached_bots or settings.rag_bot_cache_size
         
         try:
             # Ensure ChromaDB directory exists
@@ -64,6 +111,82 @@ class RAGService:
             logger.error(f"Error getting collection '{collection_name}': {e}")
             raise
     
+    def get_cached_rag_bot(self, collection_name: str) -> Optional[RAG_Bot_Local]:
+        """
+        Get the cached RAG bot for the collection without creating one.
+        """
+        key = (os.path.abspath(self.db_directory), collection_name)
+        with _rag_bot_cache_lock:
+            rag_bot = _rag_bot_cache.get(key)
+            if rag_bot is not None:
+                _rag_bot_cache.move_to_end(key)
+            return rag_bot
+    
+    def get_rag_bot(self, collection_name: str) -> RAG_Bot_Local:
+        """
+        Get a cached RAG bot for the collection, creating it on first use.
+        Least recently used bots are evicted once the cache is full.
+        """
+        rag_bot = self.get_cached_rag_bot(collection_name)
+        if rag_bot is not None:
+            return rag_bot
+        
+        key = (os.path.abspath(self.db_directory), collection_name)
+        
+        # Build outside the lock - opening a collection can be slow
+        rag_bot = RAG_Bot_Local(
+            collection_name=collection_name,
+            gemini_model=self.model_loader.get_model(),
+            db_directory=self.db_directory
+        )
+        logger.info(f"   🎯 RAG bot created for collection: '{collection_name}'")
+        
+        with _rag_bot_cache_lock:
+            # Another request may have created it concurrently - keep the first one
+            existing = _rag_bot_cache.get(key)
+            if existing is not None:
+                _rag_bot_cache.move_to_end(key)
+                return existing
+            _rag_bot_cache[key] = rag_bot
+            while len(_rag_bot_cache) > self.max_cached_bots:
+                evicted_key, _ = _rag_bot_cache.popitem(last=False)
+                logger.info(f"Evicted cached RAG bot for collection '{evicted_key[1]}'")
+        
+        return rag_bot
+    
+    def invalidate_collection(self, collection_name: str):
+        """
+        Drop the cached RAG bot and cached answers for a collection.
+        Must be called whenever the collection is deleted, recreated or its content changes.
+        """
+        key = (os.path.abspath(self.db_directory), collection_name)
+        with _rag_bot_cache_lock:
+            if _rag_bot_cache.pop(key, None) is not None:
+                logger.info(f"Invalidated cached RAG bot for collection '{collection_name}'")
+        self.invalidate_answers(collection_name)
+    
+    def invalidate_answers(self, collection_name: str):
+        """
+        Drop cached answers (exact-match and semantic) for a collection.
+        """
+        semantic_answer_cache.invalidate(collection_name)
+        response_cache.invalidate(collection_name)
+    
+    def _response_cache_key(self, collection_name: str, query: str, n_results: int) -> Optional[str]:
+        """Exact-match cache key for a request, or None if the response cache is disabled."""
+        if not settings.response_cache_enabled:
+            return None
+        return response_cache.make_key(collection_name, query, n_results, PROMPT_VERSION)
+    
+    def _is_cacheable(self, response: str) -> bool:
+        """Only real model answers are cached - never errors or mock responses."""
+        return bool(
+            response
+            and not response.startswith(ERROR_RESPONSE_PREFIX)
+            and self.model_loader is not None
+            and self.model_loader.get_client() is not None
+        )
+    
     def get_response(self, collection_name: str, query: str, n_results: int = 5) -> str:
         """
         Get AI response for a query using the specified collection.
@@ -82,52 +205,205 @@ class RAGService:
                     logger.error(f"Failed to initialize ModelLoader: {e}")
                     return "I apologize, but the AI service is not properly configured. Please check the Google API key configuration."
             
-            # Get the Gemini model
-            gemini_model = self.model_loader.get_model()
-            logger.info(f"   🤖 Gemini model loaded: {type(gemini_model)}")
+            # Exact-match response cache
+            cache_key = self._response_cache_key(collection_name, query, n_results)
+            if cache_key:
+                cached = response_cache.get(collection_name, cache_key)
+                if cached is not None:
+                    logger.info(f"   ⚡ Response cache hit")
+                    return cached
             
-            # Create RAG bot for this collection
-            rag_bot = RAG_Bot_Local(
-                collection_name=collection_name,
-                gemini_model=gemini_model,
-                db_directory=self.db_directory
-            )
-            logger.info(f"   🎯 RAG bot created for collection: '{collection_name}'")
+            # Get (or create) the cached RAG bot for this collection
+            rag_bot = self.get_rag_bot(collection_name)
             
             # Get AI response
             response = rag_bot.answer(query, n_results=n_results)
             logger.info(f"   ✅ RAG response generated successfully")
             
+            if cache_key and self._is_cacheable(response):
+                response_cache.set(collection_name, cache_key, response)
+            
             return response
             
         except Exception as e:
             logger.error(f"❌ RAG SERVICE ERROR: {e}")
             return f"I apologize, but I encountered an error while processing your question: {str(e)}"
     
+    async def get_response_async(self, collection_name: str, query: str, n_results: int = 5) -> str:
+        """
+        Get AI response for a query without blocking the event loop.
+        Chroma work runs in worker threads and Gemini is called via its async client.
+        """
+        try:
+            logger.info(f"🔧 RAG SERVICE - Getting async response for collection: '{collection_name}'")
+            logger.info(f"   📝 Query: '{query}'")
+            logger.info(f"   📊 n_results: {n_results}")
+            
+            # Check if model loader is available
+            if not self.model_loader:
+                logger.warning("ModelLoader not initialized, attempting to initialize now...")
+                try:
+                    self.model_loader = ModelLoader()
+                except Exception as e:
+                    logger.error(f"Failed to initialize ModelLoader: {e}")
+                    return "I apologize, but the AI service is not properly configured. Please check the Google API key configuration."
+            
+            # Exact-match response cache
+            cache_key = self._response_cache_key(collection_name, query, n_results)
+            if cache_key:
+                cached = await response_cache.get_async(collection_name, cache_key)
+                if cached is not None:
+                    logger.info(f"   ⚡ Response cache hit")
+                    return cached
+            
+            # Cache hits are cheap; only opening a new collection goes to a worker thread
+            rag_bot = self.get_cached_rag_bot(collection_name)
+            if rag_bot is None:
+                rag_bot = await asyncio.to_thread(self.get_rag_bot, collection_name)
+            
+            # Get AI response
+            response = await rag_bot.answer_async(query, n_results=n_results)
+            logger.info(f"   ✅ RAG response generated successfully")
+            
+            if cache_key and self._is_cacheable(response):
+                await response_cache.set_async(collection_name, cache_key, response)
+            
+            return response
+            
+        except Exception as e:
+            logger.error(f"❌ RAG SERVICE ERROR: {e}")
+            return f"I apologize, but I encountered an error while processing your question: {str(e)}"
+    
+    async def stream_response_async(self, collection_name: str, query: str, n_results: int = 5) -> AsyncIterator[str]:
+        """
+        Stream the AI response for a query as text deltas.
+        """
+        try:
+            logger.info(f"🔧 RAG SERVICE - Streaming response for collection: '{collection_name}'")
+            logger.info(f"   📝 Query: '{query}'")
+            
+            # Check if model loader is available
+            if not self.model_loader:
+                logger.warning("ModelLoader not initialized, attempting to initialize now...")
+                try:
+                    self.model_loader = ModelLoader()
+                except Exception as e:
+                    logger.error(f"Failed to initialize ModelLoader: {e}")
+                    yield "I apologize, but the AI service is not properly configured. Please check the Google API key configuration."
+                    return
+            
+            # Exact-match response cache - a hit is sent as a single delta
+            cache_key = self._response_cache_key(collection_name, query, n_results)
+            if cache_key:
+                cached = await response_cache.get_async(collection_name, cache_key)
+                if cached is not None:
+                    logger.info(f"   ⚡ Response cache hit")
+                    yield cached
+                    return
+            
+            rag_bot = self.get_cached_rag_bot(collection_name)
+            if rag_bot is None:
+                rag_bot = await asyncio.to_thread(self.get_rag_bot, collection_name)
+            
+            response_parts = []
+            failed = False
+            async for delta in rag_bot.answer_stream_async(query, n_results=n_results):
+                # A stream that failed partway ends with an apology after partial text - never cache it
+                failed = failed or isinstance(delta, StreamError)
+                response_parts.append(delta)
+                yield delta
+            
+            response = "".join(response_parts).strip()
+            if cache_key and not failed and self._is_cacheable(response):
+                await response_cache.set_async(collection_name, cache_key, response)
+            
+        except Exception as e:
+            logger.error(f"❌ RAG SERVICE STREAM ERROR: {e}")
+            yield f"I apologize, but I encountered an error while processing your question: {str(e)}"
+    
     def delete_collection(self, collection_name: str):
         """
         Delete a ChromaDB collection.
         """
         try:
+            self.invalidate_collection(collection_name)
             self.client.delete_collection(collection_name)
             logger.info(f"Collection '{collection_name}' deleted successfully")
         except Exception as e:
             logger.error(f"Error deleting collection '{collection_name}': {e}")
             raise
     
+    def delete_file_chunks(self, collection_name: str, file_path: str):
+        """
+        Remove an uploaded file's chunks from a collection (the file was deleted or replaced).
+        """
+        if not collection_exists(self.client, collection_name):
+            return
+        collection = self.get_collection(collection_name)
+        collection.delete(where={"source": file_chunk_source(file_path)})
+        self.invalidate_answers(collection_name)
+        logger.info(f"Deleted chunks of '{file_path}' from collection '{collection_name}'")
+    
+    async def _apply_incremental_update(
+        self,
+        collection,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        existing_ids: Set[str],
+        stale_ids: List[str]
+    ) -> Dict[str, int]:
+        """
+        Add chunks whose IDs are not yet in the collection, then delete stale IDs.
+        New chunks are written before stale ones are removed so the collection is never empty.
+        
+        Returns:
+            Counts of added, unchanged and removed chunks
+        """
+        new_indices = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing_ids]
+        
+        if new_indices:
+            await add_documents_to_collection(
+                collection=collection,
+                ids=[ids[i] for i in new_indices],
+                documents=[documents[i] for i in new_indices],
+                metadatas=[metadatas[i] for i in new_indices],
+                batch_size=100
+            )
+        
+        if stale_ids:
+            await delete_documents_from_collection(collection, stale_ids)
+        
+        if new_indices or stale_ids:
+            # Content changed - cached answers may be stale
+            self.invalidate_answers(collection.name)
+        
+        return {
+            "added": len(new_indices),
+            "unchanged": len(ids) - len(new_indices),
+            "removed": len(stale_ids)
+        }
+    
     async def scrape_website(
         self, 
         urls: List[str], 
         collection_name: str,
-        progress_callback: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None
+        progress_callback: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None,
+        file_sources: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
-        Scrape website URLs and populate the ChromaDB collection.
+        Scrape website URLs into a new version of the ChromaDB collection.
+        
+        The live collection is left untouched; on success the returned "collection_name"
+        is the new version, which the caller should make live and then pass to
+        garbage_collect_collections.
         
         Args:
             urls: List of URLs to scrape
-            collection_name: Name of the ChromaDB collection
+            collection_name: Name of the live ChromaDB collection (or the base name on first build)
             progress_callback: Optional callback function(message, details) for progress updates
+            file_sources: file_chunk_source of each current knowledge-base file; only these
+                files' chunks are carried into the new version (None carries every file chunk)
         """
         try:
             if progress_callback:
@@ -135,8 +411,17 @@ class RAGService:
             
             logger.info(f"Starting website scraping for collection '{collection_name}' with {len(urls)} URLs")
             
+            # Chunks are sized with the embedding model's tokenizer, which must be on disk before any chunking
+            await asyncio.to_thread(ensure_model_downloaded)
+            
             # Initialize scraper
-            scraper = WebsiteScraper(chunk_size=1000, max_depth=3, max_concurrent=5)
+            scraper = WebsiteScraper(
+                chunk_size=settings.chunk_max_tokens,
+                chunk_overlap=settings.chunk_overlap_tokens,
+                max_depth=3,
+                max_concurrent=5,
+                crawl_cache=get_crawl_cache()
+            )
             
             # Create progress callback wrapper for scraper
             def scraper_progress_callback(url: str, url_index: int, url_total: int):
@@ -155,79 +440,123 @@ class RAGService:
                         }
                     )
             
-            # Scrape URLs
-            scrape_results = await scraper.scrape_urls(urls, progress_callback=scraper_progress_callback)
-            
-            if not scrape_results:
-                logger.warning("No content was scraped from the provided URLs")
-                return {
-                    "status": "warning",
-                    "message": "No content was found to scrape",
-                    "documents_added": 0,
-                    "urls_processed": len(urls),
-                    "collection_name": collection_name
-                }
-            
-            # Process content for ChromaDB
-            if progress_callback:
-                progress_callback("Organizing content...", {"step": "chunking", "pages_found": len(scrape_results)})
+            # Blue/green build: write into a new versioned shadow collection while the live
+            # one keeps serving chats. Callers flip Company.ai_collection_name to the returned
+            # collection_name once the build completes.
+            # A build of the same URLs interrupted by a restart is resumed into its shadow
+            # collection from the crawl checkpoint instead of starting over.
+            checkpoints = get_build_checkpoints()
+            previous = await asyncio.to_thread(checkpoints.get_build, collection_name) if checkpoints else None
+            target_ids: Set[str] = set()
+            if previous and previous.urls == urls and collection_exists(self.client, previous.shadow_name):
+                shadow_name = previous.shadow_name
+                shadow = self.get_collection(shadow_name)
+                target_ids = await asyncio.to_thread(get_collection_ids, shadow)
+                checkpoint = checkpoints.resume_build(collection_name)
+                logger.info(f"Resuming interrupted build into '{shadow_name}' ({len(target_ids)} chunks already written)")
+            else:
+                shadow_name = versioned_collection_name(base_collection_name(collection_name))
+                shadow = self.get_collection(shadow_name)
+                checkpoint = checkpoints.start_build(collection_name, shadow_name, urls) if checkpoints else None
             
-            ids, documents, metadatas = scraper.process_content_for_chromadb(scrape_results)
-
-            # Check if chunking produced any documents
-            if not documents:
-                logger.warning(f"⚠️ Scraper found {len(scrape_results)} pages but chunking produced 0 documents!")
+            try:
+                live_ids: Set[str] = set()
+                live = None
+                if collection_exists(self.client, collection_name):
+                    live = self.get_collection(collection_name)
+                    live_ids = await asyncio.to_thread(get_collection_ids, live)
+                
+                # Pages stream through chunking/embedding/writing while the crawl is still running.
+                # Chunk IDs are derived from (source URL, content hash): unchanged chunks are copied
+                # with their embeddings, only new/changed chunks are embedded.
+                pipeline = WebsiteIngestPipeline(
+                    scraper,
+                    target=shadow,
+                    source=live,
+                    source_ids=live_ids,
+                    progress_callback=progress_callback,
+                    checkpoint=checkpoint,
+                    target_ids=target_ids
+                )
+                stats = await pipeline.run(urls, scraper_progress_callback)
+                
+                # Uploaded-file chunks are carried over as-is (process_documents manages them),
+                # except those of files no longer in the knowledge base
+                if file_sources is None:
+                    file_ids = [
+                        chunk_id for chunk_id in live_ids
+                        if chunk_id.startswith(FILE_CHUNK_PREFIX + "-") and chunk_id not in stats.chunk_ids
+                    ]
+                elif file_sources and live is not None:
+                    current_file_ids = await asyncio.to_thread(
+                        get_collection_ids, live, where={"source": {"$in": list(file_sources)}}
+                    )
+                    file_ids = [chunk_id for chunk_id in current_file_ids if chunk_id not in stats.chunk_ids]
+                else:
+                    file_ids = []
+                files_to_copy = [chunk_id for chunk_id in file_ids if chunk_id not in target_ids]
+                if files_to_copy and stats.chunks:
+                    await copy_documents_between_collections(live, shadow, files_to_copy)
+            except Exception:
+                # Never leave half-built shadow collections behind (a process restart skips
+                # this, leaving the shadow and its checkpoint for the resumed build)
+                try:
+                    self.delete_collection(shadow_name)
+                except Exception:
+                    pass  # Already logged by delete_collection
+                if checkpoints:
+                    checkpoints.clear_build(collection_name)
+                raise
+            
+            if checkpoints:
+                checkpoints.clear_build(collection_name)
+            
+            if not stats.chunks:
+                self.delete_collection(shadow_name)
+                
+                if not stats.pages:
+                    logger.warning("No content was scraped from the provided URLs")
+                    return {
+                        "status": "warning",
+                        "message": "No content was found to scrape",
+                        "documents_added": 0,
+                        "urls_processed": len(urls),
+                        "collection_name": collection_name
+                    }
+                
+                logger.warning(f"⚠️ Scraper found {stats.pages} pages but chunking produced 0 documents!")
                 logger.warning("This likely indicates a bug in the chunking logic.")
                 # Log the raw scrape results for debugging
-                for result in scrape_results[:3]:  # Log first 3
+                for result in stats.sample_pages:
                     logger.warning(f"   Page: {result.get('url')}")
                     logger.warning(f"   Title: {result.get('title')}")
-                    logger.warning(f"   Markdown length: {len(result.get('markdown', ''))}")
-                    logger.warning(f"   Markdown preview: {result.get('markdown', '')[:200]}")
+                    logger.warning(f"   Markdown length: {result.get('markdown_length')}")
+                    logger.warning(f"   Markdown preview: {result.get('markdown')}")
                 return {
                     "status": "warning",
-                    "message": f"Found {len(scrape_results)} pages but could not extract text chunks",
+                    "message": f"Found {stats.pages} pages but could not extract text chunks",
                     "documents_added": 0,
                     "urls_processed": len(urls),
                     "collection_name": collection_name
                 }
-
-            # Delete and recreate collection to clear old documents
-            try:
-                self.client.delete_collection(collection_name)
-                logger.info(f"✅ Cleared existing collection '{collection_name}'")
-            except ValueError as e:
-                # Collection doesn't exist - this is fine
-                logger.info(f"Collection '{collection_name}' doesn't exist yet, creating new")
-            except Exception as e:
-                # Log other errors but continue
-                logger.warning(f"⚠️ Error deleting collection '{collection_name}': {e}")
-
-            collection = self.get_collection(collection_name)
-
-            # Add documents to collection
-            if progress_callback:
-                progress_callback(
-                    f"Saving {len(documents)} chunks to knowledge base...",
-                    {"step": "adding_to_db", "chunks_count": len(documents)}
-                )
             
-            await add_documents_to_collection(
-                collection=collection,
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas,
-                batch_size=100
-            )
+            removed = len(live_ids) - stats.unchanged - len(file_ids)
             
-            logger.info(f"Successfully added {len(documents)} documents to collection '{collection_name}'")
+            logger.info(
+                f"Built collection '{shadow_name}' (replacing '{collection_name}'): "
+                f"{stats.added} added, {stats.unchanged} unchanged, {removed} removed"
+            )
             
             return {
                 "status": "success",
-                "documents_added": len(documents),
+                "documents_added": stats.added,
+                "documents_unchanged": stats.unchanged,
+                "documents_removed": removed,
                 "urls_processed": len(urls),
-                "collection_name": collection_name,
-                "chunks_created": len(documents)
+                "collection_name": shadow_name,
+                "previous_collection_name": collection_name,
+                "chunks_created": stats.chunks,
+                "duplicate_chunks_skipped": stats.duplicates
             }
             
         except Exception as e:
@@ -240,6 +569,37 @@ class RAGService:
                 "collection_name": collection_name
             }
     
+    def garbage_collect_collections(self, live_collection_name: str, keep: Optional[int] = None) -> List[str]:
+        """
+        Delete old versions of a collection after a blue/green swap.
+        The live version and the newest `keep` versions are retained, so chats that
+        started just before the swap can still finish against the previous version.
+        
+        Returns:
+            Names of the deleted collections
+        """
+        keep = keep or settings.collection_versions_to_keep
+        base = base_collection_name(live_collection_name)
+        versions = sorted(
+            (name for name in self.list_collections() if base_collection_name(name) == base),
+            key=collection_version,
+            reverse=True
+        )
+        
+        deleted = []
+        for name in versions[keep:]:
+            if name == live_collection_name:
+                continue
+            try:
+                self.delete_collection(name)
+                deleted.append(name)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not garbage collect collection '{name}': {e}")
+        
+        if deleted:
+            logger.info(f"Garbage collected {len(deleted)} old versions of '{base}': {deleted}")
+        return deleted
+    
     def get_collection_info(self, collection_name: str) -> Dict[str, Any]:
         """
         Get information about a specific collection.
@@ -316,13 +676,65 @@ class RAGService:
             
             logger.info(f"Starting document processing for collection '{collection_name}' with {len(file_paths)} files")
             
+            # Chunks are sized with the embedding model's tokenizer, which must be on disk before any chunking
+            await asyncio.to_thread(ensure_model_downloaded)
+            
             # Initialize document parser
-            parser = DocumentParser(chunk_size=1000, max_concurrent=5)
+            parser = DocumentParser(
+                chunk_size=settings.chunk_max_tokens,
+                max_concurrent=5,
+                chunk_overlap=settings.chunk_overlap_tokens
+            )
             
-            # Parse documents in parallel
-            parse_results = await parser.parse_files(file_paths, file_types, filenames)
+            # Get or create collection
+            collection = self.get_collection(collection_name)
+            existing_ids = await asyncio.to_thread(get_collection_ids, collection)
+            
+            # Chunks stored under the old sequential ID scheme are replaced by content-hashed IDs
+            stale_ids = [chunk_id for chunk_id in existing_ids if chunk_id.startswith(LEGACY_FILE_CHUNK_PREFIX)]
+            
+            if progress_callback:
+                progress_callback(
+                    "Organizing document content...",
+                    {"step": "chunking_files", "file_count": len(file_paths)}
+                )
             
-            if not parse_results:
+            # Files are parsed and chunked as streams; chunks are written in batches as they arrive
+            chunks_created = added = unchanged = 0
+            ids, documents, metadatas = [], [], []
+            produced_ids: Dict[str, Set[str]] = {}  # Source -> chunk IDs produced in this run
+            initial_ids = set(existing_ids)
+            
+            async def flush():
+                nonlocal added, unchanged
+                update = await self._apply_incremental_update(
+                    collection, ids, documents, metadatas, existing_ids, []
+                )
+                existing_ids.update(ids)
+                added += update["added"]
+                unchanged += update["unchanged"]
+                ids.clear()
+                documents.clear()
+                metadatas.clear()
+                if progress_callback:
+                    progress_callback(
+                        f"Saving {chunks_created} document chunks to knowledge base...",
+                        {"step": "adding_files_to_db", "chunks_count": chunks_created}
+                    )
+            
+            async for batch_ids, batch_documents, batch_metadatas in parser.iter_chunks(file_paths, file_types, filenames):
+                ids.extend(batch_ids)
+                documents.extend(batch_documents)
+                metadatas.extend(batch_metadatas)
+                for chunk_id, metadata in zip(batch_ids, batch_metadatas):
+                    produced_ids.setdefault(metadata["source"], set()).add(chunk_id)
+                chunks_created += len(batch_ids)
+                if len(ids) >= DOCUMENT_WRITE_BATCH_SIZE:
+                    await flush()
+            if ids:
+                await flush()
+            
+            if not chunks_created:
                 logger.warning("No content was extracted from the provided files")
                 return {
                     "status": "warning",
@@ -332,41 +744,37 @@ class RAGService:
                     "collection_name": collection_name
                 }
             
-            # Process content for ChromaDB
-            if progress_callback:
-                progress_callback(
-                    "Organizing document content...",
-                    {"step": "chunking_files", "files_processed": len(parse_results)}
-                )
-            
-            ids, documents, metadatas = parser.process_content_for_chromadb(parse_results)
-            
-            # Get or create collection
-            collection = self.get_collection(collection_name)
-            
-            # Add documents to collection
-            if progress_callback:
-                progress_callback(
-                    f"Saving {len(documents)} document chunks to knowledge base...",
-                    {"step": "adding_files_to_db", "chunks_count": len(documents)}
+            # Each fully parsed file replaces its previous chunks (content or chunking changed)
+            if parser.parsed_sources:
+                previous_ids = await asyncio.to_thread(
+                    get_collection_ids, collection, where={"source": {"$in": parser.parsed_sources}}
                 )
-            
-            await add_documents_to_collection(
-                collection=collection,
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas,
-                batch_size=100
+                stale_ids = list(set(stale_ids) | (previous_ids - set().union(*produced_ids.values())))
+            
+            # A file that failed partway adds nothing (its chunks from earlier runs are kept)
+            partial_ids = [
+                chunk_id for source in parser.failed_sources
+                for chunk_id in produced_ids.get(source, ()) if chunk_id not in initial_ids
+            ]
+            if partial_ids:
+                logger.warning(f"Removing {len(partial_ids)} chunks of files that failed partway through parsing")
+                stale_ids = list(set(stale_ids) | set(partial_ids))
+                added -= len(partial_ids)
+            
+            if stale_ids:
+                await self._apply_incremental_update(collection, [], [], [], existing_ids, stale_ids)
+            
+            logger.info(
+                f"Successfully added {added} document chunks to collection '{collection_name}' "
+                f"({unchanged} already indexed)"
             )
             
-            logger.info(f"Successfully added {len(documents)} document chunks to collection '{collection_name}'")
-            
             return {
                 "status": "success",
-                "documents_added": len(documents),
+                "documents_added": added,
                 "files_processed": len(file_paths),
                 "collection_name": collection_name,
-                "chunks_created": len(documents)
+                "chunks_created": chunks_created
             }
             
         except Exception as e:
@@ -0,0 +1,150 @@
+"""
+Request interception for the Playwright crawler.
+Blocks heavy or useless sub-resources (images, media, fonts, analytics/ad hosts,
+oversized assets) on crawler pages and keeps per-build statistics.
+"""
+
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set
+from urllib.parse import urlparse
+
+from .config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Analytics, tag managers, ads, session recording and chat widgets: never page content
+DEFAULT_BLOCKED_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com",
+    "googlesyndication.com", "doubleclick.net", "adservice.google.com",
+    "connect.facebook.net", "facebook.net", "analytics.twitter.com", "ads-twitter.com",
+    "snap.licdn.com", "bat.bing.com", "clarity.ms", "hotjar.com", "fullstory.com",
+    "mouseflow.com", "segment.com", "segment.io", "mixpanel.com", "amplitude.com",
+    "heap.io", "intercom.io", "intercomcdn.com", "drift.com", "hs-analytics.net",
+    "hs-scripts.com", "js-agent.newrelic.com", "nr-data.net", "criteo.com",
+    "criteo.net", "taboola.com", "outbrain.com", "adnxs.com", "quantserve.com",
+    "scorecardresearch.com", "crazyegg.com", "optimizely.com",
+)
+
+# Rough typical transfer sizes per resource type, used to estimate bytes saved
+# for blocked requests whose size we never see
+TYPICAL_RESOURCE_BYTES = {
+    "image": 30_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 30_000,
+    "stylesheet": 20_000,
+}
+DEFAULT_RESOURCE_BYTES = 10_000
+
+
+def parse_list_setting(value: Optional[str]) -> Set[str]:
+    """Parse a comma-separated setting into a set of lowercase items."""
+    return {item.strip().lower() for item in (value or "").split(",") if item.strip()}
+
+
+@dataclass
+class ResourceFilterStats:
+    """Per-build request statistics."""
+    requests_allowed: int = 0
+    requests_blocked: int = 0
+    blocked_by_reason: Counter = field(default_factory=Counter)
+    bytes_loaded: int = 0  # Content-Length of allowed responses (when sent)
+    bytes_saved_estimate: int = 0
+
+    def summary(self) -> str:
+        reasons = ", ".join(f"{reason}={count}" for reason, count in self.blocked_by_reason.most_common())
+        return (
+            f"{self.requests_blocked} requests blocked ({reasons or 'none'}), "
+            f"{self.requests_allowed} allowed, "
+            f"{self.bytes_loaded / 1_000_000:.1f} MB loaded, "
+            f"~{self.bytes_saved_estimate / 1_000_000:.1f} MB saved"
+        )
+
+
+class ResourceFilter:
+    """
+    Blocks sub-resources on Playwright pages by resource type,
+    domain blocklist and size. Documents (the pages themselves) are never blocked.
+
+    Size filtering is learned: an asset whose Content-Length exceeds max_resource_bytes
+    is blocked on every later request during the build.
+    """
+
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = ("image", "media", "font"),
+        blocked_domains: Iterable[str] = DEFAULT_BLOCKED_DOMAINS,
+        max_resource_bytes: int = 2_000_000
+    ):
+        self.blocked_types = set(blocked_types)
+        self.blocked_domains = {domain.lower() for domain in blocked_domains}
+        self.max_resource_bytes = max_resource_bytes
+        self.oversized: Dict[str, int] = {}  # url -> observed size
+        self.stats = ResourceFilterStats()
+
+    @classmethod
+    def from_settings(cls) -> "ResourceFilter":
+        """Build a filter from the crawl_block_* settings."""
+        return cls(
+            blocked_types=parse_list_setting(settings.crawl_block_resource_types),
+            blocked_domains=set(DEFAULT_BLOCKED_DOMAINS) | parse_list_setting(settings.crawl_block_domains),
+            max_resource_bytes=settings.crawl_max_resource_bytes
+        )
+
+    def _is_blocked_domain(self, url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        while host:
+            if host in self.blocked_domains:
+                return True
+            host = host.partition(".")[2]
+        return False
+
+    def block_reason(self, url: str, resource_type: str) -> Optional[str]:
+        """Return why a request should be blocked, or None to let it through."""
+        if resource_type == "document":
+            return None
+        if resource_type in self.blocked_types:
+            return resource_type
+        if self._is_blocked_domain(url):
+            return "domain"
+        if url in self.oversized:
+            return "size"
+        return None
+
+    async def _handle_route(self, route):
+        request = route.request
+        reason = self.block_reason(request.url, request.resource_type)
+        try:
+            if reason is None:
+                self.stats.requests_allowed += 1
+                await route.continue_()
+                return
+
+            self.stats.requests_blocked += 1
+            self.stats.blocked_by_reason[reason] += 1
+            self.stats.bytes_saved_estimate += self.oversized.get(
+                request.url,
+                TYPICAL_RESOURCE_BYTES.get(request.resource_type, DEFAULT_RESOURCE_BYTES)
+            )
+            await route.abort()
+        except Exception as e:
+            # Page closed while the request was in flight
+            logger.debug(f"Route handling failed for {request.url}: {e}")
+
+    def _handle_response(self, response):
+        try:
+            size = int(response.headers.get("content-length", 0))
+        except ValueError:
+            return
+        self.stats.bytes_loaded += size
+        if size > self.max_resource_bytes and response.request.resource_type != "document":
+            self.oversized[response.url] = size
+
+    async def attach(self, target):
+        """Install the filter on a Playwright Page (or BrowserContext)."""
+        await target.route("**/*", self._handle_route)
+        target.on("response", self._handle_response)
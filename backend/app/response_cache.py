@@ -0,0 +1,276 @@
+"""
+Exact-match response cache for AI Chat Backend.
+Caches RAG responses keyed on (collection name, normalized query, n_results, prompt version)
+in an in-process LRU tier, optionally backed by a shared tier (SQLite file or Redis)
+so multiple uvicorn workers share hits.
+"""
+
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Try to import optional Redis client
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for exact matching: case, whitespace and trailing punctuation."""
+    normalized = re.sub(r'\s+', ' ', query.strip().lower())
+    return normalized.rstrip('?!. ')
+
+
+class CacheBackend(ABC):
+    """Shared cache tier interface."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if missing/expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str, collection_name: str, ttl_seconds: int):
+        """Store a value for key, tagged with its collection."""
+
+    @abstractmethod
+    def invalidate(self, collection_name: str):
+        """Drop every entry for a collection."""
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Shared cache tier backed by a local SQLite file.
+    Works across processes on the same host (e.g. several uvicorn workers).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "collection_name TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_response_cache_collection "
+                "ON response_cache (collection_name)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str, collection_name: str, ttl_seconds: int):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, collection_name, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, collection_name, time.time() + ttl_seconds)
+            )
+
+    def invalidate(self, collection_name: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM response_cache WHERE collection_name = ?", (collection_name,))
+            conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (time.time(),))
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared cache tier backed by Redis (or any Redis-protocol server)."""
+
+    def __init__(self, url: str, prefix: str = "response_cache"):
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis not available. Please install redis to use a Redis cache backend.")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def _key(self, collection_name: str, key: str) -> str:
+        return f"{self.prefix}:{collection_name}:{key}"
+
+    def get(self, key: str) -> Optional[str]:
+        # Keys are namespaced by collection, so look up via the key index
+        full_key = self.client.get(f"{self.prefix}:index:{key}")
+        return self.client.get(full_key) if full_key else None
+
+    def set(self, key: str, value: str, collection_name: str, ttl_seconds: int):
+        full_key = self._key(collection_name, key)
+        pipe = self.client.pipeline()
+        pipe.set(full_key, value, ex=ttl_seconds)
+        pipe.set(f"{self.prefix}:index:{key}", full_key, ex=ttl_seconds)
+        pipe.execute()
+
+    def invalidate(self, collection_name: str):
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:{collection_name}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_cache_backend(url: Optional[str]) -> Optional[CacheBackend]:
+    """
+    Create a shared cache backend from a URL.
+
+    Supported: "sqlite:///path/to/cache.db" and "redis://host:port/db".
+    Returns None (local tier only) if url is empty or the backend cannot be created.
+    """
+    if not url:
+        return None
+    try:
+        if url.startswith("sqlite:///"):
+            return SQLiteCacheBackend(url[len("sqlite:///"):])
+        if url.startswith(("redis://", "rediss://")):
+            return RedisCacheBackend(url)
+        logger.warning(f"Unsupported response cache backend URL: {url}")
+    except Exception as e:
+        logger.error(f"Failed to initialize response cache backend {url}: {e}")
+    return None
+
+
+class ResponseCache:
+    """
+    Two-tier exact-match cache for RAG responses.
+
+    The local tier is an in-process LRU with a short TTL (other workers can't
+    invalidate it); the optional shared tier is consulted on local misses and
+    populated on every store.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        max_entries: int = 1024,
+        ttl_seconds: int = 3600,
+        local_ttl_seconds: int = 300
+    ):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = local_ttl_seconds
+        self._local: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(collection_name: str, query: str, n_results: int, prompt_version: str) -> str:
+        """Build the cache key for a request."""
+        raw = json.dumps([collection_name, normalize_query(query), n_results, prompt_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            value, _, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: str, collection_name: str):
+        with self._lock:
+            self._local[key] = (value, collection_name, time.monotonic() + self.local_ttl_seconds)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _get_shared(self, key: str) -> Optional[str]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache backend get failed: {e}")
+            return None
+
+    def _set_shared(self, key: str, value: str, collection_name: str):
+        try:
+            self.backend.set(key, value, collection_name, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Response cache backend set failed: {e}")
+
+    def get(self, collection_name: str, key: str) -> Optional[str]:
+        """Look up a response, promoting shared-tier hits into the local tier."""
+        value = self._get_local(key)
+        if value is None and self.backend is not None:
+            value = self._get_shared(key)
+            if value is not None:
+                self._set_local(key, value, collection_name)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, collection_name: str, key: str, value: str):
+        """Store a response in both tiers."""
+        self._set_local(key, value, collection_name)
+        if self.backend is not None:
+            self._set_shared(key, value, collection_name)
+
+    async def get_async(self, collection_name: str, key: str) -> Optional[str]:
+        """Like get(), but runs shared-tier I/O in a worker thread."""
+        if self.backend is None:
+            return self.get(collection_name, key)
+        value = self._get_local(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        return await asyncio.to_thread(self.get, collection_name, key)
+
+    async def set_async(self, collection_name: str, key: str, value: str):
+        """Like set(), but runs shared-tier I/O in a worker thread."""
+        if self.backend is None:
+            self.set(collection_name, key, value)
+        else:
+            await asyncio.to_thread(self.set, collection_name, key, value)
+
+    def invalidate(self, collection_name: str):
+        """Drop every cached response for a collection from both tiers."""
+        with self._lock:
+            stale = [key for key, entry in self._local.items() if entry[1] == collection_name]
+            for key in stale:
+                del self._local[key]
+        if self.backend is not None:
+            try:
+                self.backend.invalidate(collection_name)
+            except Exception as e:
+                logger.warning(f"Response cache backend invalidate failed: {e}")
+        logger.info(f"Invalidated response cache for collection '{collection_name}'")
+
+
+# Process-wide cache shared by every RAGService instance
+response_cache = ResponseCache(
+    backend=create_cache_backend(settings.response_cache_backend),
+    max_entries=settings.response_cache_max_entries,
+    ttl_seconds=settings.response_cache_ttl_seconds,
+    local_ttl_seconds=settings.response_cache_local_ttl_seconds
+)
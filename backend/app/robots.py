@@ -0,0 +1,90 @@
+"""
+robots.txt fetching and parsing for the website crawler.
+Provides declared sitemaps and the Crawl-delay that applies to the crawler,
+fetched once per site and shared by sitemap discovery and host throttling.
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from .http_client import get_http_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RobotsInfo:
+    """The parts of a robots.txt the crawler uses."""
+    sitemaps: List[str] = field(default_factory=list)
+    crawl_delay: Optional[float] = None  # Seconds between requests, for User-agent: *
+
+
+def parse_robots(text: str, robots_url: str) -> RobotsInfo:
+    """Parse sitemap declarations and the wildcard group's Crawl-delay."""
+    info = RobotsInfo()
+    group_agents: List[str] = []
+    in_agent_lines = False
+
+    for raw_line in text.splitlines():
+        line = raw_line.split("#", 1)[0].strip()
+        key, _, value = line.partition(":")
+        key, value = key.strip().lower(), value.strip()
+        if not key or not value:
+            continue
+
+        if key == "sitemap":
+            info.sitemaps.append(urljoin(robots_url, value))
+        elif key == "user-agent":
+            if not in_agent_lines:
+                group_agents = []  # Consecutive User-agent lines share one group
+            group_agents.append(value.lower())
+            in_agent_lines = True
+            continue
+        elif key == "crawl-delay" and "*" in group_agents:
+            try:
+                info.crawl_delay = max(0.0, float(value))
+            except ValueError:
+                pass
+        in_agent_lines = False
+
+    return info
+
+
+ROBOTS_TTL_SECONDS = 3600
+
+# Per-site robots.txt fetches (keyed by scheme://host), reused for ROBOTS_TTL_SECONDS
+_robots: Dict[str, Tuple[float, "asyncio.Task[RobotsInfo]"]] = {}
+
+
+async def _fetch_robots(site_root: str) -> RobotsInfo:
+    robots_url = site_root + "/robots.txt"
+    try:
+        resp = await get_http_client().get(robots_url, timeout=10)
+        if resp.status_code != 200:
+            return RobotsInfo()
+        return parse_robots(resp.text, robots_url)
+    except Exception as e:
+        logger.debug(f"Could not fetch {robots_url}: {e}")
+        return RobotsInfo()
+
+
+async def get_robots(url: str) -> RobotsInfo:
+    """robots.txt info for the site of a URL (empty if missing or unreachable)."""
+    parsed = urlparse(url)
+    site_root = f"{parsed.scheme}://{parsed.netloc}"
+    fetched_at, task = _robots.get(site_root, (0.0, None))
+    if (
+        task is None
+        or task.get_loop() is not asyncio.get_running_loop()
+        or time.monotonic() - fetched_at > ROBOTS_TTL_SECONDS
+    ):
+        # Concurrent callers share one fetch
+        task = asyncio.ensure_future(_fetch_robots(site_root))
+        _robots[site_root] = (time.monotonic(), task)
+    return await asyncio.shield(task)
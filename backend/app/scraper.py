@@ -3,97 +3,44 @@ Website scraping module using Playwright for AI Chat Backend.
 Provides JavaScript rendering capability for dynamic websites.
 """
 
-import re
+import time
 import asyncio
-from typing import List, Dict, Any, Optional, Callable, Set
-from urllib.parse import urlparse, urldefrag, urljoin
-from xml.etree import ElementTree
-import requests
+from typing import List, Dict, Any, Optional, Callable, Set, Tuple, Mapping
+from urllib.parse import urlparse
 import logging
 
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
-import html2text
+import httpx
+
+from .config import settings
+from .utils import make_chunk_id
+from .crawl_cache import CrawlCache, CrawlCacheEntry, hash_content
+from .chunk_dedup import normalize_text
+from .url_canonical import UrlCanonicalizer, canonicalize_url
+from .page_readiness import PageReadiness
+from .resource_filter import ResourceFilter
+from .browser_pool import get_browser_pool
+from .http_client import get_http_client, retry_after_seconds
+from .host_throttle import AdaptiveHostThrottle
+from .cpu_pool import run_cpu
+from .page_processing import title_from_url, html_to_markdown_task, static_html_task, chunk_markdown_task
+from .markdown_chunker import DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS
+from .crawl_frontier import CrawlBudget, CrawlFrontier, url_priority
+from .sitemap import SitemapEntry, collect_sitemap_entries, discover_sitemaps
+from .build_checkpoint import BuildCheckpoint
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# User agent to avoid being blocked
-DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+# Chunk ID prefix for website content (uploaded files use FILE_CHUNK_PREFIX in document_parser)
+WEB_CHUNK_PREFIX = 'web'
 
-DEFAULT_HEADERS = {
-    'User-Agent': DEFAULT_USER_AGENT
-}
-
-# HTML to markdown converter
-html_converter = html2text.HTML2Text()
-html_converter.ignore_links = False
-html_converter.ignore_images = True
-html_converter.body_width = 0  # Don't wrap lines
-
-
-def smart_chunk_markdown(markdown: str, max_len: int = 1000) -> List[str]:
-    """
-    Hierarchically splits markdown by #, ##, ### headers, then by characters.
-    Ensures all chunks < max_len while preserving semantic structure.
-
-    IMPORTANT: Handles content without headers and content before first header.
-    """
-    if not markdown or not markdown.strip():
-        return []
-
-    def split_by_header(md, header_pattern):
-        """Split markdown by header pattern, INCLUDING content before first header."""
-        indices = [m.start() for m in re.finditer(header_pattern, md, re.MULTILINE)]
-
-        # If no headers found, return the entire content as a single chunk
-        if not indices:
-            return [md.strip()] if md.strip() else []
-
-        # Include content before first header (if any)
-        if indices[0] > 0:
-            indices.insert(0, 0)
-
-        indices.append(len(md))
-        return [md[indices[i]:indices[i+1]].strip() for i in range(len(indices)-1) if md[indices[i]:indices[i+1]].strip()]
-
-    chunks = []
-
-    # First, try splitting by H1 headers
-    h1_sections = split_by_header(markdown, r'^# .+$')
-
-    for h1 in h1_sections:
-        if len(h1) > max_len:
-            # Try splitting by H2 headers
-            h2_sections = split_by_header(h1, r'^## .+$')
-            for h2 in h2_sections:
-                if len(h2) > max_len:
-                    # Try splitting by H3 headers
-                    h3_sections = split_by_header(h2, r'^### .+$')
-                    for h3 in h3_sections:
-                        if len(h3) > max_len:
-                            # Last resort: character-based chunking
-                            for i in range(0, len(h3), max_len):
-                                chunk = h3[i:i+max_len].strip()
-                                if chunk:
-                                    chunks.append(chunk)
-                        elif h3:
-                            chunks.append(h3)
-                elif h2:
-                    chunks.append(h2)
-        elif h1:
-            chunks.append(h1)
-
-    # Final pass: ensure no chunks exceed max_len
-    final_chunks = []
-    for c in chunks:
-        if len(c) > max_len:
-            final_chunks.extend([c[i:i+max_len].strip() for i in range(0, len(c), max_len) if c[i:i+max_len].strip()])
-        elif c:
-            final_chunks.append(c)
-
-    logger.debug(f"smart_chunk_markdown: input={len(markdown)} chars, output={len(final_chunks)} chunks")
-    return [c for c in final_chunks if c]
+# Content types with no page text; any other non-HTML type is handed to the browser
+BINARY_CONTENT_TYPE_PREFIXES = (
+    'image/', 'audio/', 'video/', 'font/',
+    'application/pdf', 'application/zip', 'application/gzip', 'application/octet-stream',
+    'application/x-', 'application/vnd.', 'application/msword', 'application/wasm',
+)
 
 
 def is_sitemap(url: str) -> bool:
@@ -106,18 +53,6 @@ def is_txt(url: str) -> bool:
     return url.endswith('.txt') or url.endswith('.md') or url.endswith('.markdown')
 
 
-def extract_section_info(chunk: str) -> Dict[str, Any]:
-    """Extracts headers and stats from a chunk."""
-    headers = re.findall(r'^(#+)\s+(.+)$', chunk, re.MULTILINE)
-    header_str = '; '.join([f'{h[0]} {h[1]}' for h in headers]) if headers else ''
-
-    return {
-        "headers": header_str,
-        "char_count": len(chunk),
-        "word_count": len(chunk.split())
-    }
-
-
 def _should_skip_url_static(url: str) -> bool:
     """Static helper to check if a URL should be skipped (file URLs, mailto:, etc.)."""
     url_lower = url.lower()
@@ -157,28 +92,48 @@ def _should_skip_url_static(url: str) -> bool:
     return False
 
 
-def parse_sitemap(sitemap_url: str) -> List[str]:
-    """Parse a sitemap.xml and extract URLs, filtering out file URLs and mailto: links."""
-    try:
-        resp = requests.get(sitemap_url, headers=DEFAULT_HEADERS, timeout=30)
-        urls = []
+async def fetch_url_text(url: str, crawl_cache: Optional[CrawlCache] = None) -> str:
+    """
+    Fetch a URL as text, sending a conditional request when the crawl cache has validators.
+    Returns the cached body on 304 Not Modified; raises on HTTP errors.
+    """
+    cached = await asyncio.to_thread(crawl_cache.get, url) if crawl_cache else None
+    headers = cached.conditional_headers() if cached else None
 
-        if resp.status_code == 200:
-            tree = ElementTree.fromstring(resp.content)
-            all_urls = [loc.text for loc in tree.findall('.//{*}loc') if loc.text]
-            # Filter out file URLs and mailto: links
-            urls = [url for url in all_urls if url and not _should_skip_url_static(url)]
+    resp = await get_http_client().get(url, headers=headers)
 
-        logger.info(f"Parsed {len(urls)} URLs from sitemap: {sitemap_url} (filtered out file URLs and mailto: links)")
-        return urls
-    except Exception as e:
-        logger.error(f"Error parsing sitemap {sitemap_url}: {e}")
-        return []
+    if resp.status_code == 304 and cached:
+        logger.info(f"Not modified (304), using cached copy: {url}")
+        return cached.markdown
+
+    resp.raise_for_status()
+    text = decode_response_text(resp)
+
+    if crawl_cache:
+        await asyncio.to_thread(crawl_cache.put, CrawlCacheEntry(
+            url=url,
+            etag=resp.headers.get('ETag'),
+            last_modified=resp.headers.get('Last-Modified'),
+            content_hash=hash_content(resp.content),
+            markdown=text
+        ))
+    return text
+
+
+def decode_response_text(resp: httpx.Response) -> str:
+    """Get response text, guessing the encoding when the server sends no charset."""
+    if resp.charset_encoding is None:
+        # Most pages without a charset are UTF-8; legacy ones are usually Windows-1252
+        try:
+            return resp.content.decode('utf-8')
+        except UnicodeDecodeError:
+            return resp.content.decode('cp1252', errors='replace')
+    return resp.text
 
 
 def normalize_url(url: str) -> str:
-    """Normalize URL by removing fragments."""
-    return urldefrag(url)[0]
+    """Normalize URL: drop the fragment, tracking parameters, default port and trailing slash."""
+    return canonicalize_url(url, strip_trailing_slash=settings.url_strip_trailing_slash)
 
 
 class PlaywrightCrawler:
@@ -192,25 +147,65 @@ class PlaywrightCrawler:
         max_concurrent: int = 5,
         max_depth: int = 3,
         page_timeout: int = 30000,  # 30 seconds
-        progress_callback: Optional[Callable[[str, int, int], None]] = None
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        crawl_cache: Optional[CrawlCache] = None,
+        resource_filter: Optional[ResourceFilter] = None,
+        page_queue: Optional[asyncio.Queue] = None,
+        budget: Optional[CrawlBudget] = None,
+        checkpoint: Optional[BuildCheckpoint] = None
     ):
         self.max_concurrent = max_concurrent
         self.max_depth = max_depth
         self.page_timeout = page_timeout
         self.progress_callback = progress_callback
 
-        # Deduplication: shared visited set across all crawling operations
+        # Streaming: pages are put on this (bounded) queue instead of collected in self.results
+        self.page_queue = page_queue
+
+        # Conditional re-crawls: unchanged pages are replayed from the cache instead of rendered
+        self.crawl_cache = crawl_cache
+        self.sitemap_lastmod: Dict[str, Optional[str]] = {}
+        self.cache_hits = 0
+
+        # Static fast path: plain HTTP fetch first, browser only for client-rendered pages
+        self.static_fetch = settings.static_fetch_enabled
+        self.static_pages = 0
+
+        # Adaptive readiness (per-domain profiles persist in the crawl cache when enabled)
+        self.readiness = PageReadiness(crawl_cache)
+
+        # Blocks images/fonts/trackers etc. on leased pages (stats shared per build)
+        self.resource_filter = resource_filter
+
+        # Deduplication: shared visited set across all crawling operations, keyed by canonical URL
+        # (redirect targets and rel=canonical aliases are marked visited too), plus content hashes
+        # so a page reachable under two unrelated URLs is still embedded once
         self.visited: Set[str] = set()
+        self.canonicalizer = UrlCanonicalizer.from_settings()
+        self.follow_canonical = settings.url_follow_canonical
+        self.detect_duplicate_pages = settings.duplicate_page_detection_enabled
+        self.page_hashes: Dict[str, str] = {}  # normalized markdown hash -> first URL
+        self.static_body_hashes: Set[str] = set()  # raw HTML of pages converted without a browser
+        self.duplicate_pages = 0
         self.results: List[Dict[str, Any]] = []
         self.total_urls_estimate = 0
 
-        # Semaphore for concurrency control
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        # Adaptive per-host concurrency: starts at max_concurrent, grows while the host
+        # responds quickly and backs off on 429/503/timeouts (robots.txt Crawl-delay honoured)
+        self.throttle = AdaptiveHostThrottle(
+            initial=max_concurrent,
+            maximum=settings.crawl_host_max_concurrency,
+            backoff_seconds=settings.crawl_backoff_seconds,
+            max_crawl_delay=settings.crawl_max_crawl_delay
+        )
+
+        # Priority frontier shared by the crawl workers, and the build's page/time budget
+        self.frontier = CrawlFrontier()
+        self.budget = budget or CrawlBudget()
+        self.nav_links: Set[str] = set()  # Links found in <nav>/<header>, crawled earlier
 
-        # Browser instance (reused across pages)
-        self._playwright = None
-        self.browser: Optional[Browser] = None
-        self.context: Optional[BrowserContext] = None
+        # Resumable builds: frontier, visited URLs and pages are checkpointed as the crawl runs
+        self.checkpoint = checkpoint
 
     def should_skip_url(self, url: str) -> bool:
         """Check if URL should be skipped."""
@@ -223,36 +218,232 @@ class PlaywrightCrawler:
         except:
             return False
 
-    async def start_browser(self):
-        """Initialize Playwright browser."""
-        if not self.browser:
-            self._playwright = await async_playwright().start()
-            self.browser = await self._playwright.chromium.launch(
-                headless=True,
-                args=[
-                    '--disable-gpu',
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-setuid-sandbox',
-                ]
+    def filter_links(self, links: List[str], depth: int, base_domain: Optional[str]) -> List[str]:
+        """Keep unvisited same-domain links for recursive crawling if not at max depth."""
+        if depth >= self.max_depth - 1 or not base_domain:
+            return []
+
+        discovered_links = []
+        for link in links:
+            normalized_link = self.canonicalizer.canonicalize(link)
+            if (normalized_link not in self.visited and
+                not self.should_skip_url(normalized_link) and
+                self.is_same_domain(normalized_link, base_domain)):
+                discovered_links.append(normalized_link)
+        return discovered_links
+
+    def claim_aliases(self, url: str, *aliases: Optional[str]) -> bool:
+        """
+        Mark other URLs of a page (redirect target, rel=canonical) visited so they are not crawled.
+        Returns False if one of them was already crawled, i.e. this page is a duplicate.
+        """
+        for alias in aliases:
+            canonical_alias = self.canonicalizer.add_alias(alias, url)
+            if canonical_alias is None:
+                continue
+            if canonical_alias in self.visited:
+                self.duplicate_pages += 1
+                logger.info(f"Skipping duplicate page: {url} is {canonical_alias}")
+                return False
+            self.visited.add(canonical_alias)
+        return True
+
+    def is_duplicate_content(self, url: str, markdown: str) -> bool:
+        """Whether a page's text is identical to a page already emitted in this crawl (records it if not)."""
+        if not self.detect_duplicate_pages or not markdown:
+            return False
+        first_url = self.page_hashes.setdefault(hash_content(normalize_text(markdown)), url)
+        if first_url == url:
+            return False
+        self.duplicate_pages += 1
+        logger.info(f"Skipping duplicate page: {url} has the same content as {first_url}")
+        return True
+
+    async def emit_page(self, page: Dict[str, Any]):
+        """Hand a scraped page downstream (blocks while a bounded page queue is full)."""
+        if self.is_duplicate_content(page['url'], page['markdown']):
+            return
+        if self.checkpoint:
+            self.checkpoint.save_page(page)
+        if self.page_queue is not None:
+            await self.page_queue.put(page)
+        else:
+            self.results.append(page)
+
+    def report_progress(self, url: str):
+        """Report crawl progress to the callback, ignoring callback errors."""
+        if self.progress_callback:
+            try:
+                self.progress_callback(
+                    url,
+                    len(self.visited),
+                    max(self.total_urls_estimate, len(self.visited))
+                )
+            except:
+                pass
+
+    async def get_cache_entry(self, url: str) -> Optional[CrawlCacheEntry]:
+        """Get the crawl cache entry to revalidate against (None if missing or due for a full re-render)."""
+        if not self.crawl_cache:
+            return None
+        # SQLite calls run in a thread: the event loop also serves chat and SSE requests
+        cached = await asyncio.to_thread(self.crawl_cache.get, url)
+        if cached is None or not cached.markdown:
+            return None
+        if time.time() - cached.fetched_at > settings.crawl_cache_max_age_seconds:
+            return None  # Periodically re-render so JS-loaded content can't go stale forever
+        return cached
+
+    async def fetch_static(self, url: str, cached: Optional[CrawlCacheEntry] = None) -> Optional[httpx.Response]:
+        """Plain HTTP GET of a page through the shared client, conditional if cached."""
+        headers = cached.conditional_headers() if cached else None
+
+        async def on_retry(status: Optional[int], retry_after: Optional[float]):
+            if status is None or status in (429, 502, 503, 504):
+                await self.throttle.record_overload(url, retry_after)
+
+        started = time.monotonic()
+        try:
+            response = await get_http_client().get(
+                url, headers=headers, timeout=self.page_timeout / 1000, on_retry=on_retry
+            )
+        except Exception as e:
+            logger.debug(f"Static fetch failed for {url}: {e}")
+            if isinstance(e, httpx.TimeoutException):
+                await self.throttle.record_overload(url)
+            return None
+
+        await self.throttle.record_response(
+            url, response.status_code, time.monotonic() - started, retry_after_seconds(response.headers)
+        )
+        return response
+
+    @staticmethod
+    def is_unchanged(cached: CrawlCacheEntry, response: httpx.Response) -> bool:
+        """A cached page is unchanged on 304, or if the raw HTML hashes the same as last crawl."""
+        if response.status_code == 304:
+            return True
+        return response.status_code == 200 and hash_content(response.content) == cached.content_hash
+
+    async def replay_cached_page(
+        self,
+        url: str,
+        cached: CrawlCacheEntry,
+        headers: Mapping[str, str],
+        depth: int,
+        base_domain: Optional[str]
+    ) -> List[str]:
+        """Replay an unchanged page from the crawl cache without rendering it."""
+        # Refresh validators/lastmod but keep fetched_at (time of the last full render)
+        cached.etag = headers.get('ETag') or cached.etag
+        cached.last_modified = headers.get('Last-Modified') or cached.last_modified
+        cached.sitemap_lastmod = self.sitemap_lastmod.get(url) or cached.sitemap_lastmod
+        await asyncio.to_thread(self.crawl_cache.put, cached)
+
+        self.report_progress(url)
+        await self.emit_page({
+            'url': url,
+            'markdown': cached.markdown,
+            'title': cached.title
+        })
+        self.cache_hits += 1
+        logger.info(f"♻️  Unchanged since last crawl, reused cached content: {url} (depth={depth})")
+        return self.filter_links(cached.links, depth, base_domain)
+
+    async def process_static_page(
+        self,
+        url: str,
+        response: httpx.Response,
+        depth: int,
+        base_domain: Optional[str]
+    ) -> Optional[List[str]]:
+        """
+        Extract content from a plain HTTP response (fast path, no browser).
+        Returns the discovered links, or None if the page needs JavaScript rendering.
+        """
+        if response.status_code != 200:
+            return None  # Let the browser retry (some sites block non-browser clients)
+
+        if not self.claim_aliases(url, str(response.url)):
+            return []
+
+        content_type = response.headers.get('Content-Type', '').lower()
+        body_hash = hash_content(response.content)
+        if self.detect_duplicate_pages and body_hash in self.static_body_hashes:
+            # Byte-identical to a page already converted here (client-rendered shells never are)
+            self.duplicate_pages += 1
+            logger.info(f"Skipping duplicate page (same HTML as an earlier page): {url}")
+            return []
+
+        if 'text/html' in content_type:
+            converted = await run_cpu(
+                static_html_task,
+                decode_response_text(response),
+                str(response.url),
+                settings.static_fetch_min_text_chars
             )
-            self.context = await self.browser.new_context(
-                user_agent=DEFAULT_USER_AGENT,
-                viewport={'width': 1920, 'height': 1080},
-                ignore_https_errors=True
+            if converted is None:
+                logger.debug(f"Static HTML looks client-rendered, using browser: {url}")
+                return None
+            markdown, title, links, nav_links, canonical = converted
+            if self.follow_canonical and not self.claim_aliases(url, canonical):
+                return []
+            title = title or title_from_url(url)
+            self.nav_links.update(self.canonicalizer.canonicalize(link) for link in nav_links)
+        elif 'text/plain' in content_type:
+            markdown = decode_response_text(response)
+            title, links = title_from_url(url), []
+        elif content_type.startswith(BINARY_CONTENT_TYPE_PREFIXES):
+            logger.debug(f"Skipping non-text content: {content_type} for {url}")
+            return []
+        else:
+            # No or unusual type (e.g. application/xhtml+xml, HTML served as another type): let the browser decide
+            return None
+
+        self.static_body_hashes.add(body_hash)
+        self.report_progress(url)
+        await self.emit_page({
+            'url': url,
+            'markdown': markdown,
+            'title': title
+        })
+        self.static_pages += 1
+        logger.info(f"⚡ Scraped without browser: {url} (depth={depth}, {len(markdown)} chars)")
+
+        if self.crawl_cache:
+            await self.store_in_cache(
+                url,
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                response.content,
+                title,
+                markdown,
+                links
             )
 
-    async def stop_browser(self):
-        """Clean up Playwright browser."""
-        if self.context:
-            await self.context.close()
-            self.context = None
-        if self.browser:
-            await self.browser.close()
-            self.browser = None
-        if self._playwright:
-            await self._playwright.stop()
-            self._playwright = None
+        return self.filter_links(links, depth, base_domain)
+
+    async def store_in_cache(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        body: Optional[bytes],
+        title: str,
+        markdown: str,
+        links: List[str]
+    ):
+        """Record a crawled page and its HTTP validators in the crawl cache."""
+        await asyncio.to_thread(self.crawl_cache.put, CrawlCacheEntry(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            sitemap_lastmod=self.sitemap_lastmod.get(url),
+            content_hash=hash_content(body) if body is not None else None,
+            title=title,
+            markdown=markdown,
+            links=links
+        ))
 
     async def crawl_page(
         self,
@@ -264,7 +455,7 @@ class PlaywrightCrawler:
         Crawl a single page and extract content.
         Returns list of discovered internal links (for recursive crawling).
         """
-        normalized_url = normalize_url(url)
+        normalized_url = self.canonicalizer.canonicalize(url)
 
         # Deduplication check
         if normalized_url in self.visited:
@@ -278,227 +469,297 @@ class PlaywrightCrawler:
 
         discovered_links = []
 
-        async with self.semaphore:
-            page = None
+        cached = await self.get_cache_entry(normalized_url)
+        sitemap_lastmod = self.sitemap_lastmod.get(normalized_url)
+        if cached and sitemap_lastmod and sitemap_lastmod == cached.sitemap_lastmod:
+            # Sitemap says unchanged since last crawl: no request needed (and no host slot)
+            return await self.replay_cached_page(normalized_url, cached, {}, depth, base_domain)
+
+        async with self.throttle.slot(normalized_url):
             try:
-                page = await self.context.new_page()
+                if cached or self.static_fetch:
+                    static_response = await self.fetch_static(normalized_url, cached)
+                    if static_response is not None:
+                        if cached and self.is_unchanged(cached, static_response):
+                            return await self.replay_cached_page(
+                                normalized_url, cached, static_response.headers, depth, base_domain
+                            )
+                        if self.static_fetch:
+                            static_links = await self.process_static_page(
+                                normalized_url, static_response, depth, base_domain
+                            )
+                            if static_links is not None:
+                                return static_links
+            except Exception as e:
+                logger.warning(f"Fast path failed for {url}, falling back to browser: {e}")
 
-                # Navigate with timeout
-                response = await page.goto(
-                    url,
-                    wait_until='networkidle',
-                    timeout=self.page_timeout
-                )
+            rendered_page = None
+            try:
+                # Page is leased from the process-wide browser pool and closed on exit
+                async with get_browser_pool().lease_page(self.resource_filter) as page:
+                    # Navigate with timeout (only until the HTML is parsed; readiness is detected below)
+                    started = time.monotonic()
+                    try:
+                        response = await page.goto(
+                            url,
+                            wait_until='domcontentloaded',
+                            timeout=self.page_timeout
+                        )
+                    except Exception as e:
+                        if 'Timeout' in type(e).__name__:
+                            await self.throttle.record_overload(normalized_url)
+                        raise
+                    if response:
+                        await self.throttle.record_response(
+                            normalized_url,
+                            response.status,
+                            time.monotonic() - started,
+                            retry_after_seconds(response.headers)
+                        )
 
-                # Wait for JS frameworks (React, Vue, etc.) to render
-                # First wait for network to be idle
-                try:
-                    await page.wait_for_load_state('networkidle', timeout=5000)
-                except:
-                    pass  # Timeout is fine, some pages never fully stop loading
+                    if not response or response.status >= 400:
+                        logger.warning(f"Failed to load {url}: status {response.status if response else 'no response'}")
+                        return []
+
+                    # Redirected to, or declares itself a copy of, a page already crawled: skip rendering
+                    canonical = None
+                    if self.follow_canonical:
+                        try:
+                            canonical = await page.evaluate('''() => {
+                                const link = document.querySelector('link[rel~="canonical"]');
+                                return link ? link.href : null;
+                            }''')
+                        except Exception:
+                            canonical = None
+                    if not self.claim_aliases(normalized_url, page.url, canonical):
+                        return []
+
+                    # Wait for JS frameworks (React, Vue, etc.) to render: DOM quiescence + stable text
+                    readiness = await self.readiness.wait_until_ready(page, urlparse(normalized_url).netloc)
+                    logger.debug(
+                        f"Page ready in {readiness['elapsedMs']:.0f}ms via {readiness['strategy']} "
+                        f"({readiness['textLength']} chars{', timed out' if readiness['timedOut'] else ''}): {normalized_url}"
+                    )
 
-                # Then wait a bit more for any remaining JS to execute
-                await asyncio.sleep(3)
+                    # Check content type
+                    content_type = response.headers.get('content-type', '').lower()
 
-                # Also try waiting for body content to be non-empty
-                try:
-                    await page.wait_for_function(
-                        'document.body && document.body.innerText.length > 100',
-                        timeout=5000
-                    )
-                except:
-                    pass  # Some pages may have less content
+                    if 'text/html' not in content_type and 'text/plain' not in content_type:
+                        logger.debug(f"Skipping non-text content: {content_type} for {url}")
+                        return []
 
-                if not response or response.status >= 400:
-                    logger.warning(f"Failed to load {url}: status {response.status if response else 'no response'}")
-                    return []
+                    # Report progress
+                    self.report_progress(url)
 
-                # Check content type
-                content_type = response.headers.get('content-type', '').lower()
+                    # Get page content
+                    html_content = await page.content()
 
-                if 'text/html' not in content_type and 'text/plain' not in content_type:
-                    logger.debug(f"Skipping non-text content: {content_type} for {url}")
-                    return []
+                    # Log HTML size for debugging
+                    logger.debug(f"Raw HTML size: {len(html_content)} chars for {normalized_url}")
 
-                # Report progress
-                if self.progress_callback:
+                    # Also get the text content directly from the page for comparison
                     try:
-                        self.progress_callback(
-                            url,
-                            len(self.visited),
-                            max(self.total_urls_estimate, len(self.visited))
-                        )
+                        text_content = await page.evaluate('() => document.body ? document.body.innerText : ""')
+                        logger.debug(f"Text content size: {len(text_content)} chars for {normalized_url}")
                     except:
-                        pass
-
-                # Get page content
-                html_content = await page.content()
-
-                # Log HTML size for debugging
-                logger.debug(f"Raw HTML size: {len(html_content)} chars for {normalized_url}")
-
-                # Also get the text content directly from the page for comparison
-                try:
-                    text_content = await page.evaluate('() => document.body ? document.body.innerText : ""')
-                    logger.debug(f"Text content size: {len(text_content)} chars for {normalized_url}")
-                except:
-                    text_content = ""
-
-                # Extract page title
-                title = await page.title()
-                if not title or title.strip() == '':
-                    # Fallback to URL path as title
-                    title = urlparse(normalized_url).path.strip('/').split('/')[-1] or urlparse(normalized_url).netloc
-
-                # Convert HTML to markdown
-                markdown = html_converter.handle(html_content)
-
-                # Log content details for debugging
-                markdown_preview = markdown[:300].replace('\n', ' ') if markdown else '(empty)'
-                logger.info(f"📄 Page content extracted:")
-                logger.info(f"   URL: {normalized_url}")
-                logger.info(f"   Title: {title}")
-                logger.info(f"   Markdown length: {len(markdown)} chars")
-                logger.info(f"   Preview: {markdown_preview}...")
-
-                # Store result
-                self.results.append({
-                    'url': normalized_url,
-                    'markdown': markdown,
-                    'title': title
-                })
-
-                logger.info(f"Scraped: {normalized_url} (depth={depth})")
-
-                # Extract links for recursive crawling if not at max depth
-                if depth < self.max_depth - 1 and base_domain:
-                    # Get all links from page
-                    links = await page.evaluate('''() => {
+                        text_content = ""
+
+                    # Extract page title
+                    title = await page.title()
+                    if not title or title.strip() == '':
+                        # Fallback to URL path as title
+                        title = title_from_url(normalized_url)
+
+                    # Convert HTML to markdown (in the CPU pool, off the event loop)
+                    markdown = await run_cpu(html_to_markdown_task, html_content)
+
+                    # Log content details for debugging
+                    markdown_preview = markdown[:300].replace('\n', ' ') if markdown else '(empty)'
+                    logger.info(f"📄 Page content extracted:")
+                    logger.info(f"   URL: {normalized_url}")
+                    logger.info(f"   Title: {title}")
+                    logger.info(f"   Markdown length: {len(markdown)} chars")
+                    logger.info(f"   Preview: {markdown_preview}...")
+
+                    # Store result (emitted after the browser page is released)
+                    rendered_page = {
+                        'url': normalized_url,
+                        'markdown': markdown,
+                        'title': title
+                    }
+
+                    logger.info(f"Scraped: {normalized_url} (depth={depth})")
+
+                    # Extract links (always, so cached pages can be replayed at any depth)
+                    anchors = await page.evaluate('''() => {
                         return Array.from(document.querySelectorAll('a[href]'))
-                            .map(a => a.href)
-                            .filter(href => href.startsWith('http'));
+                            .filter(a => a.href.startsWith('http'))
+                            .map(a => ({ href: a.href, nav: !!a.closest('nav, header, [role="navigation"]') }));
                     }''')
+                    links = [anchor['href'] for anchor in anchors]
+                    self.nav_links.update(
+                        self.canonicalizer.canonicalize(anchor['href']) for anchor in anchors if anchor['nav']
+                    )
 
-                    for link in links:
-                        normalized_link = normalize_url(link)
-                        if (normalized_link not in self.visited and
-                            not self.should_skip_url(normalized_link) and
-                            self.is_same_domain(normalized_link, base_domain)):
-                            discovered_links.append(normalized_link)
+                    # Keep internal links for recursive crawling if not at max depth
+                    discovered_links = self.filter_links(links, depth, base_domain)
+
+                    if self.crawl_cache:
+                        try:
+                            body = await response.body()
+                        except Exception:
+                            body = None  # Body unavailable (e.g. redirect chain); rely on validators only
+                        await self.store_in_cache(
+                            normalized_url,
+                            response.headers.get('etag'),
+                            response.headers.get('last-modified'),
+                            body,
+                            title,
+                            markdown,
+                            links
+                        )
 
             except Exception as e:
                 logger.error(f"Error crawling {url}: {e}")
-            finally:
-                if page:
-                    await page.close()
+
+            if rendered_page:
+                await self.emit_page(rendered_page)
 
         return discovered_links
 
-    async def crawl_recursive(
+    async def add_url(
         self,
-        start_urls: List[str],
-        max_depth: int = None
-    ) -> List[Dict[str, Any]]:
+        url: str,
+        depth: int = 0,
+        follow_links: bool = True,
+        sitemap_priority: Optional[float] = None
+    ):
         """
-        Recursively crawl starting from given URLs, following internal links.
-        Uses BFS (breadth-first search) with depth tracking.
+        Queue a URL on the frontier (a seed by default; follow_links=False for sitemap URLs).
+        sitemap_priority is the page's <priority> (0.0-1.0) when it came from a sitemap.
         """
-        if max_depth is not None:
-            self.max_depth = max_depth
-
-        if not start_urls:
-            return []
-
-        # Get base domain from first URL
-        base_domain = urlparse(start_urls[0]).netloc
-
-        self.total_urls_estimate = len(start_urls) * 10  # Initial estimate
-
-        try:
-            await self.start_browser()
-
-            # BFS-style crawling with depth tracking
-            current_depth_urls = [normalize_url(url) for url in start_urls]
-
-            for depth in range(self.max_depth):
-                if not current_depth_urls:
-                    break
-
-                logger.info(f"Crawling depth {depth}: {len(current_depth_urls)} URLs")
+        normalized_url = self.canonicalizer.canonicalize(url)
+        if normalized_url in self.visited or self.should_skip_url(normalized_url):
+            return
+        base_domain = urlparse(normalized_url).netloc if follow_links else None
+        # Sitemap URLs rank just behind seeds
+        priority = url_priority(normalized_url, depth if follow_links else depth + 1)
+        if sitemap_priority is not None:
+            # Sitemap default is 0.5; each 0.1 above/below moves the page one path level
+            priority -= (sitemap_priority - 0.5) * 20.0
+        await self.frontier.put(normalized_url, depth, base_domain, priority)
+        if self.checkpoint:
+            self.checkpoint.add_pending([(normalized_url, depth, base_domain, priority)])
+
+    async def restore_checkpoint(self):
+        """Continue an interrupted build: skip URLs already crawled and re-queue the rest of its frontier."""
+        visited = await asyncio.to_thread(self.checkpoint.visited_urls)
+        self.visited.update(visited)
+        self.budget.pages_started = len(visited)
+        pending = await asyncio.to_thread(self.checkpoint.pending)
+        for url, depth, base_domain, priority in pending:
+            await self.frontier.put(url, depth, base_domain, priority)
+        logger.info(f"Resuming crawl from checkpoint: {len(visited)} URLs already crawled, {len(pending)} queued")
+
+    async def add_sitemap_entries(self, entries: List[SitemapEntry]):
+        """Queue sitemap pages (without link following), remembering their <lastmod>."""
+        for entry in entries:
+            self.sitemap_lastmod[self.canonicalizer.canonicalize(entry.url)] = entry.lastmod
+            await self.add_url(entry.url, follow_links=False, sitemap_priority=entry.priority)
+        self.total_urls_estimate = max(self.total_urls_estimate, len(self.frontier))
+
+    async def _crawl_worker(self):
+        """Take URLs from the frontier until it is drained, closed or the budget runs out."""
+        while True:
+            item = await self.frontier.get()
+            if item is None:
+                return
+            try:
+                if item.url in self.visited:
+                    continue
+                if not self.budget.take():
+                    logger.info(
+                        f"Crawl budget reached ({self.budget.pages_started} pages, "
+                        f"{self.budget.elapsed:.0f}s), stopping crawl"
+                    )
+                    await self.frontier.close()
+                    continue
 
-                # Filter already visited
-                urls_to_crawl = [
-                    url for url in current_depth_urls
-                    if url not in self.visited and not self.should_skip_url(url)
-                ]
+                links = await self.crawl_page(item.url, item.depth, item.base_domain)
 
-                if not urls_to_crawl:
-                    break
+                next_depth = item.depth + 1
+                queued = []
+                for link in links:
+                    priority = url_priority(link, next_depth, nav_link=link in self.nav_links)
+                    await self.frontier.put(link, next_depth, item.base_domain, priority)
+                    queued.append((link, next_depth, item.base_domain, priority))
 
-                # Crawl all URLs at current depth in parallel
-                tasks = [
-                    self.crawl_page(url, depth, base_domain)
-                    for url in urls_to_crawl
-                ]
+                if self.checkpoint:
+                    # The page, its links and its visited mark are committed together, so a crash
+                    # re-crawls this page rather than losing its links
+                    self.checkpoint.finish_url(item.url, queued)
 
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+                self.total_urls_estimate = len(self.visited) + len(self.frontier)
+            except Exception as e:
+                logger.error(f"Error crawling {item.url}: {e}")
+            finally:
+                await self.frontier.task_done()
 
-                # Collect discovered links for next depth
-                next_depth_urls = set()
-                for result in results:
-                    if isinstance(result, list):
-                        next_depth_urls.update(result)
+    async def run(self) -> List[Dict[str, Any]]:
+        """
+        Crawl everything queued on the frontier with crawl_max_workers workers.
+        Each worker picks the highest-priority URL as soon as it is free, so one
+        slow page never holds up the others; how many of them hit one host at a
+        time is decided by the adaptive host throttle.
+        """
+        self.total_urls_estimate = max(self.total_urls_estimate, len(self.frontier))
+        worker_count = max(self.max_concurrent, settings.crawl_max_workers)
+        workers = [asyncio.create_task(self._crawl_worker()) for _ in range(worker_count)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
 
-                current_depth_urls = list(next_depth_urls)
+        return self.results
 
-                # Update estimate
-                self.total_urls_estimate = len(self.visited) + len(current_depth_urls)
+    async def crawl_recursive(
+        self,
+        start_urls: List[str],
+        max_depth: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Recursively crawl starting from given URLs, following internal links.
+        URLs are crawled in priority order (depth, path length, nav links) via the frontier.
+        """
+        if max_depth is not None:
+            self.max_depth = max_depth
 
-        finally:
-            await self.stop_browser()
+        for url in start_urls:
+            await self.add_url(url)
 
-        return self.results
+        return await self.run()
 
     async def crawl_batch(self, urls: List[str]) -> List[Dict[str, Any]]:
         """
         Crawl a batch of URLs without following links.
         Used for sitemap URLs.
         """
-        if not urls:
-            return []
-
-        self.total_urls_estimate = len(urls)
-
-        try:
-            await self.start_browser()
-
-            # Normalize and deduplicate
-            normalized_urls = []
-            for url in urls:
-                norm_url = normalize_url(url)
-                if norm_url not in self.visited and not self.should_skip_url(norm_url):
-                    normalized_urls.append(norm_url)
+        for url in urls:
+            await self.add_url(url, follow_links=False)
 
-            # Crawl all in parallel (no link following, depth=max to disable)
-            tasks = [
-                self.crawl_page(url, depth=self.max_depth, base_domain=None)
-                for url in normalized_urls
-            ]
-
-            await asyncio.gather(*tasks, return_exceptions=True)
-
-        finally:
-            await self.stop_browser()
-
-        return self.results
+        return await self.run()
 
 
 async def crawl_markdown_file(
     url: str,
     visited: Set[str],
-    progress_callback: Optional[Callable[[str, int, int], None]] = None
+    progress_callback: Optional[Callable[[str, int, int], None]] = None,
+    crawl_cache: Optional[CrawlCache] = None
 ) -> List[Dict[str, Any]]:
-    """Crawl a .txt or markdown file (no browser needed)."""
+    """Crawl a .txt or markdown file (no browser needed, conditional request if cached)."""
     normalized = normalize_url(url)
 
     if normalized in visited:
@@ -508,12 +769,11 @@ async def crawl_markdown_file(
         progress_callback(url, 1, 1)
 
     try:
-        response = requests.get(url, headers=DEFAULT_HEADERS, timeout=30)
-        response.raise_for_status()
+        markdown = await fetch_url_text(url, crawl_cache)
         visited.add(normalized)
         # Extract title from filename
         title = urlparse(normalized).path.strip('/').split('/')[-1] or normalized
-        return [{'url': normalized, 'markdown': response.text, 'title': title}]
+        return [{'url': normalized, 'markdown': markdown, 'title': title}]
     except Exception as e:
         logger.error(f"Failed to crawl {url}: {e}")
         return []
@@ -524,18 +784,25 @@ class WebsiteScraper:
 
     def __init__(
         self,
-        chunk_size: int = 1000,
+        chunk_size: int = DEFAULT_MAX_TOKENS,  # Embedding-model tokens
         max_depth: int = 3,
-        max_concurrent: int = 5
+        max_concurrent: int = 5,
+        crawl_cache: Optional[CrawlCache] = None,
+        chunk_overlap: int = DEFAULT_OVERLAP_TOKENS
     ):
         self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
         self.max_depth = max_depth
         self.max_concurrent = max_concurrent
+        self.crawl_cache = crawl_cache
+        self.resource_filter: Optional[ResourceFilter] = None
 
     async def scrape_urls(
         self,
         urls: List[str],
-        progress_callback: Optional[Callable[[str, int, int], None]] = None
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        page_queue: Optional[asyncio.Queue] = None,
+        checkpoint: Optional[BuildCheckpoint] = None
     ) -> List[Dict[str, Any]]:
         """
         Scrape multiple URLs and return processed content.
@@ -546,6 +813,10 @@ class WebsiteScraper:
         Args:
             urls: List of URLs to scrape
             progress_callback: Optional callback(url, current_index, total_urls)
+            page_queue: Optional queue to stream pages into as they are scraped
+                (the returned list is then empty)
+            checkpoint: Optional build checkpoint to record progress in (and resume
+                from, when checkpoint.resumed)
 
         Returns:
             List of dictionaries with 'url' and 'markdown' keys
@@ -559,9 +830,31 @@ class WebsiteScraper:
         visited: Set[str] = set()
         all_results: List[Dict[str, Any]] = []
 
+        # One resource filter per build so its statistics cover every crawler
+        self.resource_filter = ResourceFilter.from_settings() if settings.crawl_resource_filter_enabled else None
+
+        # One crawler and frontier for the whole build, so all seeds are crawled in parallel
+        # under a shared page/time budget
+        crawler = PlaywrightCrawler(
+            max_concurrent=self.max_concurrent,
+            max_depth=self.max_depth,
+            progress_callback=progress_callback,
+            crawl_cache=self.crawl_cache,
+            resource_filter=self.resource_filter,
+            page_queue=page_queue,
+            budget=CrawlBudget(settings.crawl_max_pages, settings.crawl_max_seconds),
+            checkpoint=checkpoint
+        )
+        crawler.visited = visited  # Share visited set
+        if checkpoint and checkpoint.resumed:
+            await crawler.restore_checkpoint()
+
+        sitemap_domains: Set[str] = set()  # Domains with an explicit sitemap seed
+        seed_domains: Dict[str, str] = {}  # Domain -> first regular seed URL
+
         for url_index, url in enumerate(urls, 1):
             try:
-                norm_url = normalize_url(url)
+                norm_url = crawler.canonicalizer.canonicalize(url)
 
                 if norm_url in visited:
                     logger.info(f"Skipping already visited URL: {url}")
@@ -570,83 +863,98 @@ class WebsiteScraper:
                 if is_txt(url):
                     # Text/markdown files - no browser needed
                     logger.info(f"Detected .txt/markdown file: {url}")
-                    results = await crawl_markdown_file(url, visited, progress_callback)
-                    all_results.extend(results)
+                    results = await crawl_markdown_file(norm_url, visited, progress_callback, self.crawl_cache)
+                    for result in results:
+                        # Through the crawler, so the page is checkpointed and content-deduplicated
+                        # (without a page queue it lands in crawler.results, returned by run())
+                        await crawler.emit_page(result)
+                        if checkpoint:
+                            checkpoint.finish_url(result['url'], [])
 
                 elif is_sitemap(url):
-                    # Sitemap - parse XML and batch crawl URLs
+                    # Sitemap (or sitemap index) - queue its URLs without link following
                     logger.info(f"Detected sitemap: {url}")
-                    sitemap_urls = parse_sitemap(url)
-
-                    if sitemap_urls:
-                        # Limit to 50 URLs from sitemap
-                        limited_urls = sitemap_urls[:50]
 
-                        if progress_callback:
-                            progress_callback(url, url_index, len(urls))
-
-                        # Create crawler with shared visited set
-                        crawler = PlaywrightCrawler(
-                            max_concurrent=self.max_concurrent,
-                            max_depth=1,  # No recursive following for sitemap URLs
-                            progress_callback=progress_callback
-                        )
-                        crawler.visited = visited  # Share visited set
-
-                        results = await crawler.crawl_batch(limited_urls)
+                    if progress_callback:
+                        progress_callback(url, url_index, len(urls))
 
-                        # Update shared visited set
-                        visited.update(crawler.visited)
-                        all_results.extend(results)
+                    sitemap_entries = await collect_sitemap_entries([url], self.crawl_cache)
+                    await crawler.add_sitemap_entries(sitemap_entries)
+                    sitemap_domains.add(urlparse(norm_url).netloc)
                 else:
-                    # Regular URL - recursive crawl
+                    # Regular URL - recursive crawl from this seed
                     logger.info(f"Detected regular URL: {url}")
 
                     if progress_callback:
                         progress_callback(url, url_index, len(urls))
 
-                    crawler = PlaywrightCrawler(
-                        max_concurrent=self.max_concurrent,
-                        max_depth=self.max_depth,
-                        progress_callback=progress_callback
-                    )
-                    crawler.visited = visited  # Share visited set
-
-                    results = await crawler.crawl_recursive([url])
-
-                    # Update shared visited set
-                    visited.update(crawler.visited)
-                    all_results.extend(results)
+                    await crawler.add_url(url)
+                    seed_domains.setdefault(urlparse(norm_url).netloc, norm_url)
 
             except Exception as e:
                 logger.error(f"Error scraping {url}: {e}")
                 continue
 
-        logger.info(f"Scraping completed. Found {len(all_results)} unique documents")
+        if settings.sitemap_discovery_enabled:
+            # Sitemaps list pages that link following may never reach (or only deep in the crawl)
+            for domain, seed_url in seed_domains.items():
+                if domain in sitemap_domains:
+                    continue
+                try:
+                    sitemap_urls = await discover_sitemaps(seed_url)
+                    if sitemap_urls:
+                        sitemap_entries = await collect_sitemap_entries(sitemap_urls, self.crawl_cache)
+                        await crawler.add_sitemap_entries(sitemap_entries)
+                except Exception as e:
+                    logger.error(f"Error discovering sitemaps for {domain}: {e}")
+
+        results = await crawler.run()
+        all_results.extend(results)
+
+        if page_queue is not None:
+            logger.info(f"Scraping completed. Visited {len(visited)} URLs (pages streamed to ingest)")
+        else:
+            logger.info(f"Scraping completed. Found {len(all_results)} unique documents")
+        if self.resource_filter:
+            logger.info(f"Resource filter: {self.resource_filter.stats.summary()}")
+        if crawler.duplicate_pages:
+            logger.info(f"Skipped {crawler.duplicate_pages} duplicate pages (aliases or identical content)")
+        logger.info(f"Host concurrency: {crawler.throttle.summary()}")
+        logger.info(f"HTTP client (process totals): {get_http_client().stats.summary()}")
         return all_results
 
     def process_content_for_chromadb(
         self,
-        scrape_results: List[Dict[str, Any]]
+        scrape_results: List[Dict[str, Any]],
+        start_index: int = 0,
+        chunked: Optional[List[List[Tuple[str, Dict[str, Any]]]]] = None
     ) -> tuple:
         """
         Process scraped content into format suitable for ChromaDB.
 
         Args:
             scrape_results: Results from scrape_urls
+            start_index: chunk_index of the first chunk (when processing pages incrementally)
+            chunked: Per-page output of chunk_markdown_task when already computed
+                (e.g. in the CPU pool); pages are chunked inline otherwise
 
         Returns:
             Tuple of (ids, documents, metadatas)
         """
         ids, documents, metadatas = [], [], []
-        chunk_idx = 0
+        seen_ids = set()
+        chunk_idx = start_index
 
-        for doc in scrape_results:
+        for page_index, doc in enumerate(scrape_results):
             url = doc['url']
             markdown = doc['markdown']
             title = doc.get('title', url)  # Fallback to URL if no title
 
-            chunks = smart_chunk_markdown(markdown, max_len=self.chunk_size)
+            if chunked is not None:
+                chunks_with_info = chunked[page_index]
+            else:
+                chunks_with_info = chunk_markdown_task(markdown, self.chunk_size, self.chunk_overlap)
+            chunks = [chunk for chunk, _ in chunks_with_info]
 
             # Log chunking details
             logger.info(f"📦 Chunking page: {url}")
@@ -658,11 +966,16 @@ class WebsiteScraper:
                 logger.warning(f"   ⚠️  WARNING: Page has content but produced 0 chunks!")
                 logger.warning(f"   Markdown preview: {markdown[:500]}")
 
-            for i, chunk in enumerate(chunks):
-                ids.append(f"chunk-{chunk_idx}")
+            for i, (chunk, section_info) in enumerate(chunks_with_info):
+                # Stable ID from (source URL, content hash) so rebuilds can diff against the index
+                chunk_id = make_chunk_id(WEB_CHUNK_PREFIX, url, chunk)
+                if chunk_id in seen_ids:
+                    continue  # Identical chunk repeated on the same page
+                seen_ids.add(chunk_id)
+                ids.append(chunk_id)
                 documents.append(chunk)
 
-                meta = extract_section_info(chunk)
+                meta = dict(section_info)
                 meta["chunk_index"] = chunk_idx
                 meta["source"] = url
                 meta["title"] = title
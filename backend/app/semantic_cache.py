@@ -0,0 +1,156 @@
+"""
+Semantic answer cache for AI Chat Backend.
+Stores (query embedding, retrieved chunk ids, answer) per collection and serves
+cached answers for new queries whose embedding is close enough to a previous one.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    """A cached answer and the retrieval it was generated from."""
+    query: str
+    embedding: np.ndarray  # L2-normalized query embedding
+    chunk_ids: List[str]
+    answer: str
+    n_results: int
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class SemanticAnswerCache:
+    """
+    Per-collection semantic cache of RAG answers.
+
+    A lookup returns a cached answer when the cosine similarity between the new
+    query embedding and a cached one is at least `threshold`. Entries expire after
+    `ttl_seconds` and each collection keeps at most `max_entries` (LRU evicted).
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl_seconds: int = 3600,
+        max_entries: int = 256
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, "OrderedDict[int, CachedAnswer]"] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, entries: "OrderedDict[int, CachedAnswer]", now: float):
+        expired = [key for key, entry in entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            del entries[key]
+
+    def lookup(
+        self,
+        collection_name: str,
+        query_embedding: Sequence[float],
+        n_results: int
+    ) -> Optional[CachedAnswer]:
+        """
+        Find the most similar cached answer for a query embedding.
+
+        Args:
+            collection_name: Collection the query targets
+            query_embedding: Embedding of the new query
+            n_results: Number of retrieved chunks the answer must have been built from
+
+        Returns:
+            The best matching CachedAnswer above the threshold, or None
+        """
+        query_vector = self._normalize(query_embedding)
+
+        with self._lock:
+            entries = self._entries.get(collection_name)
+            if not entries:
+                self.misses += 1
+                return None
+
+            self._expire(entries, time.monotonic())
+
+            best_key, best_score = None, self.threshold
+            for key, entry in entries.items():
+                if entry.n_results != n_results:
+                    continue
+                score = float(np.dot(query_vector, entry.embedding))
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            entries.move_to_end(best_key)
+            self.hits += 1
+            entry = entries[best_key]
+
+        logger.info(f"🧠 Semantic cache hit for '{collection_name}' (similarity {best_score:.3f}, cached query: '{entry.query}')")
+        return entry
+
+    def store(
+        self,
+        collection_name: str,
+        query: str,
+        query_embedding: Sequence[float],
+        chunk_ids: List[str],
+        answer: str,
+        n_results: int
+    ):
+        """
+        Cache an answer for a query embedding.
+        """
+        entry = CachedAnswer(
+            query=query,
+            embedding=self._normalize(query_embedding),
+            chunk_ids=list(chunk_ids),
+            answer=answer,
+            n_results=n_results
+        )
+
+        with self._lock:
+            entries = self._entries.setdefault(collection_name, OrderedDict())
+            entries[self._next_id] = entry
+            self._next_id += 1
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def invalidate(self, collection_name: str):
+        """
+        Drop every cached answer for a collection (e.g. after it is rebuilt).
+        """
+        with self._lock:
+            if self._entries.pop(collection_name, None):
+                logger.info(f"Invalidated semantic answer cache for collection '{collection_name}'")
+
+
+# Process-wide cache shared by every RAG bot
+semantic_answer_cache = SemanticAnswerCache(
+    threshold=settings.semantic_cache_threshold,
+    ttl_seconds=settings.semantic_cache_ttl_seconds,
+    max_entries=settings.semantic_cache_max_entries
+)
@@ -0,0 +1,226 @@
+"""
+Sitemap ingestion for the website crawler.
+Discovers sitemaps (robots.txt, common paths), follows sitemap indexes and
+parses (optionally gzipped) sitemap XML incrementally, exposing <lastmod> and
+<priority> so the crawler can prioritize and skip unchanged pages.
+"""
+
+import json
+import zlib
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from typing import List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from xml.etree import ElementTree
+
+from .config import settings
+from .crawl_cache import CrawlCache, CrawlCacheEntry
+from .http_client import get_http_client
+from .robots import get_robots
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Probed (in order) when robots.txt does not list any sitemap
+COMMON_SITEMAP_PATHS = (
+    "/sitemap.xml",
+    "/sitemap_index.xml",
+    "/sitemap-index.xml",
+    "/wp-sitemap.xml",
+    "/sitemap.xml.gz",
+)
+
+STREAM_CHUNK_BYTES = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclass
+class SitemapEntry:
+    """A page listed in a sitemap."""
+    url: str
+    lastmod: Optional[str] = None
+    priority: Optional[float] = None  # 0.0-1.0, sitemap default is 0.5
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from a tag name."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element, name: str) -> Optional[str]:
+    for child in element:
+        if _local_name(child.tag) == name and child.text:
+            return child.text.strip()
+    return None
+
+
+class SitemapStreamParser:
+    """
+    Incremental parser for a sitemap or sitemap index.
+    Feed it byte chunks as they arrive; gzipped content is detected from its
+    magic bytes and decompressed on the fly.
+    """
+
+    def __init__(self):
+        self._parser = ElementTree.XMLPullParser(events=("end",))
+        self._decompressor = None
+        self._started = False
+        self.entries: List[SitemapEntry] = []
+        self.child_sitemaps: List[str] = []
+
+    def _drain_events(self):
+        for _, element in self._parser.read_events():
+            name = _local_name(element.tag)
+            if name == "url":
+                loc = _child_text(element, "loc")
+                if loc:
+                    priority = _child_text(element, "priority")
+                    try:
+                        priority = float(priority) if priority else None
+                    except ValueError:
+                        priority = None
+                    self.entries.append(SitemapEntry(loc, _child_text(element, "lastmod"), priority))
+                element.clear()  # Keep memory flat on large sitemaps
+            elif name == "sitemap":
+                loc = _child_text(element, "loc")
+                if loc:
+                    self.child_sitemaps.append(loc)
+                element.clear()
+
+    def feed(self, chunk: bytes):
+        if not chunk:
+            return
+        if not self._started:
+            self._started = True
+            if chunk.startswith(GZIP_MAGIC):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._parser.feed(self._decompressor.decompress(chunk) if self._decompressor else chunk)
+        self._drain_events()
+
+    def close(self) -> Tuple[List[SitemapEntry], List[str]]:
+        """Finish parsing; returns (page entries, child sitemap URLs)."""
+        if self._decompressor:
+            self._parser.feed(self._decompressor.flush())
+        self._parser.close()
+        self._drain_events()
+        return self.entries, self.child_sitemaps
+
+
+async def fetch_sitemap(url: str, crawl_cache: Optional[CrawlCache] = None) -> Tuple[List[SitemapEntry], List[str]]:
+    """Stream and parse one sitemap (conditional request if cached)."""
+    cached = crawl_cache.get(url) if crawl_cache else None
+    headers = cached.conditional_headers() if cached else None
+
+    async with get_http_client().stream(url, headers=headers) as resp:
+        if resp.status_code == 304 and cached and cached.markdown:
+            logger.info(f"Sitemap not modified (304), using cached entries: {url}")
+            data = json.loads(cached.markdown)
+            return [SitemapEntry(**entry) for entry in data["entries"]], data["sitemaps"]
+        resp.raise_for_status()
+        parser = SitemapStreamParser()
+        async for chunk in resp.aiter_bytes(STREAM_CHUNK_BYTES):
+            parser.feed(chunk)
+        entries, child_sitemaps = parser.close()
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+    if crawl_cache and (etag or last_modified):
+        # Parsed entries (not the raw XML) are cached for 304 replays
+        crawl_cache.put(CrawlCacheEntry(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            markdown=json.dumps({"entries": [asdict(entry) for entry in entries], "sitemaps": child_sitemaps})
+        ))
+    return entries, child_sitemaps
+
+
+async def _probe_sitemap(url: str) -> bool:
+    """Whether a candidate sitemap URL exists and looks like XML/gzip."""
+    try:
+        async with get_http_client().stream(url, timeout=10) as resp:
+            if resp.status_code != 200:
+                return False
+            head = b""
+            async for chunk in resp.aiter_bytes(512):
+                head = chunk
+                break
+            return head.startswith(GZIP_MAGIC) or b"<urlset" in head or b"<sitemapindex" in head or head.lstrip().startswith(b"<?xml")
+    except Exception:
+        return False
+
+
+async def discover_sitemaps(site_url: str) -> List[str]:
+    """
+    Find sitemaps for a site: those declared in robots.txt, otherwise the first
+    common sitemap path that exists.
+    """
+    parsed = urlparse(site_url)
+    root = f"{parsed.scheme}://{parsed.netloc}"
+
+    sitemaps = (await get_robots(root)).sitemaps
+    if sitemaps:
+        logger.info(f"Found {len(sitemaps)} sitemap(s) in robots.txt for {root}")
+        return sitemaps
+
+    candidates = [root + path for path in COMMON_SITEMAP_PATHS]
+    found = await asyncio.gather(*(_probe_sitemap(url) for url in candidates))
+    for url, exists in zip(candidates, found):
+        if exists:
+            logger.info(f"Discovered sitemap at {url}")
+            return [url]
+    return []
+
+
+async def collect_sitemap_entries(
+    sitemap_urls: List[str],
+    crawl_cache: Optional[CrawlCache] = None,
+    max_entries: Optional[int] = None,
+    max_sitemaps: Optional[int] = None
+) -> List[SitemapEntry]:
+    """
+    Collect page entries from sitemaps, following sitemap indexes level by level.
+
+    Args:
+        sitemap_urls: Sitemap or sitemap index URLs
+        crawl_cache: Optional crawl cache for conditional sitemap requests
+        max_entries: Stop after this many page entries
+        max_sitemaps: Fetch at most this many sitemap files (indexes included)
+
+    Returns:
+        Unique page entries in sitemap order
+    """
+    max_entries = max_entries or settings.sitemap_max_urls
+    max_sitemaps = max_sitemaps or settings.sitemap_max_files
+    semaphore = asyncio.Semaphore(4)
+
+    async def fetch(url: str):
+        async with semaphore:
+            try:
+                return await fetch_sitemap(url, crawl_cache)
+            except Exception as e:
+                logger.error(f"Error parsing sitemap {url}: {e}")
+                return [], []
+
+    entries: List[SitemapEntry] = []
+    seen_urls: Set[str] = set()
+    fetched: Set[str] = set()
+    level = list(dict.fromkeys(sitemap_urls))
+
+    while level and len(entries) < max_entries and len(fetched) < max_sitemaps:
+        level = [url for url in level if url not in fetched][:max_sitemaps - len(fetched)]
+        fetched.update(level)
+        results = await asyncio.gather(*(fetch(url) for url in level))
+
+        next_level = []
+        for sitemap_url, (page_entries, child_sitemaps) in zip(level, results):
+            logger.info(f"Parsed sitemap {sitemap_url}: {len(page_entries)} URLs, {len(child_sitemaps)} nested sitemaps")
+            for entry in page_entries:
+                if entry.url not in seen_urls and len(entries) < max_entries:
+                    seen_urls.add(entry.url)
+                    entries.append(entry)
+            next_level.extend(child_sitemaps)
+        level = next_level
+
+    return entries
@@ -0,0 +1,130 @@
+"""
+URL canonicalization for the website crawler.
+Maps the many spellings of one page (trailing slash, www., default port,
+tracking parameters, query order, rel=canonical and redirect aliases) to a
+single URL so each page is rendered and embedded once.
+"""
+
+import fnmatch
+import logging
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urldefrag, urlencode, urlsplit, urlunsplit
+
+from .config import settings
+from .resource_filter import parse_list_setting
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track the visitor (glob patterns, case-insensitive)
+DEFAULT_STRIP_PARAMS = [
+    "utm_*", "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "yclid", "igshid", "ref_src", "spm",
+]
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def canonicalize_url(
+    url: str,
+    strip_params: Iterable[str] = DEFAULT_STRIP_PARAMS,
+    strip_trailing_slash: bool = True
+) -> str:
+    """
+    Canonical form of a URL: no fragment, lowercase scheme/host, no default
+    port, tracking parameters removed, remaining query sorted, and no trailing
+    slash (except the root path).
+    """
+    url = urldefrag(url.strip())[0]
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return url
+
+    host = (parts.hostname or "").rstrip(".")
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port is None or str(port) == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+
+    path = parts.path or "/"
+    if strip_trailing_slash and len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    patterns = [pattern.lower() for pattern in strip_params]
+    query_pairs = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not any(fnmatch.fnmatchcase(key.lower(), pattern) for pattern in patterns)
+    ]
+    query = urlencode(sorted(query_pairs), doseq=True)
+
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def _site_key(netloc: str) -> str:
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+class UrlCanonicalizer:
+    """
+    Build-scoped canonicalizer.
+
+    On top of canonicalize_url it merges www./bare host variants into whichever
+    spelling of the host was seen first (normally the seed URL, which is known
+    to resolve), and remembers aliases learned while crawling: the final URL of
+    a redirect and a page's <link rel="canonical"> both map to the URL the page
+    was crawled under.
+    """
+
+    def __init__(
+        self,
+        strip_params: Iterable[str] = DEFAULT_STRIP_PARAMS,
+        strip_trailing_slash: bool = True,
+        merge_www: bool = True
+    ):
+        self.strip_params: List[str] = list(strip_params)
+        self.strip_trailing_slash = strip_trailing_slash
+        self.merge_www = merge_www
+        self._hosts: Dict[str, str] = {}  # www-less host -> preferred netloc
+        self._aliases: Dict[str, str] = {}  # canonical alias URL -> URL the page was crawled under
+
+    @classmethod
+    def from_settings(cls) -> "UrlCanonicalizer":
+        """Build a canonicalizer from the url_* settings."""
+        return cls(
+            strip_params=DEFAULT_STRIP_PARAMS + sorted(parse_list_setting(settings.url_strip_query_params)),
+            strip_trailing_slash=settings.url_strip_trailing_slash,
+            merge_www=settings.url_merge_www
+        )
+
+    def canonicalize(self, url: str) -> str:
+        canonical = canonicalize_url(url, self.strip_params, self.strip_trailing_slash)
+        if self.merge_www:
+            parts = urlsplit(canonical)
+            if parts.netloc:
+                preferred = self._hosts.setdefault(_site_key(parts.netloc), parts.netloc)
+                if preferred != parts.netloc:
+                    canonical = urlunsplit(parts._replace(netloc=preferred))
+        return self._aliases.get(canonical, canonical)
+
+    def same_site(self, url: str, other: str) -> bool:
+        """Whether two canonical URLs are on the same host (www. variants included)."""
+        return _site_key(urlsplit(url).netloc) == _site_key(urlsplit(other).netloc)
+
+    def add_alias(self, alias: Optional[str], url: str) -> Optional[str]:
+        """
+        Record that alias (redirect target or rel=canonical) names the page crawled as url.
+        Returns the alias in canonical form, or None if it is the same URL or another site.
+        """
+        if not alias:
+            return None
+        canonical_alias = self.canonicalize(alias)
+        if canonical_alias == url or not self.same_site(canonical_alias, url):
+            return None
+        self._aliases.setdefault(canonical_alias, url)
+        return canonical_alias
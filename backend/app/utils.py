@@ -3,30 +3,66 @@
 import os
 import pathlib
 import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Set
 
 import chromadb
-from chromadb.utils import embedding_functions
 from more_itertools import batched
 
+from .embedding_service import SharedEmbeddingFunction
+
 logger = logging.getLogger(__name__)
 
+# Process-wide ChromaDB clients (one per persistence directory) and embedding function.
+# Opening a PersistentClient re-reads SQLite/HNSW state, so clients are created once
+# and shared by every caller. Embeddings are served by the shared EmbeddingEngine.
+_chroma_clients: Dict[str, chromadb.PersistentClient] = {}
+_embedding_function = None
+_shared_lock = threading.Lock()
+
 
 def get_chroma_client(persist_directory: str) -> chromadb.PersistentClient:
     """Get a ChromaDB client with the specified persistence directory.
 
+    Clients are cached per directory, so repeated calls return the same instance.
+
     Args:
         persist_directory: Directory where ChromaDB will store its data
 
     Returns:
         A ChromaDB PersistentClient
     """
-    # Create the directory if it doesn't exist
-    os.makedirs(persist_directory, exist_ok=True)
+    key = os.path.abspath(persist_directory)
+    client = _chroma_clients.get(key)
+    if client is not None:
+        return client
+
+    with _shared_lock:
+        client = _chroma_clients.get(key)
+        if client is None:
+            # Create the directory if it doesn't exist
+            os.makedirs(persist_directory, exist_ok=True)
+            client = chromadb.PersistentClient(persist_directory)
+            _chroma_clients[key] = client
+        return client
+
+
+def get_embedding_function():
+    """Get the shared embedding function used by every collection.
 
-    # Return the client
-    return chromadb.PersistentClient(persist_directory)
+    Returns:
+        A SharedEmbeddingFunction backed by the process-wide embedding engine
+    """
+    global _embedding_function
+    if _embedding_function is None:
+        with _shared_lock:
+            if _embedding_function is None:
+                # Local MiniLM ONNX model (no external API calls to Hugging Face),
+                # loaded once by the embedding engine on first use
+                _embedding_function = SharedEmbeddingFunction()
+    return _embedding_function
 
 
 def collection_exists(client: chromadb.PersistentClient, collection_name: str) -> bool:
@@ -65,9 +101,7 @@ def get_or_create_collection(
     Returns:
         A ChromaDB Collection
     """
-    # Use ChromaDB's default embedding function (no external API calls to Hugging Face)
-    # DefaultEmbeddingFunction uses a local model and doesn't require external API access
-    embedding_func = embedding_functions.DefaultEmbeddingFunction()
+    embedding_func = get_embedding_function()
 
     # Try to get the collection, create it if it doesn't exist
     try:
@@ -83,12 +117,111 @@ def get_or_create_collection(
         )
 
 
+def make_chunk_id(prefix: str, source: str, content: str) -> str:
+    """Build a stable chunk ID from its source and content.
+
+    The same chunk text from the same source always maps to the same ID, so
+    re-indexing can diff against what is already stored.
+
+    Args:
+        prefix: ID prefix identifying the chunk origin (e.g. "web", "file")
+        source: Source URL or file path of the chunk
+        content: Chunk text
+
+    Returns:
+        ID of the form "<prefix>-<source hash>-<content hash>"
+    """
+    source_hash = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()[:20]
+    return f"{prefix}-{source_hash}-{content_hash}"
+
+
+def get_collection_ids(
+        collection: chromadb.Collection,
+        page_size: int = 5000,
+        where: Optional[Dict[str, Any]] = None
+) -> Set[str]:
+    """Get all document IDs stored in a collection (no documents or embeddings loaded).
+
+    Args:
+        collection: ChromaDB collection
+        page_size: Number of IDs fetched per request
+        where: Optional metadata filter (only IDs of matching documents are returned)
+
+    Returns:
+        Set of document IDs
+    """
+    ids: Set[str] = set()
+    offset = 0
+    while True:
+        page = collection.get(include=[], limit=page_size, offset=offset, where=where)
+        page_ids = page.get("ids", [])
+        ids.update(page_ids)
+        if len(page_ids) < page_size:
+            return ids
+        offset += page_size
+
+
+async def delete_documents_from_collection(
+        collection: chromadb.Collection,
+        ids: List[str],
+        batch_size: int = 500,
+) -> None:
+    """Delete documents from a ChromaDB collection in batches asynchronously.
+
+    Args:
+        collection: ChromaDB collection
+        ids: List of document IDs to delete
+        batch_size: Size of batches for deleting documents
+    """
+    for batch in batched(ids, batch_size):
+        await asyncio.to_thread(collection.delete, ids=list(batch))
+        await asyncio.sleep(0)
+
+    if ids:
+        logger.info(f"Deleted {len(ids)} documents from collection")
+
+
+async def copy_documents_between_collections(
+        source: chromadb.Collection,
+        target: chromadb.Collection,
+        ids: List[str],
+        batch_size: int = 500,
+) -> None:
+    """Copy documents, metadata and stored embeddings from one collection to another.
+
+    No re-embedding takes place, so this is much cheaper than re-adding the documents.
+
+    Args:
+        source: Collection to read from
+        target: Collection to write to
+        ids: IDs of the documents to copy
+        batch_size: Size of batches for copying documents
+    """
+    for batch in batched(ids, batch_size):
+        def _copy_batch():
+            records = source.get(ids=list(batch), include=["embeddings", "documents", "metadatas"])
+            if records["ids"]:
+                target.add(
+                    ids=records["ids"],
+                    embeddings=records["embeddings"],
+                    documents=records["documents"],
+                    metadatas=records["metadatas"],
+                )
+
+        await asyncio.to_thread(_copy_batch)
+        await asyncio.sleep(0)
+
+    logger.info(f"Copied {len(ids)} documents from '{source.name}' to '{target.name}'")
+
+
 async def add_documents_to_collection(
         collection: chromadb.Collection,
         ids: List[str],
         documents: List[str],
         metadatas: Optional[List[Dict[str, Any]]] = None,
         batch_size: int = 100,
+        embeddings: Optional[List[Any]] = None,
 ) -> None:
     """Add documents to a ChromaDB collection in batches asynchronously.
     
@@ -101,6 +234,7 @@ async def add_documents_to_collection(
         documents: List of document texts
         metadatas: Optional list of metadata dictionaries for each document
         batch_size: Size of batches for adding documents
+        embeddings: Optional precomputed embeddings (otherwise the collection embeds the documents)
     """
     # Create default metadata if none provided
     if metadatas is None:
@@ -128,6 +262,7 @@ async def add_documents_to_collection(
                 ids=ids[start_idx:end_idx],
                 documents=documents[start_idx:end_idx],
                 metadatas=metadatas[start_idx:end_idx],
+                embeddings=embeddings[start_idx:end_idx] if embeddings is not None else None,
             )
         
         # Execute in thread pool to avoid blocking event loop
@@ -145,6 +280,7 @@ def query_collection(
         query_text: str,
         n_results: int = 5,
         where: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
 ) -> Dict[str, Any]:
     """Query a ChromaDB collection for similar documents.
 
@@ -153,6 +289,7 @@ def query_collection(
         query_text: Text to search for
         n_results: Number of results to return
         where: Optional filter to apply to the query
+        query_embedding: Optional precomputed embedding of query_text (skips re-embedding)
 
     Returns:
         Query results containing documents, metadatas, distances, and ids
@@ -164,8 +301,12 @@ def query_collection(
     logger.info(f"📊 Searching collection: '{collection.name}' with n_results: {n_results}")
     
     # Query the collection
+    if query_embedding is not None:
+        query_args = {"query_embeddings": [query_embedding]}
+    else:
+        query_args = {"query_texts": [query_text]}
     results = collection.query(
-        query_texts=[query_text],
+        **query_args,
         n_results=n_results,
         where=where,
         include=["documents", "metadatas", "distances"]
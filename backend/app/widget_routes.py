@@ -730,10 +730,11 @@ def generate_widget_script(config):
             const loadingId = this.addLoadingMessage();
             
             try {{
-                const response = await fetch(`${{this.config.apiBaseUrl}}/api/v1/ai/chat/${{this.config.companyId}}/widget`, {{
+                const response = await fetch(`${{this.config.apiBaseUrl}}/api/v1/ai/chat/${{this.config.companyId}}/widget/stream`, {{
                     method: 'POST',
                     headers: {{
                         'Content-Type': 'application/json',
+                        'Accept': 'text/event-stream',
                         'X-API-Key': this.config.apiKey
                     }},
                     body: JSON.stringify({{
@@ -747,13 +748,33 @@ def generate_widget_script(config):
                     throw new Error(errorData.detail || 'Failed to get response');
                 }}
                 
-                const data = await response.json();
+                // Stream Server-Sent Events, replacing the loading message on the first token
+                let responseId = null;
+                let responseText = '';
+                const handleEvent = (eventName, data) => {{
+                    if (eventName === 'error') {{
+                        throw new Error(data.detail || 'Failed to get response');
+                    }}
+                    if (eventName === 'done') {{
+                        responseText = data.response;
+                    }} else if (data.delta) {{
+                        responseText += data.delta;
+                    }} else {{
+                        return;
+                    }}
+                    if (!responseId) {{
+                        this.removeMessage(loadingId);
+                        responseId = this.addMessage(responseText, false);
+                    }} else {{
+                        this.updateMessage(responseId, responseText);
+                    }}
+                }};
                 
-                // Remove loading message
-                this.removeMessage(loadingId);
+                await this.readEventStream(response, handleEvent);
                 
-                // Add AI response
-                this.addMessage(data.response, false);
+                if (!responseId) {{
+                    throw new Error('Empty response');
+                }}
                 
             }} catch (error) {{
                 console.error('Chat error:', error);
@@ -766,6 +787,48 @@ def generate_widget_script(config):
             }}
         }}
         
+        async readEventStream(response, onEvent) {{
+            // Parse a text/event-stream body, calling onEvent(eventName, data) per message
+            const parseBlock = (block) => {{
+                let eventName = 'message';
+                const dataLines = [];
+                block.split('\\n').forEach((line) => {{
+                    if (line.startsWith('event:')) {{
+                        eventName = line.slice(6).trim();
+                    }} else if (line.startsWith('data:')) {{
+                        dataLines.push(line.slice(5).trim());
+                    }}
+                }});
+                if (dataLines.length) {{
+                    onEvent(eventName, JSON.parse(dataLines.join('\\n')));
+                }}
+            }};
+            
+            // Browsers without streamable bodies: read everything, then parse
+            if (!response.body || !response.body.getReader) {{
+                const text = await response.text();
+                text.split('\\n\\n').forEach(parseBlock);
+                return;
+            }}
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {{
+                const {{ done, value }} = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, {{ stream: true }});
+                let boundary;
+                while ((boundary = buffer.indexOf('\\n\\n')) !== -1) {{
+                    parseBlock(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                }}
+            }}
+            if (buffer.trim()) {{
+                parseBlock(buffer);
+            }}
+        }}
+        
         addLoadingMessage() {{
             const messageId = 'msg_loading_' + Date.now();
             const messageWrapper = document.createElement('div');
@@ -856,6 +919,16 @@ def generate_widget_script(config):
             return messageId;
         }}
         
+        updateMessage(messageId, content) {{
+            const messageElement = document.getElementById(messageId);
+            if (messageElement) {{
+                // Bubble is the second child of the message container (after the icon)
+                const bubble = messageElement.firstChild.lastChild;
+                bubble.textContent = content;
+                this.scrollToBottom();
+            }}
+        }}
+        
         removeMessage(messageId) {{
             const messageElement = document.getElementById(messageId);
             if (messageElement) {{
@@ -0,0 +1,160 @@
+"""
+Throughput benchmark: token-aware chunker vs the previous smart_chunk_markdown.
+
+Usage:
+    python benchmark_chunker.py [markdown files...] [--repeat N]
+
+Without files a synthetic documentation-style corpus is used. Reports MB/s,
+chunk counts and how many embedding-model tokens each chunker leaves past
+MiniLM's 256 word-piece limit (text that is never embedded).
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.markdown_chunker import (
+    DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS, chunk_markdown, get_token_counter, load_tokenizer
+)
+
+MINILM_MAX_TOKENS = 256
+
+
+def legacy_smart_chunk_markdown(markdown: str, max_len: int = 1000) -> List[str]:
+    """The previous chunker (page_processing.smart_chunk_markdown), kept here as the baseline."""
+    if not markdown or not markdown.strip():
+        return []
+
+    def split_by_header(md, header_pattern):
+        indices = [m.start() for m in re.finditer(header_pattern, md, re.MULTILINE)]
+        if not indices:
+            return [md.strip()] if md.strip() else []
+        if indices[0] > 0:
+            indices.insert(0, 0)
+        indices.append(len(md))
+        return [md[indices[i]:indices[i+1]].strip() for i in range(len(indices)-1) if md[indices[i]:indices[i+1]].strip()]
+
+    chunks = []
+    for h1 in split_by_header(markdown, r'^# .+$'):
+        if len(h1) > max_len:
+            for h2 in split_by_header(h1, r'^## .+$'):
+                if len(h2) > max_len:
+                    for h3 in split_by_header(h2, r'^### .+$'):
+                        if len(h3) > max_len:
+                            for i in range(0, len(h3), max_len):
+                                chunk = h3[i:i+max_len].strip()
+                                if chunk:
+                                    chunks.append(chunk)
+                        elif h3:
+                            chunks.append(h3)
+                elif h2:
+                    chunks.append(h2)
+        elif h1:
+            chunks.append(h1)
+
+    final_chunks = []
+    for c in chunks:
+        if len(c) > max_len:
+            final_chunks.extend([c[i:i+max_len].strip() for i in range(0, len(c), max_len) if c[i:i+max_len].strip()])
+        elif c:
+            final_chunks.append(c)
+    return [c for c in final_chunks if c]
+
+
+def legacy_extract_section_info(chunk: str) -> Dict[str, Any]:
+    headers = re.findall(r'^(#+)\s+(.+)$', chunk, re.MULTILINE)
+    return {
+        "headers": '; '.join([f'{h[0]} {h[1]}' for h in headers]) if headers else '',
+        "char_count": len(chunk),
+        "word_count": len(chunk.split())
+    }
+
+
+def legacy_chunk(markdown: str) -> List[Tuple[str, Dict[str, Any]]]:
+    return [(chunk, legacy_extract_section_info(chunk)) for chunk in legacy_smart_chunk_markdown(markdown)]
+
+
+def token_aware_chunk(markdown: str) -> List[Tuple[str, Dict[str, Any]]]:
+    return chunk_markdown(markdown, DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS)
+
+
+def synthetic_corpus(pages: int = 200, seed: int = 7) -> List[str]:
+    """Documentation-like pages: nested headings, prose with links, lists and code blocks."""
+    rng = random.Random(seed)
+    words = (
+        "the api returns a paginated list of resources configure authentication tokens before "
+        "deploying your application to production environments webhook requests include signature "
+        "headers customers can upgrade their subscription plan at any time from the billing dashboard "
+        "internationalization supports twenty languages rate limits apply per organization"
+    ).split()
+
+    def sentence() -> str:
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(8, 24))).capitalize()
+        if rng.random() < 0.3:
+            # html2text keeps link targets, which cost many word pieces per character
+            text += f" [see the guide](https://docs.example.com/guides/section-{rng.randint(1, 99)}/getting-started)"
+        return text + '.'
+
+    corpus = []
+    for page in range(pages):
+        parts = [f"# Page {page}", ' '.join(sentence() for _ in range(3))]
+        for section in range(rng.randint(2, 6)):
+            parts.append(f"## Section {section}")
+            parts.append(' '.join(sentence() for _ in range(rng.randint(2, 30))))
+            if rng.random() < 0.5:
+                parts.append('\n'.join(f"- {sentence()}" for _ in range(rng.randint(3, 12))))
+            if rng.random() < 0.3:
+                parts.append("```python\n" + '\n'.join(f"value_{i} = compute({i})" for i in range(20)) + "\n```")
+            for subsection in range(rng.randint(0, 3)):
+                parts.append(f"### Detail {section}.{subsection}")
+                parts.append(' '.join(sentence() for _ in range(rng.randint(1, 12))))
+        corpus.append('\n\n'.join(parts))
+    return corpus
+
+
+def run(name: str, chunker: Callable[[str], List[Tuple[str, Dict[str, Any]]]], corpus: List[str], repeat: int):
+    total_bytes = sum(len(page.encode('utf-8')) for page in corpus)
+    best = float('inf')
+    chunks: List[Tuple[str, Dict[str, Any]]] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = [chunk for page in corpus for chunk in chunker(page)]
+        best = min(best, time.perf_counter() - started)
+
+    # Counted with the tokenizer itself, not the chunker's per-word counter
+    tokenizer = load_tokenizer()
+    token_counts = [len(encoding.ids) for encoding in tokenizer.encode_batch([chunk for chunk, _ in chunks], add_special_tokens=False)]
+    truncated = sum(max(0, tokens + 2 - MINILM_MAX_TOKENS) for tokens in token_counts)  # +2: [CLS], [SEP]
+    print(
+        f"{name:<14} {total_bytes / best / 1e6:8.2f} MB/s  {len(chunks):6d} chunks  "
+        f"avg {sum(token_counts) / max(len(chunks), 1):6.1f} tokens  "
+        f"{sum(1 for tokens in token_counts if tokens + 2 > MINILM_MAX_TOKENS):5d} over limit  "
+        f"{truncated / max(sum(token_counts), 1):6.1%} of tokens never embedded"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="Markdown files to chunk (default: synthetic corpus)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per chunker (best time is reported)")
+    args = parser.parse_args()
+
+    if args.files:
+        corpus = []
+        for path in args.files:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                corpus.append(f.read())
+    else:
+        corpus = synthetic_corpus()
+
+    get_token_counter()  # Load the tokenizer outside the timed runs
+    print(f"{len(corpus)} documents, {sum(map(len, corpus)) / 1e6:.2f}M chars")
+    run("smart_chunk", legacy_chunk, corpus, args.repeat)
+    run("token-aware", token_aware_chunk, corpus, args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
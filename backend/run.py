@@ -1,5 +1,3 @@
-from fastapi import FastAPI
-from app.main import app
 import os
 import sys
 import logging
@@ -21,8 +19,10 @@ if __name__ == "__main__":
     logger.info("Note: Web scraping uses Beautiful Soup and Requests for lightweight HTML parsing.")
     
     try:
+        # Import string, not the app object: CPU pool workers are spawned and re-import
+        # this module as __mp_main__, which must not pull in the whole application
         uvicorn.run(
-            app, 
+            "app.main:app", 
             host="0.0.0.0", 
             port=port,
             log_level="info",